@@ -0,0 +1,324 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from group_conditions import PARSED_COLUMNS, parse_groups
+from results_store import CACHE_DIRNAME, NUMERIC_COLUMNS, file_digest, load_results
+
+# ================= 立方体的维度与统计量 ===================
+# group 列编码了任务和条件（条件本身已区分 origin / squared），再加上 match_type、type 和模型
+DIMENSIONS = ("model_name", "task", "condition", "match_type", "type")
+METRICS = NUMERIC_COLUMNS  # group_accuracy, overall_accuracy
+STATS = ("count", "mean", "std")
+# 缓存内容的格式有变化时加一
+CUBE_VERSION = 1
+
+
+class AggregateCube:
+    """
+    模型 × 任务 × 条件 × match_type × type 的聚合立方体：每个格子保存两种准确率的行数、和、平方和。
+    每一维在最后多一个 "全部" 位置，存放沿这一维求和的结果（所有 2^5 种上卷都预先算好），
+    所以每一维取单个值或全部时，查询就是一次数组下标；取多个值时只对这几个格子求和。
+    和、平方和可以直接相加，平均值、标准差（ddof=1）在查询时由它们算出。
+    """
+
+    def __init__(self, labels, arrays):
+        self.labels = {dim: list(labels[dim]) for dim in DIMENSIONS}
+        self.arrays = arrays  # {"count:<指标>" / "sum:<指标>" / "sumsq:<指标>": 形状为 (各维标签数 + 1) 的数组}
+        self._positions = {dim: {label: i for i, label in enumerate(self.labels[dim])} for dim in DIMENSIONS}
+
+    # ---------- 构建 ----------
+    @classmethod
+    def from_rows(cls, df):
+        """ 由结果表（read_workbook / load_results 的列）构建 """
+        parsed = parse_groups(df)
+        labels, codes = {}, []
+        for dim in DIMENSIONS:
+            values = parsed[dim].astype("category")
+            if dim in PARSED_COLUMNS:  # 任务、条件按 group_conditions 中的顺序，只保留出现过的
+                present = set(values.dropna().unique())
+                values = values.cat.set_categories([c for c in PARSED_COLUMNS[dim] if c in present])
+            else:
+                values = values.cat.remove_unused_categories()
+            labels[dim] = [str(c) for c in values.cat.categories]
+            codes.append(values.cat.codes.to_numpy())
+        valid = np.all([c >= 0 for c in codes], axis=0)  # 无法解析的 group 不计入
+        shape = tuple(len(labels[dim]) for dim in DIMENSIONS)
+        flat = np.ravel_multi_index([c[valid] for c in codes], shape)
+
+        arrays = {}
+        for metric in METRICS:
+            values = parsed[metric].to_numpy(dtype=float)[valid]
+            ok = ~np.isnan(values)
+            for stat, weights in (("count", ok.astype(float)), ("sum", np.where(ok, values, 0.0)),
+                                  ("sumsq", np.where(ok, values, 0.0) ** 2)):
+                cells = np.bincount(flat, weights=weights, minlength=int(np.prod(shape))).reshape(shape)
+                arrays[f"{stat}:{metric}"] = _roll_up(cells)
+        return cls(labels, arrays)
+
+    def combine(self, other, sign=1):
+        """ 两个立方体相加（sign=-1 时相减），标签取并集；results_ingest.py 用它增量更新 """
+        labels = {dim: self.labels[dim] + [v for v in other.labels[dim] if v not in self._positions[dim]]
+                  for dim in DIMENSIONS}
+        shape = tuple(len(labels[dim]) + 1 for dim in DIMENSIONS)
+        arrays = {}
+        for name in self.arrays:
+            out = np.zeros(shape)
+            for cube, factor in ((self, 1), (other, sign)):
+                # 旧位置 → 新位置；"全部" 总在最后，相加后仍是沿这一维的和
+                index = [[labels[dim].index(v) for v in cube.labels[dim]] + [len(labels[dim])] for dim in DIMENSIONS]
+                out[np.ix_(*index)] += factor * cube.arrays[name]
+            arrays[name] = out
+        return AggregateCube(labels, arrays)
+
+    # ---------- 查询 ----------
+    def _index(self, dim, value):
+        if value is None:
+            return [len(self.labels[dim])]  # "全部"
+        values = [value] if isinstance(value, str) else list(value)
+        try:
+            return [self._positions[dim][v] for v in values]
+        except KeyError as error:
+            raise KeyError(f"{dim} 中没有 {error.args[0]}（可选：{', '.join(self.labels[dim])}）") from None
+
+    def array(self, by=(), stat="mean", metric="group_accuracy", **selection):
+        """
+        按 by 中的维度展开、其余维度按 selection 取值后求和，返回 (数组, {维度: 标签列表})。
+        selection 中每一维可以是单个标签、标签列表或 None（全部，默认）；by 中的维度给了列表时只展开这些标签。
+        stat 为 count、mean 或 std；行数为 0 的格子 mean / std 为 NaN。
+        """
+        unknown = set(by) | set(selection)
+        unknown -= set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"未知的维度：{', '.join(unknown)}（可选：{', '.join(DIMENSIONS)}）")
+        if stat not in STATS:
+            raise ValueError(f"未知的统计量：{stat}（可选：{', '.join(STATS)}）")
+        index, out_labels = [], {}
+        for dim in DIMENSIONS:
+            value = selection.get(dim)
+            if dim in by:
+                out_labels[dim] = self.labels[dim] if value is None else self._labels_of(dim, value)
+                index.append([self._positions[dim][v] for v in out_labels[dim]])
+            else:
+                index.append(self._index(dim, value))
+        grid = np.ix_(*index)
+        keep = tuple(i for i, dim in enumerate(DIMENSIONS) if dim in by)
+        drop = tuple(i for i in range(len(DIMENSIONS)) if i not in keep)
+
+        def total(name):
+            return self.arrays[f"{name}:{metric}"][grid].sum(axis=drop)
+
+        # 展开的维度按 by 的顺序排列
+        order = [sorted(by, key=DIMENSIONS.index).index(dim) for dim in by]
+        result = _finish(stat, total("count"), lambda: total("sum"), lambda: total("sumsq"))
+        return np.transpose(result, order), {dim: out_labels[dim] for dim in by}
+
+    def _labels_of(self, dim, value):
+        values = [value] if isinstance(value, str) else list(value)
+        self._index(dim, values)  # 检查标签是否存在
+        return values
+
+    def lookup(self, **selection):
+        """ 一个切片的 {指标: {count, mean, std}}；每一维都是单个标签或全部时直接取格子，不求和 """
+        if any(value is not None and not isinstance(value, str) for value in selection.values()):
+            return {metric: {stat: float(self.array((), stat, metric, **selection)[0]) for stat in STATS}
+                    for metric in METRICS}
+        unknown = set(selection) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"未知的维度：{', '.join(unknown)}（可选：{', '.join(DIMENSIONS)}）")
+        cell = tuple(self._index(dim, selection.get(dim))[0] for dim in DIMENSIONS)
+        out = {}
+        for metric in METRICS:
+            count, total, sumsq = (self.arrays[f"{name}:{metric}"][cell] for name in ("count", "sum", "sumsq"))
+            out[metric] = {stat: float(_finish(stat, count, lambda: total, lambda: sumsq)) for stat in STATS}
+        return out
+
+    def table(self, by, metrics=METRICS, **selection):
+        """ 按 by 展开的整洁表：by 中的各列 + 每个指标的 count / mean / std，只保留有数据的行 """
+        columns = {}
+        for metric in metrics:
+            for stat in STATS:
+                values, labels = self.array(by, stat, metric, **selection)
+                columns[f"{metric}_{stat}"] = values.ravel()
+        index = pd.MultiIndex.from_product([labels[dim] for dim in by], names=list(by))
+        table = pd.DataFrame(columns, index=index)
+        return table[table[f"{metrics[0]}_count"] > 0].reset_index()
+
+    def matrix(self, rows, cols, stat="mean", metric="group_accuracy", **selection):
+        """ rows × cols 的 DataFrame（例如 模型 × 条件 的平均准确率），整行都没有数据的行去掉 """
+        values, labels = self.array((rows, cols), stat, metric, **selection)
+        frame = pd.DataFrame(values, index=pd.Index(labels[rows], name=rows),
+                             columns=pd.Index(labels[cols], name=cols))
+        counts, _ = self.array((rows, cols), "count", metric, **selection)
+        return frame[counts.sum(axis=1) > 0]
+
+    # ---------- 保存 ----------
+    def save(self, path, key=""):
+        """
+        写成 npz；key 记录它对应的结果版本。先写同一文件夹中名字唯一的临时文件再替换，
+        多个进程同时保存同一个立方体时互不影响；出错时删掉临时文件。
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                        prefix=os.path.basename(path) + ".", suffix=".tmp.npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, version=CUBE_VERSION, key=key,
+                         **{f"labels:{dim}": np.array(self.labels[dim], dtype=str) for dim in DIMENSIONS},
+                         **self.arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path, key=None):
+        """ 读取 save 写出的文件；格式版本或 key 不符时返回 None """
+        try:
+            data = np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        with data:
+            if int(data["version"]) != CUBE_VERSION or (key is not None and str(data["key"]) != key):
+                return None
+            labels = {dim: data[f"labels:{dim}"].tolist() for dim in DIMENSIONS}
+            arrays = {name: data[name] for name in data.files if ":" in name and not name.startswith("labels:")}
+        return cls(labels, arrays)
+
+
+def _finish(stat, count, total, sumsq):
+    """ 由行数、和、平方和得到 count / mean / std（ddof=1）；total、sumsq 为按需计算的函数，行数为 0 时为 NaN """
+    if stat == "count":
+        return count
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count > 0, total() / count, np.nan)
+        if stat == "mean":
+            return mean
+        sq = sumsq()
+        ss = sq - count * mean ** 2
+        # 平方和相减会留下约 1e-16 量级的舍入误差，所有值相同时应为 0，开方后会被放大
+        ss = np.where(ss > 1e-12 * sq, ss, 0.0)
+        return np.where(count > 1, np.sqrt(ss / (count - 1)), np.nan)
+
+
+def _roll_up(cells):
+    """ 每一维末尾追加沿这一维的和，得到全部上卷 """
+    for axis in range(cells.ndim):
+        cells = np.concatenate([cells, cells.sum(axis=axis, keepdims=True)], axis=axis)
+    return cells
+
+
+# ================= 按结果版本缓存 ===================
+def load_cube(results_path, refresh=False):
+    """
+    结果表 Excel 或 results_ingest.py 的存储文件夹对应的立方体。
+    Excel：缓存在 .results_cache/<文件名>.cube.npz，文件内容哈希不变就直接读取；
+    存储文件夹：读取随每次导入增量更新的立方体。
+    """
+    if os.path.isdir(results_path):
+        from results_ingest import load_store_cube
+        return load_store_cube(results_path)
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(results_path)), CACHE_DIRNAME)
+    cache_path = os.path.join(cache_dir, os.path.basename(results_path) + ".cube.npz")
+    key = file_digest(results_path)
+    cube = None if refresh else AggregateCube.load(cache_path, key)
+    if cube is None:
+        cube = AggregateCube.from_rows(load_results(results_path))
+        os.makedirs(cache_dir, exist_ok=True)
+        cube.save(cache_path, key)
+    return cube
+
+
+# ================= 检查与基准测试 ===================
+def verify(df, cube):
+    """ 随机抽取切片，与直接对结果表筛选后 groupby 的 count / mean / std 比较 """
+    parsed = parse_groups(df)
+    rng = np.random.default_rng(0)
+    ok = True
+    for _ in range(200):
+        selection = {}
+        for dim in DIMENSIONS:
+            choice = rng.integers(3)
+            if choice == 1:
+                selection[dim] = cube.labels[dim][rng.integers(len(cube.labels[dim]))]
+            elif choice == 2:
+                k = rng.integers(1, len(cube.labels[dim]) + 1)
+                selection[dim] = list(rng.choice(cube.labels[dim], k, replace=False))
+        by = [dim for dim in DIMENSIONS if dim not in selection and rng.random() < 0.3]
+        rows = parsed
+        for dim, value in selection.items():
+            rows = rows[rows[dim].astype(str).isin([value] if isinstance(value, str) else value)]
+        got = cube.table(by, **selection) if by else None
+        for metric in METRICS:
+            if by:
+                want = rows.groupby([rows[d].astype(str) for d in by])[metric].agg(["count", "mean", "std"])
+                g = got.set_index(by)[[f"{metric}_count", f"{metric}_mean", f"{metric}_std"]]
+                g.columns = ["count", "mean", "std"]
+                ok &= len(g) == len(want) and np.allclose(g.loc[want.index].to_numpy(), want.to_numpy(),
+                                                          rtol=1e-9, atol=1e-9, equal_nan=True)
+            else:
+                got_cell = cube.lookup(**selection)[metric]
+                want = [len(rows), rows[metric].mean(), rows[metric].std()]
+                ok &= np.allclose([got_cell[s] for s in STATS], want, rtol=1e-9, atol=1e-9, equal_nan=True)
+    print(f"  200 个随机切片与直接 groupby {'一致' if ok else '不一致'}")
+    return ok
+
+
+def benchmark(df, cube, repeat=1000):
+    """ 单个切片的查询：立方体下标与对结果表筛选后求平均 """
+    parsed = parse_groups(df)
+    model = cube.labels["model_name"][0]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        cube.lookup(model_name=model, task="stroop", condition="Incongruent")
+    cube_us = (time.perf_counter() - start) / repeat * 1e6
+
+    start = time.perf_counter()
+    for _ in range(repeat // 10):
+        rows = parsed[(parsed["model_name"] == model) & (parsed["task"] == "stroop")
+                      & (parsed["condition"] == "Incongruent")]
+        rows[list(METRICS)].agg(["count", "mean", "std"])
+    filter_us = (time.perf_counter() - start) / (repeat // 10) * 1e6
+    print(f"  单个切片（两种准确率的 count / mean / std）：立方体 {cube_us:.0f} µs，筛选 + 聚合 {filter_us:.0f} µs"
+          f"（{filter_us / cube_us:.0f} 倍）")
+
+
+def main():
+    import argparse
+
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Data", "Psychophysics_run.xlsx")
+    parser = argparse.ArgumentParser(description="模型 × 任务 × 条件 × match_type × type 的聚合立方体")
+    parser.add_argument("path", nargs="?", default=default_path,
+                        help="结果表 Excel 或 results_ingest.py 的存储文件夹，默认 Data/Psychophysics_run.xlsx")
+    parser.add_argument("--by", default="task,condition", help="按这些维度列出，逗号分隔，默认 task,condition")
+    parser.add_argument("--refresh", action="store_true", help="忽略缓存重新构建")
+    parser.add_argument("--verify", action="store_true", help="与直接 groupby 比较")
+    parser.add_argument("--benchmark", action="store_true", help="测量构建和查询耗时")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    cube = load_cube(args.path, args.refresh)
+    print(f"立方体：{' × '.join(f'{dim} {len(cube.labels[dim])}' for dim in DIMENSIONS)}，"
+          f"读取用时 {(time.perf_counter() - start) * 1000:.0f} ms")
+    with pd.option_context("display.width", 250, "display.max_columns", None, "display.max_rows", None):
+        print(cube.table(args.by.split(",")).to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+    if args.verify or args.benchmark:
+        df = load_results(args.path) if not os.path.isdir(args.path) else __import__("results_ingest").load_rows(args.path)
+        if args.verify:
+            print("检查：")
+            if not verify(df, cube):
+                raise SystemExit(1)
+        if args.benchmark:
+            print("基准测试：")
+            start = time.perf_counter()
+            AggregateCube.from_rows(df)
+            print(f"  构建（{len(df)} 行）：{(time.perf_counter() - start) * 1000:.0f} ms")
+            benchmark(df, cube)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from figure_engine import DEFAULT_OUTPUT_DIR, DEFAULT_RESULTS
+from figure_specs import FIGURES
+from results_store import file_digest
+
+ENGINE_DIR = os.path.dirname(os.path.abspath(__file__))
+SUMMARY_DIR = os.path.join(ENGINE_DIR, "..", "Violin_generator", "Summary_violin")
+# 输出文件夹中的构建索引：{目标名: 输入哈希}
+INDEX_FILENAME = ".figure_index.json"
+# 绘图代码：任何一个文件内容改变，所有图都重新生成
+ENGINE_SOURCES = ("figure_engine.py", "trajectories.py", "group_conditions.py", "results_store.py", "paired_stats.py",
+                  "resampling.py", "results_ingest.py", "aggregate_cube.py")
+SUMMARY_TARGET = "summary"
+
+
+# ================= 目标与输入哈希 ===================
+def _digest(payload):
+    return hashlib.blake2b(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode(),
+                           digest_size=16).hexdigest()
+
+
+def _sources_digest(paths):
+    return _digest([file_digest(path) for path in paths])
+
+
+def results_digest(results_path):
+    """ 结果表的内容哈希；存储文件夹（results_ingest.py）用它当前的立方体 """
+    if os.path.isdir(results_path):
+        from results_ingest import cube_path
+        return file_digest(cube_path(results_path))
+    return file_digest(results_path)
+
+
+def plan_targets(results_path, formats, dpi):
+    """
+    返回 {目标名: {"deps": [...], "outputs": [...], "key": 输入哈希}}。
+    每张图的输入：结果表内容哈希、它在 FIGURES 中的 spec、绘图代码、输出格式和 dpi；
+    summary（Graph_Summary.py 的 2×3 合并图）的输入：它依赖的 6 张图的哈希和 Graph_Summary.py 本身。
+    """
+    sys.path.insert(0, SUMMARY_DIR)
+    import Graph_Summary
+
+    shared = {
+        "results": results_digest(results_path),
+        "engine": _sources_digest([os.path.join(ENGINE_DIR, f) for f in ENGINE_SOURCES]),
+        "formats": list(formats),
+        "dpi": dpi,
+    }
+    targets = {}
+    for name, spec in FIGURES.items():
+        targets[name] = {
+            "deps": [],
+            "outputs": [f"{spec['output']}.{fmt}" for fmt in formats],
+            "key": _digest(dict(shared, spec=spec)),
+        }
+
+    pdf_owner = {f"{spec['output']}.pdf": name for name, spec in FIGURES.items()}
+    if "pdf" in formats and all(f in pdf_owner for f in Graph_Summary.pdf_files):
+        deps = [pdf_owner[f] for f in Graph_Summary.pdf_files]
+        targets[SUMMARY_TARGET] = {
+            "deps": deps,
+            "outputs": [Graph_Summary.OUTPUT_FILE],
+            "key": _digest({"deps": [targets[d]["key"] for d in deps],
+                            "script": file_digest(Graph_Summary.__file__)}),
+        }
+    return targets
+
+
+def load_index(output_dir):
+    try:
+        with open(os.path.join(output_dir, INDEX_FILENAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}  # 没有索引或索引损坏：全部重新生成
+
+
+def save_index(index, output_dir):
+    path = os.path.join(output_dir, INDEX_FILENAME)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def stale_targets(targets, index, output_dir, force=False):
+    """ 哈希变化、输出文件缺失或依赖需要重建的目标 """
+    existing = set(os.listdir(output_dir)) if os.path.isdir(output_dir) else set()
+    stale = set()
+    for name, target in targets.items():  # 字典顺序中依赖总在前面
+        if (force or index.get(name) != target["key"]
+                or not all(f in existing for f in target["outputs"])
+                or any(d in stale for d in target["deps"])):
+            stale.add(name)
+    return stale
+
+
+# ================= 进程池 ===================
+_worker_data = None
+
+
+def _init_worker(results_path):
+    """ 每个进程只读取一次聚合立方体 """
+    import matplotlib
+    matplotlib.use("Agg")
+    from figure_engine import load_figure_data
+
+    global _worker_data
+    _worker_data = (results_path, load_figure_data(results_path))
+
+
+def _build_target(name, output_dir, formats, dpi):
+    start = time.perf_counter()
+    if name == SUMMARY_TARGET:
+        sys.path.insert(0, SUMMARY_DIR)
+        from Graph_Summary import build_summary
+        build_summary(output_dir)
+    else:
+        from figure_engine import render_figure
+        render_figure(name, _worker_data[1], output_dir, formats, dpi)
+    return name, time.perf_counter() - start, os.getpid()
+
+
+def build(results_path=DEFAULT_RESULTS, output_dir=DEFAULT_OUTPUT_DIR, formats=("png", "pdf"), dpi=300,
+          workers=None, force=False, only=None):
+    """
+    只重建过期的图，互不依赖的图分到进程池中并行生成；summary 在它的 6 张图都完成后才提交。
+    每完成一个目标就把它的哈希写回索引，中途中断时已完成的图不会重做。
+    返回 (重建的目标列表, 跳过的目标数)。
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    targets = plan_targets(results_path, formats, dpi)
+    if only:
+        # 只构建指定的目标及其依赖
+        wanted, pending = set(), list(only)
+        while pending:
+            name = pending.pop()
+            if name not in targets:
+                raise ValueError(f"未知的目标：{name}（可选：{', '.join(targets)}）")
+            if name not in wanted:
+                wanted.add(name)
+                pending += targets[name]["deps"]
+        targets = {name: target for name, target in targets.items() if name in wanted}
+
+    index = load_index(output_dir)
+    todo = stale_targets(targets, index, output_dir, force)
+    skipped = len(targets) - len(todo)
+    if not todo:
+        return [], skipped
+
+    workers = workers or min(len(todo), os.cpu_count() or 1)
+    # 先在主进程中建好结果缓存和立方体，工作进程只读取已有的缓存，不会同时在冷缓存上各建一份
+    from figure_engine import load_figure_data
+    load_figure_data(results_path)
+    done, built, running = set(), [], {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(results_path,)) as pool:
+        while len(done) < len(todo):
+            for name in todo:
+                if name not in done and name not in running.values() and \
+                        all(d in done or d not in todo for d in targets[name]["deps"]):
+                    running[pool.submit(_build_target, name, output_dir, formats, dpi)] = name
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, seconds, pid = future.result()
+                del running[future]
+                done.add(name)
+                built.append((name, seconds, pid))
+                index[name] = targets[name]["key"]
+                save_index(index, output_dir)
+    return built, skipped
+
+
+# ================= 检查 ===================
+def verify(results_path=DEFAULT_RESULTS, workers=3):
+    """
+    把结果表复制到临时文件夹（没有 .results_cache），用多个进程构建几张图：
+    全部构建成功，缓存文件夹中没有残留的临时文件。
+    """
+    import shutil
+    import tempfile
+
+    from results_store import CACHE_DIRNAME
+
+    names = list(FIGURES)[:workers]
+    with tempfile.TemporaryDirectory() as folder:
+        copy = os.path.join(folder, os.path.basename(results_path))
+        shutil.copy2(results_path, copy)
+        output_dir = os.path.join(folder, "figures")
+        built, _ = build(copy, output_dir, ("png",), dpi=50, workers=workers, only=names)
+        leftovers = [f for f in os.listdir(os.path.join(folder, CACHE_DIRNAME)) if f.endswith((".tmp", ".tmp.npz"))]
+    ok = sorted(name for name, _, _ in built) == sorted(names) and not leftovers
+    print(f"  冷缓存、{workers} 个进程：构建 {len(built)} / {len(names)} 张图，残留临时文件 {len(leftovers)} 个"
+          f"（{'通过' if ok else '失败'}）")
+    return ok
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="并行重建过期的图（含 Graph_Summary 合并图），未变化的图跳过")
+    parser.add_argument("--results", default=DEFAULT_RESULTS,
+                        help="结果表 Excel 或 results_ingest.py 的存储文件夹，默认 Data/Psychophysics_run.xlsx")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help="输出文件夹，默认 Figures/Psychophysic_Graph")
+    parser.add_argument("--only", default=None, help="只构建这些目标（及其依赖），逗号分隔")
+    parser.add_argument("--format", default="png,pdf", help="输出格式，逗号分隔，默认 png,pdf")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认 CPU 核数")
+    parser.add_argument("--force", action="store_true", help="忽略索引，全部重新生成")
+    parser.add_argument("--verify", action="store_true", help="在没有缓存的结果表副本上用多个进程构建几张图")
+    args = parser.parse_args()
+
+    if args.verify:
+        print("检查：")
+        if not verify(args.results):
+            raise SystemExit(1)
+        return
+
+    start = time.perf_counter()
+    built, skipped = build(args.results, args.output_dir, tuple(args.format.split(",")), args.dpi,
+                           args.workers, args.force, args.only.split(",") if args.only else None)
+    for name, seconds, pid in built:
+        print(f"  {name:42s} {seconds:5.1f} 秒（进程 {pid}）")
+    print(f"重建 {len(built)} 个目标，跳过 {skipped} 个未变化的目标 → {args.output_dir}，"
+          f"用时 {time.perf_counter() - start:.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import os
+import time
+
+import numpy as np
+
+from aggregate_cube import load_cube
+from figure_specs import FIGURES, TASK_TITLES
+from paired_stats import adjust_pvalues, paired_t, significance_stars
+from trajectories import draw_trajectories
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+DEFAULT_RESULTS = os.path.join(REPO_ROOT, "Data", "Psychophysics_run.xlsx")
+DEFAULT_OUTPUT_DIR = os.path.join(REPO_ROOT, "Figures", "Psychophysic_Graph")
+STATS_FILENAME = "paired_t_tests.csv"
+# 星标所用的 p 值：ttest 为配对 t 检验；permutation 为 resampling.py 的符号置换检验（固定种子，可复现）
+STATS_METHODS = ("ttest", "permutation")
+
+
+# ================= 数据：读取并聚合一次 ===================
+def load_figure_data(results_path=DEFAULT_RESULTS):
+    """
+    结果表对应的聚合立方体（aggregate_cube.py，按结果版本缓存）。所有图都从它取数：
+    单个任务直接取格子，跨任务平均先把各任务的和、行数相加再相除，与原脚本对原始行求平均的结果相同。
+    results_path 也可以是 results_ingest.py 的存储文件夹。
+    """
+    return load_cube(results_path)
+
+
+def model_means(cube, tasks, conditions):
+    """ (模型 × 条件) 的平均准确率矩阵，列按 conditions 的顺序排列，缺失为 NaN """
+    return cube.matrix("model_name", "condition", task=list(tasks), condition=list(conditions))
+
+
+# ================= 统计 ===================
+def paired_tests(wide, pairs, method="ttest", seed=0):
+    """
+    对每一对条件做配对 t 检验（只用两个条件都有值的模型），所有条件对在 paired_stats.paired_t 中一次算完。
+    method="permutation" 时 p 值和星标改用符号置换检验（t 仍为配对 t 统计量）。
+    返回 [(condA, condB, t, p, 星标, 模型数), ...]
+    """
+    if method not in STATS_METHODS:
+        raise ValueError(f"未知的检验方法：{method}（可选：{', '.join(STATS_METHODS)}）")
+    a = wide[[cond_a for cond_a, _ in pairs]].to_numpy(dtype=float).T
+    b = wide[[cond_b for _, cond_b in pairs]].to_numpy(dtype=float).T
+    res = paired_t(a, b)
+    p_values = res["p"]
+    if method == "permutation":
+        from resampling import permutation_pvalue
+
+        seeds = np.random.SeedSequence(seed).spawn(len(pairs))
+        p_values = [permutation_pvalue(a[i] - b[i], seed=seeds[i]) for i in range(len(pairs))]
+    return [(cond_a, cond_b, t_stat, p_val, significance_stars(p_val), int(n))
+            for (cond_a, cond_b), t_stat, p_val, n in zip(pairs, res["t"], p_values, res["n"])]
+
+
+# ================= 绘制 ===================
+def _style_axis(ax, grid_alpha):
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+    ax.set_axisbelow(True)
+    ax.grid(axis="y", linestyle="--", alpha=grid_alpha)
+
+
+def draw_paired(spec, cube, stats="ttest"):
+    """ 小提琴 + 每个模型一条连线 + 配对检验星标，返回 (fig, 检验结果) """
+    import matplotlib.pyplot as plt
+
+    conditions = spec["conditions"]
+    positions = list(range(1, len(conditions) + 1))
+    wide = model_means(cube, spec["tasks"], conditions)
+
+    fig, ax = plt.subplots(figsize=spec["figsize"])
+    fig.patch.set_facecolor("white")
+    ax.set_title(spec["title"], fontsize=spec["title_fontsize"], fontweight="bold")
+
+    vplot = ax.violinplot([wide[c].dropna() for c in conditions], positions=positions,
+                          showmeans=False, showextrema=False, widths=0.6)
+    for body, color in zip(vplot["bodies"], spec["violin_colors"]):
+        body.set_facecolor(color)
+        body.set_edgecolor("black")
+        body.set_linewidth(1.2)
+        body.set_alpha(0.8)
+
+    draw_trajectories(ax, wide, positions, spec["scatter_colors"], line_alpha=spec["line_alpha"],
+                      point_size=spec["point_size"], point_alpha=spec["point_alpha"])
+
+    tests = paired_tests(wide, spec["pairs"], stats)
+    if spec["annotation"] == "brackets":
+        # 多对条件：括号从最高点上方 0.05 开始，每对再上移 0.05
+        line_height = np.nanmax(wide.to_numpy()) + 0.05
+        for i, (cond_a, cond_b, _, _, star, _) in enumerate(tests):
+            x1, x2 = conditions.index(cond_a) + 1, conditions.index(cond_b) + 1
+            h = line_height + i * 0.05
+            ax.plot([x1, x1, x2, x2], [h, h + 0.01, h + 0.01, h], lw=1.2, c="black")
+            ax.text((x1 + x2) * 0.5, h + 0.012, star, ha="center", va="bottom", fontsize=14, fontweight="bold")
+    else:
+        # 一对条件：一条横线 + 星标
+        for cond_a, cond_b, _, _, star, _ in tests:
+            x1, x2 = conditions.index(cond_a) + 1, conditions.index(cond_b) + 1
+            bar_y = max(wide[cond_a].max(), wide[cond_b].max()) + 0.04
+            ax.plot([x1, x2], [bar_y, bar_y], color="black", linewidth=2)
+            ax.text((x1 + x2) * 0.5, bar_y + 0.005, star, ha="center", va="bottom", fontsize=16)
+
+    ax.set_xticks(positions)
+    ax.set_xticklabels(spec["tick_labels"], fontsize=spec["tick_fontsize"])
+    ax.set_ylabel("Group Accuracy", fontsize=spec["ylabel_fontsize"])
+    _style_axis(ax, grid_alpha=0.5)
+    fig.tight_layout()
+    return fig, tests
+
+
+def draw_distribution(spec, cube, stats="ttest"):
+    """ 每个任务一个子图：小提琴 + 箱线图 + 红色均值点，共享 y 轴 """
+    import matplotlib.pyplot as plt
+
+    conditions = spec["conditions"]
+    positions = list(range(1, len(conditions) + 1))
+    fig, axes = plt.subplots(nrows=1, ncols=len(spec["tasks"]), figsize=spec["figsize"], sharey=True)
+    fig.patch.set_facecolor("white")
+    for i, (ax, task) in enumerate(zip(np.atleast_1d(axes), spec["tasks"])):
+        wide = model_means(cube, [task], conditions)
+        data = [wide[c].dropna() for c in conditions]
+
+        vplot = ax.violinplot(dataset=data, positions=positions, showmeans=False, showextrema=False,
+                              widths=spec["violin_width"])
+        for body, color in zip(vplot["bodies"], spec["violin_colors"]):
+            body.set_facecolor(color)
+            body.set_alpha(spec["violin_alpha"])
+        ax.boxplot(data, positions=positions, widths=spec["box_width"], showfliers=False, patch_artist=True,
+                   boxprops=dict(facecolor="white", edgecolor="black"))
+        ax.scatter(positions, [d.mean() for d in data], color="red", zorder=3, s=60)
+
+        ax.set_xticks(positions)
+        ax.set_xticklabels(spec["tick_labels"], fontsize=spec["tick_fontsize"])
+        ax.set_title(TASK_TITLES[task] + spec["panel_suffix"], fontsize=spec["title_fontsize"], fontweight="bold")
+        if i == 0:
+            ax.set_ylabel("Group Accuracy", fontsize=spec["ylabel_fontsize"])
+        _style_axis(ax, grid_alpha=spec["grid_alpha"])
+    fig.tight_layout()
+    return fig, []
+
+
+DRAWERS = {
+    "paired": draw_paired,
+    "distribution": draw_distribution,
+}
+
+
+# ================= 构建 ===================
+def render_figure(name, cube, output_dir, formats=("png", "pdf"), dpi=300, close=True, stats="ttest"):
+    """ 按 FIGURES[name] 画一张图并保存为各个格式，返回 (输出路径列表, 检验结果)；stats 见 STATS_METHODS """
+    import matplotlib.pyplot as plt
+
+    spec = FIGURES[name]
+    fig, tests = DRAWERS[spec["kind"]](spec, cube, stats)
+    paths = []
+    for fmt in formats:
+        path = os.path.join(output_dir, f"{spec['output']}.{fmt}")
+        fig.savefig(path, dpi=dpi, bbox_inches="tight")
+        paths.append(path)
+    if close:
+        plt.close(fig)
+    for cond_a, cond_b, t_stat, p_val, star, n in tests:
+        method = "，置换检验" if stats == "permutation" else ""
+        print(f"[{spec['label']}] {cond_a} vs. {cond_b} -> t={t_stat:.3f}, p={p_val:.3e}, star={star}（{n} 个模型{method}）")
+    return paths, tests
+
+
+def build_figures(names=None, results_path=DEFAULT_RESULTS, output_dir=DEFAULT_OUTPUT_DIR,
+                  formats=("png", "pdf"), dpi=300, show=False, stats="ttest"):
+    """
+    在一个进程里生成 names 中的图（默认全部）：立方体只读取一次，所有配对检验结果另存为 paired_t_tests.csv
+    （p_holm 为每张图内各条件对的 Holm 校正 p 值；图上的星标仍按未校正的 p）。
+    stats="permutation" 时星标与 p 值改用符号置换检验。
+    show=True 时不关闭图窗，最后调用 plt.show()（单独运行某个旧脚本时使用）。
+    """
+    import matplotlib
+    if not show:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
+    names = list(FIGURES) if names is None else list(names)
+    unknown = [n for n in names if n not in FIGURES]
+    if unknown:
+        raise ValueError(f"未知的图：{', '.join(unknown)}（可选：{', '.join(FIGURES)}）")
+    os.makedirs(output_dir, exist_ok=True)
+
+    cube = load_figure_data(results_path)
+    rows, outputs = [], {}
+    for name in names:
+        outputs[name], tests = render_figure(name, cube, output_dir, formats, dpi, close=not show, stats=stats)
+        rows += [(name, *test) for test in tests]
+
+    if rows:
+        table = pd.DataFrame(rows, columns=["figure", "condition_a", "condition_b", "t", "p", "star", "n_models"])
+        table["p_holm"] = table.groupby("figure", sort=False)["p"].transform(lambda p: adjust_pvalues(p.to_numpy()))
+        table["method"] = stats
+        table.to_csv(os.path.join(output_dir, STATS_FILENAME), index=False)
+    if show:
+        plt.show()
+    return outputs
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="按 figure_specs.py 中的定义一次生成全部小提琴图")
+    parser.add_argument("--results", default=DEFAULT_RESULTS,
+                        help="结果表 Excel 或 results_ingest.py 的存储文件夹，默认 Data/Psychophysics_run.xlsx")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help="输出文件夹，默认 Figures/Psychophysic_Graph")
+    parser.add_argument("--only", default=None, help="只生成这些图，逗号分隔的图名")
+    parser.add_argument("--format", default="png,pdf", help="输出格式，逗号分隔，默认 png,pdf")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--stats", choices=STATS_METHODS, default="ttest",
+                        help="星标所用的检验：ttest（默认）或 permutation（符号置换检验）")
+    parser.add_argument("--list", action="store_true", help="列出全部图名")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, spec in FIGURES.items():
+            print(f"{name:42s} {spec['kind']:13s} {spec['output']}")
+        return
+
+    names = args.only.split(",") if args.only else None
+    start = time.perf_counter()
+    outputs = build_figures(names, args.results, args.output_dir, tuple(args.format.split(",")), args.dpi,
+                            stats=args.stats)
+    print(f"生成 {len(outputs)} 张图 → {args.output_dir}，用时 {time.perf_counter() - start:.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
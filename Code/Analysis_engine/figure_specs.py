@@ -0,0 +1,172 @@
+from group_conditions import FOUR_CONDITIONS, TWO_CONDITIONS
+
+# ================= 通用样式 ===================
+VIOLIN_COLORS = ["#9ecae1", "#a1d99b", "#fdae6b", "#c994c7"]  # 浅蓝、浅绿、浅橙、浅紫
+SCATTER_COLORS = ["#3182bd", "#31a354", "#e6550d", "#7b3294"]  # 对应的深色
+
+FOUR_CONDITION_PAIRS = [
+    ("Fully Congruent", "Fully Incongruent"),
+    ("Fully Incongruent", "Stimulus Congruent, Response Incongruent"),
+    ("Stimulus Congruent, Response Incongruent", "Stimulus Incongruent, Response Congruent"),
+]
+TWO_CONDITION_PAIRS = [("Congruent", "Incongruent")]
+
+FOUR_CONDITION_TICKS = [
+    "Fully Congruent",
+    "Fully Incongruent",
+    "Stimulus-congruent/\nResponse-incongruent",
+    "Stimulus-incongruent/\nResponse-congruent",
+]
+FOUR_CONDITION_SHORT_TICKS = [
+    "Fully Congruent",
+    "Fully Incongruent",
+    "Stimulus-\ncongruent/\nResponse-\nincongruent",
+    "Stimulus-\nincongruent/\nResponse-\ncongruent",
+]
+
+TASK_TITLES = {
+    "stroop": "Stroop",
+    "flanker_letter": "Flanker Letter",
+    "flanker_number": "Flanker Number",
+}
+ALL_TASKS = list(TASK_TITLES)
+
+# ================= 图的类型 ===================
+# paired：每个模型先按条件求平均，画小提琴 + 每个模型一条连线 + 配对 t 检验星标
+#   annotation="brackets"：多对条件，括号逐层上移（四种条件图）
+#   annotation="bar"：只有一对条件，一条横线 + 星标（Congruent vs. Incongruent 图）
+# distribution：每个任务一个子图，小提琴 + 箱线图 + 红色均值点，共享 y 轴
+FOUR_CONDITION_STYLE = {
+    "kind": "paired",
+    "variant": "squared",
+    "conditions": list(FOUR_CONDITIONS),
+    "tick_labels": FOUR_CONDITION_TICKS,
+    "pairs": FOUR_CONDITION_PAIRS,
+    "annotation": "brackets",
+    "figsize": (12.5, 7.5),
+    "title_fontsize": 18,
+    "tick_fontsize": 16,
+    "ylabel_fontsize": 16,
+    "violin_colors": VIOLIN_COLORS,
+    "scatter_colors": SCATTER_COLORS,
+    "line_alpha": 0.4,
+    "point_size": 20,
+    "point_alpha": 0.9,
+}
+
+TWO_CONDITION_STYLE = {
+    "kind": "paired",
+    "variant": "origin",
+    "conditions": list(TWO_CONDITIONS),
+    "tick_labels": list(TWO_CONDITIONS),
+    "pairs": TWO_CONDITION_PAIRS,
+    "annotation": "bar",
+    "figsize": (10, 6),
+    "title_fontsize": 18,
+    "tick_fontsize": 16,
+    "ylabel_fontsize": 16,
+    "violin_colors": VIOLIN_COLORS[:2],
+    "scatter_colors": SCATTER_COLORS[:2],
+    "line_alpha": 0.5,
+    "point_size": 40,
+    "point_alpha": 0.8,
+}
+
+DISTRIBUTION_STYLE = {
+    "kind": "distribution",
+    "tasks": ALL_TASKS,
+    "violin_colors": VIOLIN_COLORS,
+    "violin_alpha": 0.6,
+    "violin_width": 0.7,
+    "title_fontsize": 18,
+    "ylabel_fontsize": 16,
+}
+
+# ================= 论文中的全部图 ===================
+# 键为图名（--only 使用），output 为输出文件名（不含扩展名），与 Figures/Psychophysic_Graph 中的文件名一致
+FIGURES = {
+    "origin": dict(
+        DISTRIBUTION_STYLE,
+        output="2.Origin",
+        variant="origin",
+        conditions=list(TWO_CONDITIONS),
+        tick_labels=list(TWO_CONDITIONS),
+        panel_suffix="",
+        figsize=(12, 5),
+        box_width=0.1,
+        tick_fontsize=16,
+        grid_alpha=0.6,
+    ),
+    "squared": dict(
+        DISTRIBUTION_STYLE,
+        output="2.Squared",
+        variant="squared",
+        conditions=list(FOUR_CONDITIONS),
+        tick_labels=FOUR_CONDITION_SHORT_TICKS,
+        panel_suffix=" Squared",
+        figsize=(18, 5),
+        box_width=0.15,
+        tick_fontsize=9,
+        grid_alpha=0.5,
+    ),
+    "stroop_congruent_vs_incongruent": dict(
+        TWO_CONDITION_STYLE,
+        output="3.Stroop_Congruent_vs_Incongruent",
+        title="Stroop: Congruent vs. Incongruent",
+        label="Stroop",
+        tasks=["stroop"],
+    ),
+    "flanker_letter_congruent_vs_incongruent": dict(
+        TWO_CONDITION_STYLE,
+        output="3.Flanker_Letter_Congruent_vs_Incongruent",
+        title="Flanker Letter: Congruent vs. Incongruent",
+        label="Flanker Letter",
+        tasks=["flanker_letter"],
+    ),
+    "flanker_number_congruent_vs_incongruent": dict(
+        TWO_CONDITION_STYLE,
+        output="3.Flanker_Number_Congruent_vs_Incongruent",
+        title="Flanker Number: Congruent vs. Incongruent",
+        label="Flanker Number",
+        tasks=["flanker_number"],
+    ),
+    "average_congruent_vs_incongruent": dict(
+        TWO_CONDITION_STYLE,
+        output="3.Congruent_vs_Incongruent_Averaged_over_3tasks",
+        title="Congruent vs. Incongruent: Averaged over 3 tasks",
+        label="Average over 3 tasks",
+        tasks=ALL_TASKS,
+    ),
+    "stroop_four_conditions": dict(
+        FOUR_CONDITION_STYLE,
+        output="4.Stroop_4_Condition_Comparisons",
+        title="Stroop: 4 Condition Comparisons",
+        label="Stroop",
+        tasks=["stroop"],
+    ),
+    "flanker_letter_four_conditions": dict(
+        FOUR_CONDITION_STYLE,
+        output="4.Flanker_Letter_4_Condition_Comparisons",
+        title="Flanker Letter: 4 Condition Comparisons",
+        label="Flanker Letter",
+        tasks=["flanker_letter"],
+    ),
+    "flanker_number_four_conditions": dict(
+        FOUR_CONDITION_STYLE,
+        output="4.Flanker_Number_4_Condition_Comparisons",
+        title="Flanker Number: 4 Condition Comparisons",
+        label="Flanker Number",
+        tasks=["flanker_number"],
+    ),
+    "average_four_conditions": dict(
+        FOUR_CONDITION_STYLE,
+        output="4.Four_Condition_Comparisions_Average_over_3tasks",
+        title="Four Condition Comparisons: Averaged over 3 tasks",
+        label="Average over 3 tasks",
+        tasks=ALL_TASKS,
+        figsize=(15, 9),
+        title_fontsize=20.5,
+        tick_fontsize=19,
+        ylabel_fontsize=20,
+    ),
+}
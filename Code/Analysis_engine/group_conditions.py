@@ -0,0 +1,162 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+# ================= group 命名规则 ===================
+# group 列的取值形如 <task>[_squared]_<condition>：
+#   stroop_Congruent、flanker_letter_Incongruent                           （origin 版本，两种条件）
+#   stroop_squared_Fully Congruent、
+#   flanker_number_squared_Stimulus Congruent, Response Incongruent        （squared 版本，四种条件）
+TASKS = ("stroop", "flanker_letter", "flanker_number")
+VARIANTS = ("origin", "squared")
+TWO_CONDITIONS = ("Congruent", "Incongruent")
+FOUR_CONDITIONS = (
+    "Fully Congruent",
+    "Fully Incongruent",
+    "Stimulus Congruent, Response Incongruent",
+    "Stimulus Incongruent, Response Congruent",
+)
+CONDITIONS = TWO_CONDITIONS + FOUR_CONDITIONS
+CONGRUENCY = ("congruent", "incongruent")
+
+# 每种条件下刺激 / 反应是否一致；origin 版本只区分刺激是否一致，反应一栏为空
+CONDITION_CONGRUENCY = {
+    "Congruent": ("congruent", None),
+    "Incongruent": ("incongruent", None),
+    "Fully Congruent": ("congruent", "congruent"),
+    "Fully Incongruent": ("incongruent", "incongruent"),
+    "Stimulus Congruent, Response Incongruent": ("congruent", "incongruent"),
+    "Stimulus Incongruent, Response Congruent": ("incongruent", "congruent"),
+}
+
+GROUP_PATTERN = (r"^(?P<task>" + "|".join(TASKS) + r")(?:_(?P<variant>squared))?"
+                 r"_(?P<condition>" + "|".join(CONDITIONS) + r")$")
+
+# parse_groups 添加的列及其类别（类别顺序即排序 / 分组时的顺序）
+PARSED_COLUMNS = {
+    "task": TASKS,
+    "variant": VARIANTS,
+    "condition": CONDITIONS,
+    "stimulus": CONGRUENCY,
+    "response": CONGRUENCY,
+}
+
+
+# ================= 解析 ===================
+def group_table(groups):
+    """
+    把不重复的 group 取值解析成一张表（以 group 为索引），列为 task / variant / condition / stimulus / response，
+    均为 categorical。不符合命名规则的 group 各列为空。
+    """
+    values = pd.Series(pd.unique(pd.Series(groups, dtype=object).dropna()), dtype=object)
+    parts = values.str.extract(GROUP_PATTERN)
+    matched = parts["task"].notna()
+    parts.loc[matched, "variant"] = parts.loc[matched, "variant"].fillna("origin")
+    congruency = parts["condition"].map(lambda c: CONDITION_CONGRUENCY.get(c, (None, None)))
+    parts["stimulus"] = congruency.str[0]
+    parts["response"] = congruency.str[1]
+    table = pd.DataFrame({column: pd.Categorical(parts[column], categories=categories)
+                          for column, categories in PARSED_COLUMNS.items()})
+    table.index = pd.Index(values, name="group")
+    return table
+
+
+def parse_groups(df, column="group"):
+    """
+    返回 df 的副本，并添加 task / variant / condition / stimulus / response 五列。
+    只解析 group 的不重复取值（categorical 的类别），再按整数编码一次性映射到所有行，
+    不对每一行做字符串匹配。
+    """
+    groups = df[column].astype("category")
+    table = group_table(groups.cat.categories)
+    codes = groups.cat.codes.to_numpy()
+    out = df.copy()
+    for name, categories in PARSED_COLUMNS.items():
+        # 最后补一个 -1：group 为空的行（编码 -1）对应到空值
+        lookup = np.append(table[name].cat.codes.to_numpy(), -1)
+        out[name] = pd.Categorical.from_codes(lookup[codes], categories=categories)
+    return out
+
+
+# ================= 等价性检查与基准测试 ===================
+def label_four_conditions(g):
+    """ 原来各 violin 脚本中逐行调用的写法，只用于比较 """
+    if isinstance(g, str):
+        if "Fully Congruent" in g:
+            return "Fully Congruent"
+        elif "Fully Incongruent" in g:
+            return "Fully Incongruent"
+        elif "Stimulus Congruent, Response Incongruent" in g:
+            return "Stimulus Congruent, Response Incongruent"
+        elif "Stimulus Incongruent, Response Congruent" in g:
+            return "Stimulus Incongruent, Response Congruent"
+    return None
+
+
+def label_congruency(g):
+    """ 原来 Congruent_vs_Incongruent 脚本中逐行调用的写法，只用于比较 """
+    if isinstance(g, str):
+        if g.endswith("_Congruent"):
+            return "Congruent"
+        elif g.endswith("_Incongruent"):
+            return "Incongruent"
+    return None
+
+
+def verify(df):
+    """ 检查解析结果与原来两个逐行函数的标注逐行一致 """
+    parsed = parse_groups(df)
+    condition = parsed["condition"].astype(object)
+    four = condition.where(condition.isin(FOUR_CONDITIONS))
+    two = condition.where(condition.isin(TWO_CONDITIONS))
+    groups = df["group"].astype(object)
+    same_four = four.fillna("").tolist() == groups.map(label_four_conditions).fillna("").tolist()
+    same_two = two.fillna("").tolist() == groups.map(label_congruency).fillna("").tolist()
+    print(f"  四种条件：{'一致' if same_four else '不一致'}，Congruent / Incongruent：{'一致' if same_two else '不一致'}")
+    return same_four and same_two
+
+
+def benchmark(df, copies=500):
+    """ 把结果表复制 copies 份（模拟大量模型和多次运行），比较逐行 apply 和 parse_groups 的耗时 """
+    big = pd.concat([df] * copies, ignore_index=True)
+    big["group"] = big["group"].astype("category")
+
+    start = time.perf_counter()
+    big["group"].astype(object).apply(label_four_conditions)
+    apply_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parse_groups(big)
+    parse_seconds = time.perf_counter() - start
+    print(f"  {len(big)} 行：逐行 apply {apply_seconds:.2f} 秒，parse_groups {parse_seconds:.3f} 秒"
+          f"（{apply_seconds / parse_seconds:.0f} 倍，同时得到全部五列）")
+
+
+def main():
+    import argparse
+    import os
+
+    from results_store import load_results
+
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Data", "Psychophysics_run.xlsx")
+    parser = argparse.ArgumentParser(description="解析结果表的 group 列：task / variant / condition / 刺激与反应一致性")
+    parser.add_argument("path", nargs="?", default=default_path, help="结果表 Excel，默认 Data/Psychophysics_run.xlsx")
+    parser.add_argument("--verify", action="store_true", help="与原来逐行的字符串匹配比较")
+    parser.add_argument("--benchmark", action="store_true", help="测量解析耗时")
+    args = parser.parse_args()
+
+    df = load_results(args.path)
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(group_table(df["group"].cat.categories))
+    if args.verify:
+        print("等价性检查：")
+        if not verify(df):
+            raise SystemExit(1)
+    if args.benchmark:
+        print("基准测试：")
+        benchmark(df)
+
+
+if __name__ == "__main__":
+    main()
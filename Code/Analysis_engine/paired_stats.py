@@ -0,0 +1,254 @@
+import time
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from group_conditions import FOUR_CONDITIONS, TWO_CONDITIONS
+
+# 星标阈值：p 小于阈值即取对应星标，否则为 "n.s."
+STAR_THRESHOLDS = [(1e-4, "****"), (0.001, "***"), (0.01, "**"), (0.05, "*")]
+CORRECTIONS = ("holm", "bonferroni", "fdr_bh", "none")
+VARIANT_CONDITIONS = {"origin": list(TWO_CONDITIONS), "squared": list(FOUR_CONDITIONS)}
+RESULT_COLUMNS = ["subset", "tasks", "variant", "condition_a", "condition_b",
+                  "n", "mean_diff", "t", "df", "p", "p_adj", "star"]
+
+
+# ================= 星标 ===================
+def significance_stars(p_value):
+    for threshold, star in STAR_THRESHOLDS:
+        if p_value < threshold:
+            return star
+    return "n.s."
+
+
+def stars(p_values):
+    """ significance_stars 的数组版本，NaN 为 "n.s." """
+    p = np.asarray(p_values, dtype=float)
+    with np.errstate(invalid="ignore"):
+        return np.select([p < threshold for threshold, _ in STAR_THRESHOLDS],
+                         [star for _, star in STAR_THRESHOLDS], default="n.s.")
+
+
+# ================= 配对 t 检验（向量化） ===================
+def paired_t(a, b):
+    """
+    a、b 形状相同 (..., 模型数)，沿最后一维做配对 t 检验；只用 a、b 都不是 NaN 的模型（逐对对齐，
+    与先对两列一起 dropna 再 ttest_rel 相同）。前面的维度是任意多组互相独立的检验。
+    返回 dict：n、mean_diff、t、df、p，形状为 a.shape[:-1]；有效模型少于 2 个时 t、p 为 NaN。
+    """
+    from scipy.special import stdtr
+
+    d = np.asarray(a, dtype=float) - np.asarray(b, dtype=float)
+    valid = ~np.isnan(d)
+    n = valid.sum(axis=-1)
+    d = np.where(valid, d, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = d.sum(axis=-1) / n
+        resid = np.where(valid, d - mean[..., None], 0.0)
+        var = (resid ** 2).sum(axis=-1) / (n - 1)
+        t = mean / np.sqrt(var / n)
+        dof = np.where(n > 1, n - 1, np.nan)
+        t = np.where(n > 1, t, np.nan)
+        p = 2.0 * stdtr(dof, -np.abs(t))
+    return {"n": n, "mean_diff": mean, "t": t, "df": dof, "p": p}
+
+
+# ================= 多重比较校正 ===================
+def adjust_pvalues(p_values, method="holm"):
+    """
+    沿最后一维校正（每一行是一个检验族），NaN 不计入族的大小、结果仍为 NaN。
+    method：holm、bonferroni、fdr_bh（Benjamini–Hochberg）或 none。
+    """
+    if method not in CORRECTIONS:
+        raise ValueError(f"未知的校正方法：{method}（可选：{', '.join(CORRECTIONS)}）")
+    p = np.asarray(p_values, dtype=float)
+    if method == "none" or p.size == 0:
+        return p.copy()
+    m = (~np.isnan(p)).sum(axis=-1, keepdims=True)
+    if method == "bonferroni":
+        return np.minimum(p * m, 1.0)
+
+    order = np.argsort(p, axis=-1)  # NaN 排在最后
+    ranked = np.take_along_axis(p, order, axis=-1)
+    rank = np.arange(p.shape[-1])
+    if method == "holm":
+        ranked = np.fmax.accumulate(ranked * (m - rank), axis=-1)
+    else:
+        ranked = np.flip(np.fmin.accumulate(np.flip(ranked * m / (rank + 1), -1), axis=-1), -1)
+    adjusted = np.empty_like(p)
+    np.put_along_axis(adjusted, order, np.minimum(ranked, 1.0), axis=-1)
+    adjusted[np.isnan(p)] = np.nan  # fmax / fmin 会跳过 NaN，把族外的位置填上值
+    return adjusted
+
+
+# ================= 模型 × 条件立方体 ===================
+def task_sets(tasks):
+    """ 默认的任务组：每个任务单独一组，再加三个任务的平均 """
+    return {task: [task] for task in tasks} | {"average": list(tasks)}
+
+
+def condition_cube(cube, variant, sets=None):
+    """
+    从聚合立方体（aggregate_cube.py）取出 (任务组, 模型, 条件) 的平均准确率数组。
+    跨任务的组先把各任务的和、行数相加再相除，与 figure_engine.model_means 相同。
+    返回 (任务组名列表, 模型名 Index, 条件列表, 数组)。
+    """
+    conditions = VARIANT_CONDITIONS[variant]
+    sets = task_sets(cube.labels["task"]) if sets is None else sets
+    arrays = [cube.array(("model_name", "condition"), "mean", task=members, condition=conditions)[0]
+              for members in sets.values()]
+    return list(sets), pd.Index(cube.labels["model_name"], name="model_name"), conditions, np.stack(arrays)
+
+
+def subset_masks(models, groups=None):
+    """
+    (子集数, 模型数) 的布尔掩码：第一行 "all" 为全部模型，groups（模型名 → 标签，例如 type 列）再为每个标签加一行。
+    """
+    masks, labels = [np.ones(len(models), dtype=bool)], ["all"]
+    if groups is not None:
+        mapped = pd.Series(groups).reindex(models)
+        for label in mapped.dropna().unique():
+            masks.append((mapped == label).to_numpy())
+            labels.append(str(label))
+    return labels, np.array(masks)
+
+
+# ================= 批量检验 ===================
+def batch_tests(cube, pairs, masks=None):
+    """
+    一次完成 (子集 × 任务组 × 条件对) 的全部配对 t 检验。
+    cube：(任务组, 模型, 条件)；pairs：[(列号 a, 列号 b), ...]；masks：(子集, 模型) 布尔掩码，默认只有全部模型。
+    返回 paired_t 的 dict，每个数组形状为 (子集, 任务组, 条件对)。
+    """
+    ia, ib = (np.array(col, dtype=int) for col in zip(*pairs))
+    a = np.moveaxis(cube[:, :, ia], 1, -1)  # (任务组, 条件对, 模型)
+    b = np.moveaxis(cube[:, :, ib], 1, -1)
+    if masks is None:
+        masks = np.ones((1, cube.shape[1]), dtype=bool)
+    keep = masks[:, None, None, :]
+    return paired_t(np.where(keep, a, np.nan), np.where(keep, b, np.nan))
+
+
+def all_pair_tests(cube, variants=("origin", "squared"), pairs=None, groups=None, correction="holm"):
+    """
+    全部变体、任务组、子集和条件对的配对 t 检验，返回整洁的结果表（每行一个检验）。
+    pairs 默认为每个变体中条件的所有两两组合；可传 {变体: [(条件 a, 条件 b), ...]}。
+    多重比较校正的检验族为同一 (子集, 任务组, 变体) 内的条件对，即一张图中的所有比较。
+    """
+    frames = []
+    for variant in variants:
+        set_names, models, conditions, values = condition_cube(cube, variant)
+        named = list(combinations(conditions, 2)) if pairs is None else pairs[variant]
+        labels, masks = subset_masks(models, groups)
+        res = batch_tests(values, [(conditions.index(a), conditions.index(b)) for a, b in named], masks)
+        p_adj = adjust_pvalues(res["p"], correction)
+
+        shape = res["p"].shape
+        grid = np.indices(shape).reshape(len(shape), -1)
+        frames.append(pd.DataFrame({
+            "subset": np.array(labels)[grid[0]],
+            "tasks": np.array(set_names)[grid[1]],
+            "variant": variant,
+            "condition_a": np.array([a for a, _ in named])[grid[2]],
+            "condition_b": np.array([b for _, b in named])[grid[2]],
+            "n": res["n"].ravel(),
+            "mean_diff": res["mean_diff"].ravel(),
+            "t": res["t"].ravel(),
+            "df": res["df"].ravel(),
+            "p": res["p"].ravel(),
+            "p_adj": p_adj.ravel(),
+            "star": stars(p_adj.ravel()),
+        }))
+    return pd.concat(frames, ignore_index=True)[RESULT_COLUMNS]
+
+
+# ================= 检查与基准测试 ===================
+def verify(cube, groups=None):
+    """ 逐个检验用 scipy.stats.ttest_rel 重算（先对两列一起 dropna），与批量结果比较 """
+    from scipy.stats import ttest_rel
+
+    table = all_pair_tests(cube, groups=groups, correction="none")
+    ok = True
+    for variant in ("origin", "squared"):
+        set_names, models, conditions, values = condition_cube(cube, variant)
+        labels, masks = subset_masks(models, groups)
+        for row in table[table["variant"] == variant].itertuples():
+            wide = pd.DataFrame(values[set_names.index(row.tasks)], columns=conditions)
+            both = wide[masks[labels.index(row.subset)]][[row.condition_a, row.condition_b]].dropna()
+            if len(both) < 2:
+                ok &= bool(np.isnan(row.p))
+                continue
+            t_stat, p_val = ttest_rel(both[row.condition_a], both[row.condition_b])
+            ok &= bool(len(both) == row.n and np.isclose(t_stat, row.t, rtol=1e-9, atol=0)
+                       and np.isclose(p_val, row.p, rtol=1e-6, atol=1e-300))
+    print(f"  {len(table)} 个检验与 ttest_rel 逐个计算{'一致' if ok else '不一致'}")
+    return ok
+
+
+def benchmark(n_models=130, n_conditions=4, n_subsets=1000, seed=0):
+    """ n_subsets 个随机半数子集 × 全部条件对：批量计算与逐个 ttest_rel 循环的耗时 """
+    from scipy.stats import ttest_rel
+
+    rng = np.random.default_rng(seed)
+    cube = rng.uniform(0.2, 1.0, (1, n_models, n_conditions))
+    cube[0, rng.random((n_models, n_conditions)) < 0.05] = np.nan  # 少量缺失，检验逐对对齐
+    pairs = list(combinations(range(n_conditions), 2))
+    masks = rng.random((n_subsets, n_models)) < 0.5
+    n_tests = n_subsets * len(pairs)
+
+    start = time.perf_counter()
+    res = batch_tests(cube, pairs, masks)
+    adjust_pvalues(res["p"], "holm")
+    batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    loop_count = min(n_subsets, 100)  # 循环太慢，只跑一部分再按比例换算
+    for mask in masks[:loop_count]:
+        for ia, ib in pairs:
+            both = cube[0][mask][:, [ia, ib]]
+            both = both[~np.isnan(both).any(axis=1)]
+            ttest_rel(both[:, 0], both[:, 1])
+    loop_seconds = (time.perf_counter() - start) * n_subsets / loop_count
+    print(f"  {n_tests} 个检验（{n_models} 个模型）：逐个 ttest_rel 约 {loop_seconds:.2f} 秒，"
+          f"批量 {batch_seconds * 1000:.1f} 毫秒（{loop_seconds / batch_seconds:.0f} 倍）")
+
+
+def main():
+    import argparse
+    import os
+
+    from figure_engine import DEFAULT_RESULTS, load_figure_data
+
+    parser = argparse.ArgumentParser(description="所有任务、条件对（及模型子集）的配对 t 检验，一次向量化计算")
+    parser.add_argument("path", nargs="?", default=DEFAULT_RESULTS, help="结果表 Excel，默认 Data/Psychophysics_run.xlsx")
+    parser.add_argument("--correction", choices=CORRECTIONS, default="holm", help="多重比较校正，默认 holm")
+    parser.add_argument("--by", default=None, help="按立方体的这一维（每个模型一个值，例如 type）另分子集")
+    parser.add_argument("--output", default=None, help="把结果表另存为 CSV")
+    parser.add_argument("--verify", action="store_true", help="与逐个 ttest_rel 比较")
+    parser.add_argument("--benchmark", action="store_true", help="测量批量检验的耗时")
+    args = parser.parse_args()
+
+    cube = load_figure_data(args.path)
+    groups = None
+    if args.by:
+        # 每个模型在这一维上的取值（一个模型有多个取值时用第一个）
+        per_model = cube.table(["model_name", args.by], metrics=("group_accuracy",))
+        groups = per_model.drop_duplicates("model_name").set_index("model_name")[args.by]
+    table = all_pair_tests(cube, groups=groups, correction=args.correction)
+    with pd.option_context("display.width", 250, "display.max_columns", None, "display.max_rows", None):
+        print(table.to_string(index=False, float_format=lambda v: f"{v:.3g}"))
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"已保存：{os.path.abspath(args.output)}")
+    if args.verify:
+        print("等价性检查：")
+        if not verify(cube, groups):
+            raise SystemExit(1)
+    if args.benchmark:
+        print("基准测试：")
+        benchmark()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from figure_specs import FOUR_CONDITION_PAIRS, TWO_CONDITION_PAIRS
+from paired_stats import condition_cube, stars
+
+# 每个块的重抽样次数固定、各用一个子种子：结果只取决于 seed 和 block，
+# 与内存预算（一次合并计算几个块）和进程数无关
+DEFAULT_BLOCK = 500
+DEFAULT_MEMORY_MB = 64
+DEFAULT_PAIRS = {"origin": TWO_CONDITION_PAIRS, "squared": FOUR_CONDITION_PAIRS}
+EFFECT_COLUMNS = ["tasks", "variant", "condition_a", "condition_b", "n", "effect",
+                  "ci_low", "ci_high", "p_perm", "star", "n_boot", "n_perm"]
+
+
+# ================= 按块生成重抽样 ===================
+def _blocks(seed_seq, n_resamples, block):
+    """ [(子种子, 本块的重抽样次数), ...] """
+    sizes = [block] * (n_resamples // block) + ([n_resamples % block] if n_resamples % block else [])
+    return list(zip(seed_seq.spawn(len(sizes)), sizes))
+
+
+def _chunks(blocks, n_values, memory_mb):
+    """ 把块按内存预算合并：每行需要 n 个 int64 下标和 n 个 float64 值 """
+    rows_per_chunk = max(1, int(memory_mb * 2 ** 20 // (16 * max(n_values, 1))))
+    chunks, current, rows = [], [], 0
+    for seed, size in blocks:
+        if current and rows + size > rows_per_chunk:
+            chunks.append(current)
+            current, rows = [], 0
+        current.append((seed, size))
+        rows += size
+    return chunks + ([current] if current else [])
+
+
+def _resample_chunk(kind, values, chunk):
+    """
+    一个内存块内的全部重抽样，结果是每次重抽样的平均效应。
+    bootstrap：(次数 × 模型数) 的模型下标矩阵，每行有放回地抽 n 个模型；
+    permutation：(次数 × 模型数) 的 ±1 符号矩阵，随机交换每个模型的两个条件（配对数据的置换检验）。
+    """
+    n = len(values)
+    if kind == "bootstrap":
+        index = np.concatenate([np.random.default_rng(seed).integers(0, n, size=(size, n)) for seed, size in chunk])
+        return values[index].mean(axis=1)
+    signs = np.concatenate([np.random.default_rng(seed).integers(0, 2, size=(size, n), dtype=np.int8)
+                            for seed, size in chunk])
+    return (values * (2 * signs - 1)).mean(axis=1)
+
+
+def resample_means(kind, values, n_resamples, seed=0, block=DEFAULT_BLOCK, memory_mb=DEFAULT_MEMORY_MB,
+                   workers=None, pool=None):
+    """
+    values（一维，已去掉 NaN）的 n_resamples 次重抽样平均值。kind 为 "bootstrap" 或 "permutation"。
+    workers > 1 时把内存块分给进程池（也可以传入已有的 pool），结果与单进程相同。
+    """
+    values = np.asarray(values, dtype=float)
+    seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    chunks = _chunks(_blocks(seed_seq, n_resamples, block), len(values), memory_mb)
+    if pool is None and (workers or 1) > 1 and len(chunks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as own_pool:
+            parts = list(own_pool.map(_resample_chunk, [kind] * len(chunks), [values] * len(chunks), chunks))
+    elif pool is not None:
+        parts = list(pool.map(_resample_chunk, [kind] * len(chunks), [values] * len(chunks), chunks))
+    else:
+        parts = [_resample_chunk(kind, values, chunk) for chunk in chunks]
+    return np.concatenate(parts) if parts else np.empty(0)
+
+
+# ================= 效应的置信区间与置换 p 值 ===================
+def _seed_pair(seed):
+    """ bootstrap 与置换各用一个子种子；只做其中一个时结果与 effect_summary 相同 """
+    return (seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)).spawn(2)
+
+
+def _permutation_p(perm, effect, n_perm):
+    """ 双侧符号置换 p 值；容差避免浮点误差把与观测值相同的排列（例如全部符号不变）算成更小 """
+    extreme = np.count_nonzero(np.abs(perm) >= abs(effect) - 1e-12 * max(1.0, abs(effect)))
+    return (1 + extreme) / (1 + n_perm)
+
+
+def permutation_pvalue(diffs, n_perm=10000, seed=0, **kwargs):
+    """ 只做符号置换检验（不做 bootstrap），p 值与 effect_summary(...)["p_perm"] 相同 """
+    d = np.asarray(diffs, dtype=float)
+    d = d[~np.isnan(d)]
+    if len(d) < 2:
+        return np.nan
+    _, perm_seq = _seed_pair(seed)
+    return _permutation_p(resample_means("permutation", d, n_perm, perm_seq, **kwargs), d.mean(), n_perm)
+
+
+def effect_summary(diffs, n_boot=10000, n_perm=10000, confidence=0.95, seed=0, **kwargs):
+    """
+    配对差值 diffs（条件 a − 条件 b，每个模型一个，NaN 跳过）的平均效应、百分位 bootstrap 置信区间、
+    双侧符号置换 p 值（(1 + 不小于观测值的次数) / (1 + n_perm)）。
+    """
+    d = np.asarray(diffs, dtype=float)
+    d = d[~np.isnan(d)]
+    if len(d) < 2:
+        return {"n": len(d), "effect": np.nan, "ci_low": np.nan, "ci_high": np.nan, "p_perm": np.nan}
+    boot_seq, perm_seq = _seed_pair(seed)
+    effect = d.mean()
+    boot = resample_means("bootstrap", d, n_boot, boot_seq, **kwargs)
+    perm = resample_means("permutation", d, n_perm, perm_seq, **kwargs)
+    alpha = 1.0 - confidence
+    ci_low, ci_high = np.quantile(boot, [alpha / 2, 1 - alpha / 2])
+    return {"n": len(d), "effect": effect, "ci_low": ci_low, "ci_high": ci_high,
+            "p_perm": _permutation_p(perm, effect, n_perm)}
+
+
+def congruency_effects(cube, variants=("origin",), pairs=None, n_boot=10000, n_perm=10000, confidence=0.95,
+                       seed=0, workers=None, **kwargs):
+    """
+    每个任务组（每个任务 + 三个任务平均）每对条件的效应（条件 a − 条件 b）：bootstrap 置信区间与置换 p 值，
+    返回整洁的结果表。默认只做 origin 的 Congruent − Incongruent；pairs 可传 {变体: [(条件 a, 条件 b), ...]}。
+    每个 (任务组, 条件对) 从 seed 派生自己的子种子，表中每一行都可以单独复现。
+    """
+    pairs = DEFAULT_PAIRS if pairs is None else pairs
+    pool = None
+    if (workers or 1) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=workers)
+    rows = []
+    try:
+        for k, variant in enumerate(variants):
+            set_names, _, conditions, values = condition_cube(cube, variant)
+            seeds = np.random.SeedSequence([seed, k]).spawn(len(set_names) * len(pairs[variant]))
+            for i, tasks in enumerate(set_names):
+                for j, (cond_a, cond_b) in enumerate(pairs[variant]):
+                    diffs = values[i, :, conditions.index(cond_a)] - values[i, :, conditions.index(cond_b)]
+                    summary = effect_summary(diffs, n_boot, n_perm, confidence, seeds[i * len(pairs[variant]) + j],
+                                             pool=pool, **kwargs)
+                    rows.append(dict(tasks=tasks, variant=variant, condition_a=cond_a, condition_b=cond_b,
+                                     **summary, n_boot=n_boot, n_perm=n_perm))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    table = pd.DataFrame(rows)
+    table["star"] = stars(table["p_perm"])
+    return table[EFFECT_COLUMNS]
+
+
+# ================= 检查与基准测试 ===================
+def verify(n_models=130, n_resamples=3000, seed=0):
+    """ 同一个 seed：不同内存预算、不同进程数的结果完全相同；bootstrap 与逐次循环相同 """
+    rng = np.random.default_rng(seed)
+    d = rng.normal(0.1, 0.3, n_models)
+    base = resample_means("bootstrap", d, n_resamples, seed)
+    ok = all(np.array_equal(base, resample_means("bootstrap", d, n_resamples, seed, memory_mb=mb))
+             for mb in (0.01, 1, 1024))
+    ok &= np.array_equal(base, resample_means("bootstrap", d, n_resamples, seed, memory_mb=0.1, workers=2))
+    print(f"  不同内存预算 / 进程数的结果{'相同' if ok else '不同'}")
+
+    # 逐次循环：同样的块和子种子，每次重抽样单独取平均
+    loop = []
+    for block_seed, size in _blocks(np.random.SeedSequence(seed), n_resamples, DEFAULT_BLOCK):
+        index = np.random.default_rng(block_seed).integers(0, n_models, size=(size, n_models))
+        loop += [d[row].mean() for row in index]
+    same = np.allclose(base, loop, rtol=0, atol=1e-12)
+    print(f"  与逐次循环{'一致' if same else '不一致'}")
+    return ok and same
+
+
+def benchmark(n_models=130, n_resamples=100000, seed=0):
+    """ 逐次循环（rng.choice + 取平均）与按块矩阵计算的 bootstrap 耗时 """
+    rng = np.random.default_rng(seed)
+    d = rng.normal(0.1, 0.3, n_models)
+
+    loop_count = 10000  # 循环太慢，只跑一部分再按比例换算
+    start = time.perf_counter()
+    for _ in range(loop_count):
+        d[rng.choice(n_models, n_models)].mean()
+    loop_seconds = (time.perf_counter() - start) * n_resamples / loop_count
+
+    for memory_mb in (8, DEFAULT_MEMORY_MB):
+        start = time.perf_counter()
+        resample_means("bootstrap", d, n_resamples, seed, memory_mb=memory_mb)
+        seconds = time.perf_counter() - start
+        print(f"  {n_resamples} 次 bootstrap（{n_models} 个模型，内存预算 {memory_mb} MB）：逐次循环约 {loop_seconds:.1f} 秒，"
+              f"矩阵 {seconds:.2f} 秒（{loop_seconds / seconds:.0f} 倍）")
+
+
+def main():
+    import argparse
+    import os
+
+    from figure_engine import DEFAULT_RESULTS, load_figure_data
+
+    parser = argparse.ArgumentParser(description="一致性效应的 bootstrap 置信区间与置换检验 p 值")
+    parser.add_argument("path", nargs="?", default=DEFAULT_RESULTS, help="结果表 Excel，默认 Data/Psychophysics_run.xlsx")
+    parser.add_argument("--variants", default="origin", help="origin、squared 或 origin,squared")
+    parser.add_argument("--n-boot", type=int, default=10000)
+    parser.add_argument("--n-perm", type=int, default=10000)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory-mb", type=float, default=DEFAULT_MEMORY_MB, help="一次计算的重抽样矩阵大小上限")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认单进程")
+    parser.add_argument("--output", default=None, help="把结果表另存为 CSV")
+    parser.add_argument("--verify", action="store_true", help="检查结果与内存预算、进程数无关，且与逐次循环一致")
+    parser.add_argument("--benchmark", action="store_true", help="比较逐次循环与矩阵计算的耗时")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = congruency_effects(load_figure_data(args.path), tuple(args.variants.split(",")), None, args.n_boot,
+                               args.n_perm, args.confidence, args.seed, args.workers, memory_mb=args.memory_mb)
+    with pd.option_context("display.width", 250, "display.max_columns", None):
+        print(table.to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+    print(f"用时 {time.perf_counter() - start:.2f} 秒")
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"已保存：{os.path.abspath(args.output)}")
+    if args.verify:
+        print("检查：")
+        if not verify():
+            raise SystemExit(1)
+    if args.benchmark:
+        print("基准测试：")
+        benchmark()
+
+
+if __name__ == "__main__":
+    main()
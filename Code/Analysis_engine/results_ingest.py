@@ -0,0 +1,294 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from aggregate_cube import DIMENSIONS, AggregateCube
+from group_conditions import GROUP_PATTERN
+from results_store import (CATEGORICAL_COLUMNS, NUMERIC_COLUMNS, RESULTS_COLUMNS, _read_table, _write_table,
+                           file_digest, read_workbook)
+
+# ================= 存储格式 ===================
+# 每次评测新增的结果逐个追加进一个存储文件夹，不再每次从头读取、聚合全部历史：
+#   part-00001.parquet, part-00002.parquet, ...  每次导入新增的行（只追加，不改写）
+#   cube-00001.npz                               聚合立方体（aggregate_cube.py），随每次导入增量更新
+#   manifest.json                                已导入的文件（内容哈希）、各个分片和行数
+KEY_COLUMNS = ["model_name", "group", "match_type", "type"]
+MANIFEST_NAME = "manifest.json"
+STORE_VERSION = 2
+DEFAULT_STORE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Data", "results_store")
+
+
+# ================= 检查新文件 ===================
+def validate_rows(df, source=""):
+    """ 检查新结果：键不能为空、group 符合命名规则、准确率在 [0, 1] 内；有问题时抛出 ValueError 并列出全部问题 """
+    problems = []
+    for column in KEY_COLUMNS:
+        empty = int(df[column].isna().sum())
+        if empty:
+            problems.append(f"{column} 有 {empty} 行为空")
+    groups = pd.Series(df["group"].dropna().astype(str).unique())
+    bad_groups = groups[~groups.str.match(GROUP_PATTERN)].tolist()
+    if bad_groups:
+        problems.append(f"无法解析的 group：{', '.join(bad_groups[:5])}{' ...' if len(bad_groups) > 5 else ''}")
+    for column in NUMERIC_COLUMNS:
+        values = df[column]
+        bad = int((values.isna() | (values < 0) | (values > 1)).sum())
+        if bad:
+            problems.append(f"{column} 有 {bad} 行为空或不在 [0, 1] 内")
+    if problems:
+        raise ValueError(f"结果文件 {source} 未通过检查：" + "；".join(problems))
+
+
+def _normalize(df):
+    """ 多个分片拼接后 categorical 的类别不同会退化为 object，这里统一转回来 """
+    df = df[list(RESULTS_COLUMNS)].reset_index(drop=True)
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = df[column].astype(str).astype("category")
+    for column in NUMERIC_COLUMNS:
+        df[column] = df[column].astype("float64")
+    return df
+
+
+# ================= 存储文件夹 ===================
+def load_manifest(store_dir):
+    try:
+        with open(os.path.join(store_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except OSError:
+        manifest = None
+    if manifest is None:
+        return {"version": STORE_VERSION, "parts": [], "cube": None}
+    if manifest.get("version") != STORE_VERSION:
+        raise ValueError(f"存储 {store_dir} 的格式版本为 {manifest.get('version')}，当前为 {STORE_VERSION}，请重新导入")
+    return manifest
+
+
+def _save_manifest(manifest, store_dir):
+    path = os.path.join(store_dir, MANIFEST_NAME)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def _read_parts(store_dir, manifest, columns=None):
+    frames = []
+    for part in manifest["parts"]:
+        if part["data"] is None:  # 这次导入的行都已存在，没有写分片
+            continue
+        path = os.path.join(store_dir, part["data"])
+        frames.append(pd.read_parquet(path, columns=columns) if columns and path.endswith(".parquet")
+                      else _read_table(path))
+    return frames
+
+
+def load_rows(store_dir=DEFAULT_STORE):
+    """ 存储中的全部结果行（同一个键以最后一次导入为准），列与 read_workbook 相同 """
+    manifest = load_manifest(store_dir)
+    frames = _read_parts(store_dir, manifest)
+    if not frames:
+        return _normalize(pd.DataFrame(columns=list(RESULTS_COLUMNS)))
+    rows = pd.concat(frames, ignore_index=True)
+    return _normalize(rows.drop_duplicates(KEY_COLUMNS, keep="last"))
+
+
+def load_store_cube(store_dir=DEFAULT_STORE):
+    """ 增量维护的聚合立方体，可以直接交给 figure_engine / paired_stats / resampling """
+    path = cube_path(store_dir)
+    cube = AggregateCube.load(path)
+    if cube is None:
+        raise ValueError(f"无法读取 {path}，请重新导入")
+    return cube
+
+
+def cube_path(store_dir=DEFAULT_STORE):
+    """ 当前立方体的文件路径（figure_build 用它的内容哈希判断图是否过期） """
+    manifest = load_manifest(store_dir)
+    if manifest["cube"] is None:
+        raise ValueError(f"存储 {store_dir} 还没有导入任何结果")
+    return os.path.join(store_dir, manifest["cube"])
+
+
+# ================= 导入 ===================
+def ingest(path, store_dir=DEFAULT_STORE, sheet=None, replace=False):
+    """
+    把一份新的结果文件追加进存储：
+      1) 同一份文件（内容哈希相同）已经导入过 → 什么也不做；
+      2) 检查列和取值，文件内按 (model_name, group, match_type, type) 去重（保留最后一行）；
+      3) 与存储中已有的键比较：默认跳过已有的键，replace=True 时新值覆盖旧值；
+      4) 只对新增 / 覆盖的行构建立方体，加到已有的立方体上（覆盖时先减去旧行的立方体）；
+      5) 写出新的分片、立方体和 manifest（先写临时文件再替换）。
+    返回 {"added": 新增行数, "replaced": 覆盖行数, "skipped": 跳过行数}。
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = load_manifest(store_dir)
+    digest = file_digest(path)
+    if any(part["digest"] == digest for part in manifest["parts"]):
+        return {"added": 0, "replaced": 0, "skipped": None}
+
+    new = read_workbook(path, sheet)
+    validate_rows(new, path)
+    new = _normalize(new.drop_duplicates(KEY_COLUMNS, keep="last"))
+
+    # 只读取已有分片的键列，不读取、不重新聚合全部历史
+    existing_frames = _read_parts(store_dir, manifest, columns=KEY_COLUMNS)
+    new_keys = pd.MultiIndex.from_frame(new[KEY_COLUMNS].astype(str))
+    if existing_frames:
+        existing = pd.concat(existing_frames, ignore_index=True)
+        known = new_keys.isin(pd.MultiIndex.from_frame(existing[KEY_COLUMNS].astype(str)))
+    else:
+        known = np.zeros(len(new), dtype=bool)
+
+    added_rows = new if replace else new[~known]
+    delta = AggregateCube.from_rows(added_rows) if not added_rows.empty else None
+    if replace and known.any():
+        # 被覆盖的旧行：从分片中取出（同一个键以最后一次导入为准），从立方体中减去
+        old = pd.concat(_read_parts(store_dir, manifest), ignore_index=True)
+        old = _normalize(old.drop_duplicates(KEY_COLUMNS, keep="last"))
+        old_keys = pd.MultiIndex.from_frame(old[KEY_COLUMNS].astype(str))
+        delta = delta.combine(AggregateCube.from_rows(old[old_keys.isin(new_keys[known])]), sign=-1)
+
+    counts = {"added": int((~known).sum()), "replaced": int(known.sum()) if replace else 0,
+              "skipped": 0 if replace else int(known.sum())}
+    if added_rows.empty:
+        manifest["parts"].append({"data": None, "source": os.path.basename(path), "digest": digest, **counts})
+        _save_manifest(manifest, store_dir)
+        return counts
+
+    cube = delta if manifest["cube"] is None else load_store_cube(store_dir).combine(delta)
+    index = len(manifest["parts"]) + 1
+    data_name = _write_table(added_rows, os.path.join(store_dir, f"part-{index:05d}"))
+    cube_name = f"cube-{index:05d}.npz"
+    cube.save(os.path.join(store_dir, cube_name), key=digest)
+    previous = manifest["cube"]
+    manifest["cube"] = cube_name
+    manifest["parts"].append({"data": data_name, "source": os.path.basename(path), "digest": digest,
+                              "rows": len(added_rows), **counts})
+    _save_manifest(manifest, store_dir)
+    # manifest 已指向新立方体后再删除旧文件：中途中断最多留下一个无用的旧立方体
+    if previous and previous != cube_name:
+        os.remove(os.path.join(store_dir, previous))
+    return counts
+
+
+# ================= 检查与基准测试 ===================
+def verify(path):
+    """
+    把结果表按模型分成三批依次导入，再把其中一个模型的结果改动后用 replace 导入，
+    每一步都把增量维护的立方体与由当前全部行重新构建的立方体比较。
+    """
+    import shutil
+    import tempfile
+
+    df = read_workbook(path)
+    models = df["model_name"].cat.categories
+    batches = np.array_split(np.arange(len(models)), 3)
+    tmp = tempfile.mkdtemp(prefix="results_ingest_")
+    store = os.path.join(tmp, "store")
+    ok = True
+    try:
+        def check(expected_rows, label):
+            # 增量合并后标签顺序可能不同，按各维排序后比较每个格子的 count / mean / std
+            got = load_store_cube(store).table(list(DIMENSIONS)).sort_values(list(DIMENSIONS), ignore_index=True)
+            want = AggregateCube.from_rows(expected_rows).table(list(DIMENSIONS))
+            want = want.sort_values(list(DIMENSIONS), ignore_index=True)
+            values = [c for c in want.columns if c not in DIMENSIONS]
+            same = got[list(DIMENSIONS)].equals(want[list(DIMENSIONS)]) and \
+                np.allclose(got[values], want[values], rtol=0, atol=1e-9, equal_nan=True)
+            print(f"  {label}：{'一致' if same else '不一致'}")
+            return same
+
+        for i, batch in enumerate(batches, 1):
+            part = df[df["model_name"].isin(models[batch])]
+            file = os.path.join(tmp, f"batch{i}.xlsx")
+            part.to_excel(file, index=False)
+            counts = ingest(file, store)
+            ok &= check(df[df["model_name"].isin(models[np.concatenate(batches[:i])])],
+                        f"第 {i} 批（新增 {counts['added']} 行）")
+        ok &= ingest(os.path.join(tmp, "batch1.xlsx"), store)["skipped"] is None  # 重复导入同一份文件
+
+        changed = df[df["model_name"] == models[0]].copy()
+        changed["group_accuracy"] = 1.0 - changed["group_accuracy"]
+        file = os.path.join(tmp, "rerun.xlsx")
+        pd.concat([changed, df[df["model_name"] == models[1]]]).to_excel(file, index=False)
+        counts = ingest(file, store, replace=True)
+        expected = pd.concat([df[df["model_name"] != models[0]], changed])
+        ok &= check(expected, f"重新评测一个模型（覆盖 {counts['replaced']} 行）")
+        ok &= len(load_rows(store)) == len(df)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return ok
+
+
+def benchmark(path):
+    """ 已有全部历史时再导入一个模型：增量导入与重新读取、聚合全部结果的耗时 """
+    import shutil
+    import tempfile
+
+    df = read_workbook(path)
+    last = df["model_name"].cat.categories[-1]
+    tmp = tempfile.mkdtemp(prefix="results_ingest_")
+    try:
+        store = os.path.join(tmp, "store")
+        history, one = os.path.join(tmp, "history.xlsx"), os.path.join(tmp, "one.xlsx")
+        df[df["model_name"] != last].to_excel(history, index=False)
+        df[df["model_name"] == last].to_excel(one, index=False)
+        ingest(history, store)
+
+        start = time.perf_counter()
+        ingest(one, store)
+        load_store_cube(store)
+        ingest_ms = (time.perf_counter() - start) * 1000
+
+        full = os.path.join(tmp, "full.xlsx")
+        df.to_excel(full, index=False)
+        start = time.perf_counter()
+        AggregateCube.from_rows(read_workbook(full))
+        full_ms = (time.perf_counter() - start) * 1000
+        print(f"  {len(df)} 行的历史上再加 1 个模型：增量导入 {ingest_ms:.0f} ms，重新读取并聚合全部 {full_ms:.0f} ms")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main():
+    import argparse
+
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Data", "Psychophysics_run.xlsx")
+    parser = argparse.ArgumentParser(description="把新一轮评测的结果增量导入结果存储")
+    parser.add_argument("--store", default=DEFAULT_STORE, help="存储文件夹，默认 Data/results_store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="导入一份或多份结果文件（与 Psychophysics_run.xlsx 相同的列）")
+    add.add_argument("paths", nargs="+")
+    add.add_argument("--sheet", default=None)
+    add.add_argument("--replace", action="store_true", help="已有的 (模型, group, match_type, type) 用新值覆盖，默认跳过")
+    sub.add_parser("status", help="列出已导入的文件")
+    check = sub.add_parser("verify", help="分批导入结果表，与全部重新聚合的结果比较，并测量耗时")
+    check.add_argument("path", nargs="?", default=default_path)
+    args = parser.parse_args()
+
+    if args.command == "add":
+        for path in args.paths:
+            counts = ingest(path, args.store, args.sheet, args.replace)
+            if counts["skipped"] is None:
+                print(f"{path}：已经导入过，跳过")
+            else:
+                print(f"{path}：新增 {counts['added']} 行，覆盖 {counts['replaced']} 行，跳过 {counts['skipped']} 行已有结果")
+    elif args.command == "status":
+        manifest = load_manifest(args.store)
+        for part in manifest["parts"]:
+            print(f"  {part['source']:40s} 新增 {part['added']:5d}  覆盖 {part['replaced']:5d}  跳过 {part['skipped']:5d}")
+        if manifest["cube"]:
+            cube = load_store_cube(args.store)
+            print(f"共 {len(cube.labels['model_name'])} 个模型，{int(cube.lookup()['group_accuracy']['count'])} 行")
+    else:
+        print("检查：")
+        if not verify(args.path):
+            raise SystemExit(1)
+        print("基准测试：")
+        benchmark(args.path)
+
+
+if __name__ == "__main__":
+    main()
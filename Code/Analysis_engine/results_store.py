@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+# ================= 结果表格式 ===================
+# 与 Data/Psychophysics_run.xlsx 相同的列
+RESULTS_COLUMNS = ("model_name", "group", "group_accuracy", "overall_accuracy", "match_type", "type")
+# 取值种类很少的文本列存成 categorical（108 个模型、18 个 group），比较和分组都在整数编码上进行
+CATEGORICAL_COLUMNS = ("model_name", "group", "match_type", "type")
+NUMERIC_COLUMNS = ("group_accuracy", "overall_accuracy")
+
+# 缓存放在源文件旁边的文件夹中：<文件名>.parquet + <文件名>.json（记录源文件的大小、修改时间和内容哈希）
+CACHE_DIRNAME = ".results_cache"
+# 缓存内容的格式有变化时加一，旧缓存全部失效
+STORE_VERSION = 1
+
+
+# ================= 读取 Excel ===================
+def read_workbook(path, sheet=None):
+    """ 直接解析 Excel，返回列类型已整理好的 DataFrame（文本列为 categorical，准确率为 float64） """
+    df = pd.read_excel(path, sheet_name=sheet or 0)
+    missing = [c for c in RESULTS_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"结果表缺少列：{', '.join(missing)}（{path}）")
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = df[column].astype("category")
+    for column in NUMERIC_COLUMNS:
+        df[column] = df[column].astype("float64")
+    return df
+
+
+def file_digest(path):
+    """ 源文件内容的 blake2b 哈希（修改时间变了但内容没变时，缓存仍然有效） """
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# ================= 缓存文件 ===================
+def _cache_paths(path, sheet, cache_dir):
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIRNAME)
+    name = os.path.basename(path) + (f"-{sheet}" if sheet else "")
+    return cache_dir, os.path.join(cache_dir, name + ".json")
+
+
+def _replace_file(write, final_path):
+    """
+    write(临时路径) 写入同一文件夹中名字唯一的临时文件，再用 os.replace 换成 final_path。
+    多个进程同时在冷缓存上读取同一个结果表时各写各的临时文件，不会互相删掉；
+    替换失败但别的进程已经写好了 final_path（同一源文件得到的内容相同）时当作成功。
+    """
+    folder, name = os.path.split(final_path)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=name + ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        try:
+            os.replace(tmp_path, final_path)
+        except OSError:
+            if not os.path.exists(final_path):
+                raise
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _write_table(df, data_path):
+    """ 有 pyarrow 时写 Parquet（保留 categorical），否则退回 pickle """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        data_path += ".pkl"
+        _replace_file(df.to_pickle, data_path)
+    else:
+        data_path += ".parquet"
+        _replace_file(lambda tmp_path: df.to_parquet(tmp_path, index=False), data_path)
+    return os.path.basename(data_path)
+
+
+def _read_table(data_path):
+    if data_path.endswith(".parquet"):
+        return pd.read_parquet(data_path)
+    return pd.read_pickle(data_path)
+
+
+def _load_meta(meta_path):
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # 没有缓存或缓存说明损坏，当作没有缓存
+
+
+def _save_meta(meta, meta_path):
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    _replace_file(write, meta_path)
+
+
+# ================= 对外接口 ===================
+def load_results(path="AES23.xlsx", sheet=None, cache_dir=None, refresh=False):
+    """
+    读取结果表。第一次读取时解析 Excel 并写成列式缓存，之后只要源文件没有变化就直接读缓存：
+      1) 大小和修改时间（mtime_ns）都与缓存记录一致 → 直接读缓存；
+      2) 否则计算内容哈希，内容没变（例如文件被复制或 touch 过）→ 更新记录后读缓存；
+      3) 内容变了、缓存缺失或 refresh=True → 重新解析 Excel 并覆盖缓存。
+    返回的 DataFrame 中 model_name / group / match_type / type 为 categorical。
+    """
+    cache_dir, meta_path = _cache_paths(path, sheet, cache_dir)
+    stat = os.stat(path)
+    meta = None if refresh else _load_meta(meta_path)
+    if meta is not None and meta.get("version") == STORE_VERSION:
+        data_path = os.path.join(cache_dir, meta["data"])
+        if os.path.exists(data_path):
+            if meta["size"] == stat.st_size and meta["mtime_ns"] == stat.st_mtime_ns:
+                return _read_table(data_path)
+            if meta["size"] == stat.st_size and meta["digest"] == file_digest(path):
+                meta["mtime_ns"] = stat.st_mtime_ns
+                _save_meta(meta, meta_path)
+                return _read_table(data_path)
+
+    df = read_workbook(path, sheet)
+    os.makedirs(cache_dir, exist_ok=True)
+    data_name = _write_table(df, meta_path[:-len(".json")])
+    _save_meta({
+        "version": STORE_VERSION,
+        "source": os.path.basename(path),
+        "sheet": sheet,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "digest": file_digest(path),
+        "data": data_name,
+        "rows": len(df),
+    }, meta_path)
+    return df
+
+
+# ================= 基准测试 ===================
+def benchmark(path, repeat=5):
+    """ 比较直接 read_excel、冷启动（解析 + 写缓存）和热启动（读缓存）的耗时 """
+    import shutil
+    import tempfile
+
+    cache_dir = tempfile.mkdtemp(prefix="results_cache_")
+    try:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            pd.read_excel(path)
+        excel_ms = (time.perf_counter() - start) / repeat * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            cold = load_results(path, cache_dir=cache_dir, refresh=True)
+        cold_ms = (time.perf_counter() - start) / repeat * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            warm = load_results(path, cache_dir=cache_dir)
+        warm_ms = (time.perf_counter() - start) / repeat * 1000
+
+        pd.testing.assert_frame_equal(cold, warm)
+        raw = pd.read_excel(path)
+        same = all((raw[c].astype(str) == warm[c].astype(str)).all() for c in CATEGORICAL_COLUMNS) and \
+            all((raw[c].to_numpy() == warm[c].to_numpy()).all() for c in NUMERIC_COLUMNS)
+        cache_size = sum(os.path.getsize(os.path.join(cache_dir, f)) for f in os.listdir(cache_dir))
+        print(f"  {path}：{len(warm)} 行，缓存 {cache_size / 1024:.1f} KB，与 Excel 内容{'一致' if same else '不一致'}")
+        print(f"  直接 read_excel {excel_ms:.1f} ms，冷启动 {cold_ms:.1f} ms，热启动 {warm_ms:.1f} ms"
+              f"（{excel_ms / warm_ms:.0f} 倍）")
+        print(f"  内存：object 列 {raw.memory_usage(deep=True).sum() / 1024:.1f} KB，"
+              f"categorical 列 {warm.memory_usage(deep=True).sum() / 1024:.1f} KB")
+        return same
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def main():
+    import argparse
+
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Data", "Psychophysics_run.xlsx")
+    parser = argparse.ArgumentParser(description="结果表的列式缓存：冷启动 / 热启动读取耗时")
+    parser.add_argument("path", nargs="?", default=default_path, help="结果表 Excel，默认 Data/Psychophysics_run.xlsx")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("基准测试：")
+    if not benchmark(args.path, args.repeat):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import time
+
+import numpy as np
+
+
+# ================= 模型 × 条件矩阵 ===================
+def condition_matrix(df_agg, conditions, condition_column, value_column="group_accuracy", model_column="model_name"):
+    """
+    把分组平均后的长表 pivot 成 (模型 × 条件) 矩阵，列按 conditions 的顺序排列，
+    某个模型缺少某个条件时为 NaN。行按模型名排序（与 groupby 的顺序相同）。
+    """
+    wide = df_agg.pivot(index=model_column, columns=condition_column, values=value_column)
+    return wide.reindex(columns=list(conditions)).astype(float)
+
+
+# ================= 绘制 ===================
+def draw_trajectories(ax, wide, positions, colors, line_color="gray", line_alpha=0.4, linewidth=1,
+                      point_size=20, point_alpha=0.9):
+    """
+    每个模型一条穿过各条件的折线，全部放进一个 LineCollection；散点每个条件只调用一次 scatter。
+    NaN 处折线断开、散点不画，与逐个模型 plt.plot / plt.scatter 的效果相同。
+    """
+    from matplotlib.collections import LineCollection
+
+    y = wide.to_numpy(dtype=float)
+    x = np.broadcast_to(np.asarray(positions, dtype=float), y.shape)
+    # zorder=2 与 plt.plot 的折线相同：画在散点之上
+    lines = LineCollection(np.stack([x, y], axis=-1), colors=line_color, alpha=line_alpha,
+                           linewidths=linewidth, zorder=2)
+    ax.add_collection(lines)
+    for j, color in enumerate(colors):
+        ax.scatter(x[:, j], y[:, j], color=color, s=point_size, alpha=point_alpha)
+    ax.autoscale_view()
+    return lines
+
+
+# ================= 基准测试 ===================
+def _draw_loop(ax, df_agg, conditions, positions, colors):
+    """ 原来脚本中的写法：每个模型对每个条件做一次布尔筛选，再各自 plot / scatter，只用于比较 """
+    for m in df_agg["model_name"].unique():
+        yvals = []
+        for cond in conditions:
+            row = df_agg.loc[(df_agg["model_name"] == m) & (df_agg["FourCond"] == cond), "group_accuracy"]
+            yvals.append(row.iloc[0] if len(row) > 0 else np.nan)
+        ax.plot(positions, yvals, color="gray", alpha=0.4, linewidth=1)
+        for x_pos, y_val, color in zip(positions, yvals, colors):
+            ax.scatter(x_pos, y_val, color=color, s=20, alpha=0.9)
+
+
+def benchmark(model_counts=(130, 500, 2000)):
+    """ 随机生成 n 个模型 × 4 个条件的平均准确率，比较逐模型循环和 pivot + LineCollection 的构建与渲染耗时 """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
+    conditions = ["Fully Congruent", "Fully Incongruent",
+                  "Stimulus Congruent, Response Incongruent", "Stimulus Incongruent, Response Congruent"]
+    positions = [1, 2, 3, 4]
+    colors = ["#3182bd", "#31a354", "#e6550d", "#7b3294"]
+    rng = np.random.default_rng(0)
+    for n in model_counts:
+        df_agg = pd.DataFrame({
+            "model_name": np.repeat([f"model_{i:05d}" for i in range(n)], len(conditions)),
+            "FourCond": np.tile(conditions, n),
+            "group_accuracy": rng.uniform(0.2, 1.0, n * len(conditions)),
+        })
+        timings = []
+        for draw in (lambda ax: _draw_loop(ax, df_agg, conditions, positions, colors),
+                     lambda ax: draw_trajectories(ax, condition_matrix(df_agg, conditions, "FourCond"),
+                                                  positions, colors)):
+            fig, ax = plt.subplots(figsize=(12.5, 7.5), dpi=100)
+            start = time.perf_counter()
+            draw(ax)
+            fig.canvas.draw()
+            timings.append(time.perf_counter() - start)
+            plt.close(fig)
+        print(f"  {n} 个模型：逐模型循环 {timings[0]:.2f} 秒，pivot + LineCollection {timings[1]:.3f} 秒"
+              f"（{timings[0] / timings[1]:.0f} 倍）")
+
+
+if __name__ == "__main__":
+    print("基准测试（构建 + 渲染一次）：")
+    benchmark()
@@ -0,0 +1,117 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+
+# 清单格式定义在 Code/Stimulus_engine/manifest.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Stimulus_engine"))
+from manifest import export_excel, manifest_columns, write_manifest
+from flanker_trials import generate_flanker
+
+# ================= Global 设置 ===================
+# Stroop letter 版本使用的颜色顺序（红、蓝、绿、黄、橙、黑、紫）
+letter_colors = ["Red", "Blue", "Green", "Yellow", "Orange", "Black", "Purple"]
+color_map = {
+    "Red": "#FF0000",
+    "Blue": "#0000FF",
+    "Green": "#00FF00",
+    "Yellow": "#FFFF00",
+    "Orange": "#FFA500",
+    "Black": "#000000",
+    "Purple": "#800080",
+}
+FLANKER_COLOR = "#FFFFFF"
+
+# Stroop：每行文字为 [A, B, A]（Title, Wrong_Option, Right_Option），各类型只是字体颜色不同
+STROOP_COLOR_TYPES = {
+    "type1": "ABA",
+    "type2": "BAB",
+    "type3": "AAB",
+    "type4": "BBA",
+}
+
+# 三列在图片中的位置：flanker 的 Wrong_Option 在左下，stroop 的 Wrong_Option 在右下（与原图片生成代码一致）
+COLUMN_POSITIONS = {
+    "flanker": ("target", "left", "right"),
+    "stroop": ("target", "right", "left"),
+}
+
+
+# ================= 试次生成 ===================
+def stroop_rows(dataset_type):
+    """ 返回 [(texts, colors), ...]：7×6 = 42 行 """
+    color_pattern = STROOP_COLOR_TYPES[dataset_type]
+    rows = []
+    for A in letter_colors:
+        for B in letter_colors:
+            if A == B:
+                continue
+            words = {"A": A, "B": B}
+            rows.append(([A, B, A], [color_map[words[c]] for c in color_pattern]))
+    return rows
+
+
+def flanker_manifest_columns(style, dataset_type):
+    """
+    flanker 数据集直接按列生成清单（letter 650 张、number 72 张图片，每张 3 个文本元素），
+    不经过逐行的 Python 列表，行数很大时也只是几次数组操作。
+    """
+    columns = generate_flanker(style, dataset_type)
+    n_images = len(columns[0])
+    n_items = len(columns)
+    image_ids = np.char.zfill(np.arange(1, n_images + 1).astype(str), 5)
+    return {
+        "image_id": np.repeat(image_ids, n_items),
+        "position": np.tile(np.array(COLUMN_POSITIONS["flanker"]), n_images),
+        "text": np.stack(columns, axis=1).ravel(),
+        "color": np.full(n_images * n_items, FLANKER_COLOR),
+        "condition": np.full(n_images * n_items, f"flanker_{style}_{dataset_type}"),
+    }
+
+
+def stroop_trials(dataset_type):
+    """ 生成清单用的试次 [(image_id, condition, [(position, text, color), ...]), ...] """
+    positions = COLUMN_POSITIONS["stroop"]
+    condition = f"stroop_letter_{dataset_type}"
+    return [(str(i).zfill(5), condition, list(zip(positions, texts, colors)))
+            for i, (texts, colors) in enumerate(stroop_rows(dataset_type), start=1)]
+
+
+# ================= 保存 ===================
+def save_dataset(task, style, dataset_type, output_dir, excel=False):
+    """
+    把数据集写成清单 <task>_<style>_<type>_manifest.arrow，
+    excel=True 时同时导出同名的 .xlsx（字体颜色即文字颜色）。
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, f"{task}_{style}_{dataset_type}")
+    manifest_path = base + "_manifest.arrow"
+    if task == "stroop":
+        columns = manifest_columns(stroop_trials(dataset_type))
+    else:
+        columns = flanker_manifest_columns(style, dataset_type)
+    n_rows = write_manifest(manifest_path, columns)
+    print(f"清单已保存：{manifest_path}（{n_rows} 个文本元素）")
+    if excel:
+        export_excel(manifest_path, base + "_dataset.xlsx")
+        print(f"Excel 已保存：{base}_dataset.xlsx")
+    return manifest_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成 Stroop / Flanker 数据集清单")
+    parser.add_argument("task", choices=["stroop", "flanker"])
+    parser.add_argument("dataset_type", choices=["type1", "type2", "type3", "type4"])
+    parser.add_argument("--style", choices=["letter", "number"], default="letter",
+                        help="flanker 的字符类型，stroop 只有 letter")
+    parser.add_argument("--output-dir", default="Data-set", help="保存清单的文件夹，默认 Data-set")
+    parser.add_argument("--excel", action="store_true", help="同时导出 Excel")
+    args = parser.parse_args(argv)
+
+    style = "letter" if args.task == "stroop" else args.style
+    save_dataset(args.task, style, args.dataset_type, args.output_dir, excel=args.excel)
+
+
+if __name__ == "__main__":
+    main()
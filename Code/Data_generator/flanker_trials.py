@@ -0,0 +1,172 @@
+import os
+import string
+import time
+
+import numpy as np
+
+# ================= Global 设置 ===================
+FLANKER_ALPHABETS = {
+    "letter": string.ascii_uppercase,
+    "number": "123456789",
+}
+FLANKER_DATASET_TYPES = ("type1", "type2", "type3", "type4")
+
+
+# ================= 类型定义 ===================
+def flanker_pattern(length=5, target_pos=None, flank="F", target="O"):
+    """
+    一列文本的模式串：F 表示 fixed（外层循环字符），O 表示 other（内层循环字符）。
+    例如 length=5、target_pos=2（默认居中）→ "FFOFF"。
+    """
+    if target_pos is None:
+        target_pos = length // 2
+    if not 0 <= target_pos < length:
+        raise ValueError(f"目标位置 {target_pos} 超出长度 {length}。")
+    return flank * target_pos + target + flank * (length - target_pos - 1)
+
+
+def flanker_type_spec(dataset_type, length=5, target_pos=None, style="letter"):
+    """
+    type1 ~ type4 三列（Title, Wrong_Option, Right_Option）的模式串：
+      type1：[F*n, O*n, F*n]
+      type2：[FFOFF, FFOFF, OOFOO]
+      type3：[F*n, FFOFF, OOFOO]
+      type4：[FFOFF, O*n, F*n]
+    letter 版本 type1 / type3 的第一列多一个字符（原数据集中用 first*6 区分效果）。
+    """
+    mixed = flanker_pattern(length, target_pos, "F", "O")
+    swapped = flanker_pattern(length, target_pos, "O", "F")
+    same, other = "F" * length, "O" * length
+    title = same + "F" if style == "letter" else same
+    specs = {
+        "type1": (title, other, same),
+        "type2": (mixed, mixed, swapped),
+        "type3": (title, mixed, swapped),
+        "type4": (mixed, other, same),
+    }
+    if dataset_type not in specs:
+        raise ValueError(f"未知的 flanker 类型：{dataset_type}")
+    return specs[dataset_type]
+
+
+# ================= 向量化生成 ===================
+def flanker_columns(alphabet, patterns):
+    """
+    对字母表做 fixed × other（fixed != other）的笛卡尔积，按模式串拼出每一列，
+    返回与 patterns 等长的 numpy 字符串数组列表，行顺序与原来的双重循环相同（fixed 在外层）。
+    每个字符按 Unicode 码位存成 uint32，整列在 (行数, 长度) 的码位矩阵上一次性拼好，
+    再把每行的码位视为一个 '<U长度' 字符串，不逐行拼接 Python 字符串。
+    """
+    codes = np.array([ord(ch) for ch in alphabet], dtype=np.uint32)
+    if len(np.unique(codes)) != len(codes):
+        raise ValueError("字母表中有重复字符。")
+    n = len(codes)
+    fixed_idx, other_idx = np.nonzero(~np.eye(n, dtype=bool))
+    fixed, other = codes[fixed_idx][:, None], codes[other_idx][:, None]
+
+    columns = []
+    for pattern in patterns:
+        is_fixed = np.array([c == "F" for c in pattern])
+        matrix = np.where(is_fixed, fixed, other)  # (行数, 长度) 的码位矩阵
+        columns.append(np.ascontiguousarray(matrix, dtype=np.uint32).view(f"<U{len(pattern)}").ravel())
+    return columns
+
+
+def generate_flanker(style="letter", dataset_type="type1", alphabet=None, length=5, target_pos=None):
+    """ 生成一组 flanker 数据集，返回 [Title, Wrong_Option, Right_Option] 三列 numpy 数组 """
+    if alphabet is None:
+        alphabet = FLANKER_ALPHABETS[style]
+    return flanker_columns(alphabet, flanker_type_spec(dataset_type, length, target_pos, style))
+
+
+def flanker_rows(style, dataset_type):
+    """ 与原来 generate_flanker_<style>_<type>() 相同的行列表（不含表头） """
+    return [list(row) for row in zip(*(col.tolist() for col in generate_flanker(style, dataset_type)))]
+
+
+# ================= 等价性检查与基准测试 ===================
+LEGACY_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
+                             "Legacy", "New-dataset", "Data-Generate-Main.py")
+
+
+def load_legacy_generators():
+    """ 读取原来的八个 generate_flanker_<style>_<type> 函数 """
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location("legacy_data_generate_main", LEGACY_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return {(style, t): getattr(module, f"generate_flanker_{style}_{t}")
+            for style in FLANKER_ALPHABETS for t in FLANKER_DATASET_TYPES}
+
+
+def verify():
+    """ 检查向量化版本与原来八个函数的输出逐行一致（letter 650 行、number 72 行） """
+    ok = True
+    for (style, t), legacy in load_legacy_generators().items():
+        expected = legacy()
+        header, expected = expected[0], expected[1:]
+        rows = flanker_rows(style, t)
+        same = header == ["Title", "Wrong_Option", "Right_Option"] and rows == expected
+        ok &= same
+        print(f"  {style} {t}：{len(rows)} 行，{'一致' if same else '不一致'}")
+    return ok
+
+
+def benchmark(repeat=20, large_alphabet_size=1500):
+    """ 比较原来的双重循环和向量化版本的耗时，并在大字母表（CJK 汉字）上测试扩展性 """
+    legacy = load_legacy_generators()
+    for (style, t), func in legacy.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        loop_ms = (time.perf_counter() - start) / repeat * 1000
+        start = time.perf_counter()
+        for _ in range(repeat):
+            generate_flanker(style, t)
+        vec_ms = (time.perf_counter() - start) / repeat * 1000
+        print(f"  {style} {t}：双重循环 {loop_ms:.3f} ms，向量化 {vec_ms:.3f} ms")
+
+    # 更大的字母表、更长的 flanker 串：CJK 统一汉字 × 长度 9
+    alphabet = "".join(chr(0x4E00 + i) for i in range(large_alphabet_size))
+    start = time.perf_counter()
+    columns = generate_flanker("number", "type2", alphabet=alphabet, length=9)
+    vec_seconds = time.perf_counter() - start
+
+    # 同样规模下的逐行 Python 拼接（原函数的写法）
+    patterns = flanker_type_spec("type2", length=9, style="number")
+    start = time.perf_counter()
+    rows = []
+    for fixed in alphabet:
+        for other in alphabet:
+            if fixed == other:
+                continue
+            chars = {"F": fixed, "O": other}
+            rows.append(["".join(chars[c] for c in pattern) for pattern in patterns])
+    loop_seconds = time.perf_counter() - start
+    assert rows[1] == [col[1] for col in columns]
+
+    print(f"  {large_alphabet_size} 个汉字、长度 9：{len(columns[0])} 行，双重循环 {loop_seconds:.2f} 秒，"
+          f"向量化 {vec_seconds:.2f} 秒（{len(columns[0]) / vec_seconds / 1e6:.2f} 百万行/秒），"
+          f"示例 {columns[0][1]} / {columns[2][1]}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="向量化 flanker 数据集生成：等价性检查与基准测试")
+    parser.add_argument("--verify", action="store_true", help="与原来的八个生成函数逐行比较")
+    parser.add_argument("--benchmark", action="store_true", help="测量生成耗时")
+    args = parser.parse_args()
+
+    if args.verify:
+        print("等价性检查：")
+        if not verify():
+            raise SystemExit(1)
+    if args.benchmark:
+        print("基准测试：")
+        benchmark()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
+import os
+import sys
 import pandas as pd
-import matplotlib.pyplot as plt
+
+# 共享的直接栅格化渲染引擎（Code/Stimulus_engine）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Stimulus_engine"))
+from raster_engine import RasterRenderer, FLANKER_BG
 from tkinter import Tk
 from tkinter.filedialog import askopenfilename, askdirectory
 
@@ -30,6 +35,9 @@ end_row = int(input("请输入结束行号："))
 target_col = 'Target'
 image_col = 'Image'
 
+# 渲染器只创建一次：字体、背景模板在所有行之间复用
+renderer = RasterRenderer("origin", FLANKER_BG)
+
 for idx, row in df.iloc[start_row-1:end_row].iterrows():
     # 读取 Target 文本，去除空白
     text_target = str(row[target_col]).strip()
@@ -43,20 +51,11 @@ for idx, row in df.iloc[start_row-1:end_row].iterrows():
         raw_filename = raw_filename.zfill(5)
     filename = raw_filename + ".png"
     
-    # 创建图像：尺寸500x300像素，背景色设为 'gray'
-    fig = plt.figure(figsize=(5, 3), dpi=100, facecolor='gray')
-    ax = fig.add_subplot(111)
-    ax.set_facecolor('gray')
-    plt.axis('off')
-    # 调整子图边距，确保整个画布都被保存
-    plt.subplots_adjust(left=0, right=1, top=1, bottom=0)
-    
-    # 在图像正中绘制 Target 文本（坐标：0.5, 0.5），字号45，颜色白色
-    plt.text(0.5, 0.5, text_target, ha='center', va='center', fontsize=45, color='white')
+    # 在图像正中绘制 Target 文本（坐标：0.5, 0.5），字号45，颜色白色，灰色背景
+    texts = [text_target]
     
     # 拼接图片保存路径
     save_path = output_folder + "/" + filename
-    # 保存图片，不使用 bbox_inches 参数，确保图片尺寸严格为 500×300 像素
-    plt.savefig(save_path, facecolor=fig.get_facecolor())
-    plt.close()
+    # 直接渲染到像素缓冲区并保存，确保图片尺寸严格为 500×300 像素
+    renderer.save(texts, ['white'], save_path)
     print(f"生成图片：{save_path}")
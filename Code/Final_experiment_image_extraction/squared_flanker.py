@@ -1,5 +1,10 @@
+import os
+import sys
 import pandas as pd
-import matplotlib.pyplot as plt
+
+# 共享的直接栅格化渲染引擎（Code/Stimulus_engine）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Stimulus_engine"))
+from raster_engine import RasterRenderer, FLANKER_BG
 from tkinter import Tk
 from tkinter.filedialog import askopenfilename, askdirectory
 
@@ -32,6 +37,9 @@ option_left_col = 'Option_Left'
 option_right_col = 'Option_Right'
 image_col = 'Image'
 
+# 渲染器只创建一次：字体、背景模板在所有行之间复用
+renderer = RasterRenderer("squared", FLANKER_BG)
+
 # 针对指定行生成图片
 for idx, row in df.iloc[start_row-1:end_row].iterrows():
     # 读取各列文本，并转换为字符串，去除空白
@@ -49,27 +57,15 @@ for idx, row in df.iloc[start_row-1:end_row].iterrows():
         raw_filename = raw_filename.zfill(5)
     filename = raw_filename + ".png"
     
-    # 创建图像，尺寸500x300像素（figsize=(5,3) 与 dpi=100），背景色为灰色
-    fig = plt.figure(figsize=(5, 3), dpi=100, facecolor='gray')
-    ax = fig.add_subplot(111)
-    ax.set_facecolor('gray')
-    plt.axis('off')  # 不显示坐标轴
-    
-    # 调整子图边距，确保整个画布都被保存
-    plt.subplots_adjust(left=0, right=1, top=1, bottom=0)
-    
-    # 绘制文本：
-    # 中上位置显示 Target 文本（坐标：0.5, 0.70）
-    plt.text(0.5, 0.70, text_target, ha='center', va='center', fontsize=36, color='white')
-    # 左下位置显示 Option_Left 文本（坐标：0.25, 0.40）
-    plt.text(0.25, 0.40, text_option_left, ha='center', va='center', fontsize=32, color='white')
-    # 右下位置显示 Option_Right 文本（坐标：0.75, 0.40）
-    plt.text(0.75, 0.40, text_option_right, ha='center', va='center', fontsize=32, color='white')
+    # 绘制文本（布局与原 matplotlib 版本相同，500x300 像素，灰色背景，白色文字）：
+    # 中上位置显示 Target 文本（坐标：0.5, 0.70，字号36）
+    # 左下位置显示 Option_Left 文本（坐标：0.25, 0.40，字号32）
+    # 右下位置显示 Option_Right 文本（坐标：0.75, 0.40，字号32）
+    texts = [text_target, text_option_left, text_option_right]
     
     # 拼接生成的图片文件完整保存路径
     save_path = output_folder + "/" + filename
     
-    # 保存图片时不使用 bbox_inches 参数，确保图片尺寸严格为 500x300 像素
-    plt.savefig(save_path, facecolor=fig.get_facecolor())
-    plt.close()
+    # 直接渲染到像素缓冲区并保存，图片尺寸严格为 500x300 像素
+    renderer.save(texts, ['white'] * 3, save_path)
     print(f"生成图片：{save_path}")
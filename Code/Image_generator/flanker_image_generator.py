@@ -1,16 +1,28 @@
 import pandas as pd
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import os
-import tkinter as tk
-from tkinter import filedialog
+import sys
 
-def generate_images_from_excel():
-    """ 让用户选择 Excel 文件，并从 'index' 列生成图片 """
+# 共享的字体注册表（Code/Stimulus_engine）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Stimulus_engine"))
+from font_registry import get_font, resolve_font
+from layout_table import layout_table
+
+def generate_images_from_excel(file_path=None, output_folder="output_images", column='index',
+                               sheet_name=0, start_row=1, end_row=None):
+    """
+    从 Excel 的 column 列（默认 'index'）生成图片，默认处理全部行；
+    start_row/end_row 为数据行号（从1开始，表头除外）。
+    未给出 file_path 时弹出对话框让用户选择 Excel 文件（仅此时才导入 tkinter）。
+    """
     
-    # 打开文件选择对话框
-    root = tk.Tk()
-    root.withdraw()  # 隐藏 Tkinter 窗口
-    file_path = filedialog.askopenfilename(title="选择 Excel 文件", filetypes=[("Excel 文件", "*.xlsx;*.xls")])
+    if file_path is None:
+        # 打开文件选择对话框
+        import tkinter as tk
+        from tkinter import filedialog
+        root = tk.Tk()
+        root.withdraw()  # 隐藏 Tkinter 窗口
+        file_path = filedialog.askopenfilename(title="选择 Excel 文件", filetypes=[("Excel 文件", "*.xlsx;*.xls")])
     
     if not file_path:  # 用户取消选择
         print("未选择文件，程序退出。")
@@ -20,40 +32,43 @@ def generate_images_from_excel():
     
     # 读取 Excel 文件
     try:
-        df = pd.read_excel(file_path)
+        df = pd.read_excel(file_path, sheet_name=sheet_name)
     except Exception as e:
         print(f"读取 Excel 失败: {e}")
         return
     
     # 确保 index 存在
-    if 'index' not in df.columns:
-        print("Excel 文件中没有找到 'index' 列")
+    if column not in df.columns:
+        print(f"Excel 文件中没有找到 '{column}' 列")
         return
 
+    # 只保留指定的行范围
+    df = df.iloc[start_row-1:end_row]
+
     # 创建输出文件夹
-    output_folder = "output_images"
     os.makedirs(output_folder, exist_ok=True)
 
     # 图片参数
     img_width, img_height = 500, 300  # 设定图片大小
     bg_color = (128, 128, 128)  # 灰色背景
     text_color = (255, 255, 255)  # 白色文字
-    font_path = "arial.ttf"  # 确保系统有 Arial 字体或替换为可用字体
     font_size = 70
 
-    try:
-        font = ImageFont.truetype(font_path, font_size)
-    except IOError:
-        print("找不到字体文件，尝试使用默认字体")
-        font = ImageFont.load_default()
+    # 优先 Arial；没有时使用内置的 DejaVu Sans 并给出警告（不再退回 Pillow 的位图默认字体）
+    font_path = resolve_font("arial")
+    font = get_font(font_path, font_size)
+
+    # 排版遍：每个不同的文本只测量一次包围盒（文本来自很小的固定集合）
+    texts = df[column].astype(str).tolist()  # 处理 NaN 和数值型 index
+    layout_table.precompute(texts, font_path, [font_size])
 
     # 生成图片
-    for i, text in enumerate(df['index'].astype(str)):  # 处理 NaN 和数值型 index
+    for i, text in enumerate(texts):
         img = Image.new("RGB", (img_width, img_height), bg_color)
         draw = ImageDraw.Draw(img)
         
-        # 计算文本居中位置
-        text_size = draw.textbbox((0, 0), text, font=font)
+        # 计算文本居中位置（包围盒从排版表中取，等于 draw.textbbox((0, 0), text, font=font)）
+        text_size = layout_table.get(text, font_path, font_size).bbox
         text_width = text_size[2] - text_size[0]
         text_height = text_size[3] - text_size[1]
         x = (img_width - text_width) / 2
@@ -69,4 +84,5 @@ def generate_images_from_excel():
         print(f"已生成图片: {img_path}")
 
 # 运行程序
-generate_images_from_excel()
+if __name__ == "__main__":
+    generate_images_from_excel()
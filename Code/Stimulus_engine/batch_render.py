@@ -0,0 +1,128 @@
+import math
+import os
+import time
+from multiprocessing import Pool
+
+from build_cache import split_unchanged
+from image_encoder import ImageEncoder
+from raster_engine import RasterRenderer, STROOP_BG, FLANKER_BG
+from workbook_reader import read_stimulus_rows
+
+# 各任务的背景色与文字颜色来源：stroop 读取单元格字体颜色，flanker 统一白色
+TASK_BACKGROUNDS = {
+    "stroop": STROOP_BG,
+    "flanker": FLANKER_BG,
+}
+FLANKER_TEXT_COLOR = "white"
+
+# 每个工作进程的渲染器：在进程初始化时创建一次，之后所有分块复用
+_worker_renderer = None
+
+
+def _init_worker(layout, background, encoder=None):
+    """ 进程池初始化：每个工作进程只加载一次字体 / 背景模板 """
+    global _worker_renderer
+    _worker_renderer = RasterRenderer(layout, background, encoder=encoder)
+
+
+def _render_chunk(task):
+    """ 渲染一个分块，返回 (进程号, 图片数, 耗时秒数, 贴图缓存命中数, 未命中数) """
+    jobs, output_folder = task
+    sprites = _worker_renderer.sprites
+    hits, misses = sprites.hits, sprites.misses
+    start = time.perf_counter()
+    _worker_renderer.precompute_layouts(jobs)
+    for texts, colors, filename in jobs:
+        _worker_renderer.save(texts, colors, os.path.join(output_folder, filename))
+    return (os.getpid(), len(jobs), time.perf_counter() - start,
+            sprites.hits - hits, sprites.misses - misses)
+
+
+def split_chunks(jobs, workers, chunks_per_worker=4):
+    """
+    把任务按原顺序切成连续分块。
+    文件名完全由每行的 Image 列决定，与分块方式、进程数无关。
+    """
+    if not jobs:
+        return []
+    chunk_size = max(1, math.ceil(len(jobs) / (workers * chunks_per_worker)))
+    return [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+
+
+def render_batch(jobs, output_folder, layout, background, workers=None, incremental=False, encoder=None):
+    """
+    用进程池并行渲染 jobs（[(texts, colors, filename), ...]）到 output_folder。
+    workers 为 None 时使用全部 CPU 核；workers=1 时在当前进程内顺序渲染。
+    incremental=True 时按渲染输入的哈希跳过输出文件夹中已是最新的图片（见 build_cache.py）；
+    无论是否跳过，渲染后的哈希都会写入输出文件夹的索引。
+    encoder 为 image_encoder.ImageEncoder（默认 RGBA PNG），文件扩展名随格式替换。
+    返回每个工作进程的统计 {进程号: {"images": 张数, "seconds": 耗时, "hits": 贴图缓存命中, "misses": 未命中}}，
+    跳过的图片不计入。
+    """
+    workers = workers or os.cpu_count() or 1
+    encoder = encoder or ImageEncoder()
+    os.makedirs(output_folder, exist_ok=True)
+    jobs = [(texts, colors, encoder.output_name(filename)) for texts, colors, filename in jobs]
+
+    # 同一输出目录下文件名必须唯一，否则并行写入时结果取决于进程调度
+    filenames = [filename for _, _, filename in jobs]
+    if len(set(filenames)) != len(filenames):
+        raise ValueError("Image 列存在重复的文件名，无法保证输出一致。")
+
+    jobs, keys, _, index = split_unchanged(jobs, output_folder, layout, background, encoder,
+                                           force=not incremental)
+    if not jobs:
+        return {}
+
+    tasks = [(chunk, output_folder) for chunk in split_chunks(jobs, workers)]
+    if workers == 1:
+        _init_worker(layout, background, encoder)
+        results = [_render_chunk(task) for task in tasks]
+    else:
+        with Pool(workers, initializer=_init_worker, initargs=(layout, background, encoder)) as pool:
+            results = list(pool.imap_unordered(_render_chunk, tasks))
+
+    # 全部渲染成功后再更新索引
+    index.update(keys)
+    index.save()
+
+    stats = {}
+    for pid, count, seconds, hits, misses in results:
+        entry = stats.setdefault(pid, {"images": 0, "seconds": 0.0, "hits": 0, "misses": 0})
+        entry["images"] += count
+        entry["seconds"] += seconds
+        entry["hits"] += hits
+        entry["misses"] += misses
+    return stats
+
+
+def print_worker_stats(stats, wall_seconds):
+    """ 打印每个工作进程的吞吐量以及总体吞吐量 """
+    total = 0
+    for i, (pid, entry) in enumerate(sorted(stats.items()), start=1):
+        rate = entry["images"] / entry["seconds"] if entry["seconds"] > 0 else float("inf")
+        print(f"  进程 {i}（pid {pid}）：{entry['images']} 张，{entry['seconds']:.2f} 秒，{rate:.1f} 张/秒，"
+              f"贴图缓存命中 {entry['hits']} / 未命中 {entry['misses']}")
+        total += entry["images"]
+    if wall_seconds > 0:
+        print(f"  合计：{total} 张，{wall_seconds:.2f} 秒，{total / wall_seconds:.1f} 张/秒")
+
+
+def build_jobs(file_path, task, layout, start_row=1, end_row=None, sheet=None,
+               text_columns=None, image_column="Image"):
+    """ 从 Excel 读取指定行，按任务类型生成渲染任务 """
+    if text_columns is None:
+        text_columns = ("Target", "Option_Left", "Option_Right") if layout == "squared" else ("Target",)
+    rows = read_stimulus_rows(file_path, start_row, end_row, text_columns=text_columns,
+                              image_column=image_column, with_colors=(task == "stroop"), sheet=sheet)
+    if task == "flanker":
+        rows = [(texts, [FLANKER_TEXT_COLOR] * len(texts), filename) for texts, _, filename in rows]
+    return rows
+
+
+def build_manifest_jobs(manifest_path, layout, start_row=1, end_row=None):
+    """ 从内存映射的清单读取第 start_row ~ end_row 张图片；文字颜色直接取清单中的 color 列 """
+    from manifest import iter_manifest_images
+
+    positions = ("target", "left", "right") if layout == "squared" else ("target",)
+    return list(iter_manifest_images(manifest_path, positions, start_row, end_row))
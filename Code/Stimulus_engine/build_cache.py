@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+
+from raster_engine import CANVAS_HEIGHT, CANVAS_WIDTH, DPI, LAYOUTS, default_font_path, to_rgb
+
+# 输出文件夹中的索引文件：{文件名: 渲染输入的哈希}
+INDEX_FILENAME = ".render_index.json"
+# 渲染 / 编码结果有变化时加一，使旧索引中的哈希全部失效
+ENGINE_VERSION = 1
+
+
+def settings_digest(layout, background, encoding=None, font_path=None,
+                    width=CANVAS_WIDTH, height=CANVAS_HEIGHT, dpi=DPI):
+    """
+    所有图片共用的渲染设置的摘要：布局（坐标、字号）、背景色、画布尺寸、字体文件内容、编码设置和引擎版本。
+    其中任何一项改变，所有图片都会重新生成。
+    """
+    if isinstance(layout, str):
+        layout = LAYOUTS[layout]
+    with open(font_path or default_font_path(), "rb") as f:
+        font_hash = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    settings = {
+        "engine": ENGINE_VERSION,
+        "layout": [list(slot) for slot in layout],
+        "background": list(to_rgb(background)),
+        "canvas": [width, height, dpi],
+        "font": font_hash,
+        "encoding": encoding or {},
+    }
+    return hashlib.blake2b(json.dumps(settings, sort_keys=True).encode(), digest_size=16).digest()
+
+
+def render_key(digest, texts, colors):
+    """ 一张图片的渲染输入哈希：共用设置摘要 + 各槽位的文本和颜色（颜色统一成 RGB，"red" 与 "#FF0000" 等价） """
+    payload = json.dumps([list(texts), [list(to_rgb(color)) for color in colors]], ensure_ascii=False)
+    return hashlib.blake2b(payload.encode(), key=digest, digest_size=16).hexdigest()
+
+
+class BuildIndex:
+    """
+    输出文件夹的渲染索引。图片文件存在且索引中记录的哈希与本次渲染输入一致时跳过该图片；
+    渲染完成后再把新的哈希写回索引（先写临时文件再替换，中途中断不会留下损坏的索引）。
+    """
+
+    def __init__(self, output_folder):
+        self.output_folder = output_folder
+        self.path = os.path.join(output_folder, INDEX_FILENAME)
+        self.entries = {}
+        # 一次列出文件夹中已有的文件，避免逐个 os.path.exists
+        self.existing = set(os.listdir(output_folder)) if os.path.isdir(output_folder) else set()
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}  # 索引损坏时当作空索引，全部重新生成
+
+    def is_current(self, filename, key):
+        return filename in self.existing and self.entries.get(filename) == key
+
+    def update(self, keys):
+        self.entries.update(keys)
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def split_unchanged(jobs, output_folder, layout, background, encoder=None, force=False,
+                    width=CANVAS_WIDTH, height=CANVAS_HEIGHT, dpi=DPI):
+    """
+    把 jobs（[(texts, colors, filename), ...]）分成需要重新渲染的部分和可以跳过的部分，
+    返回 (需要渲染的 jobs, 它们的哈希 {文件名: 哈希}, 跳过的张数, 索引)。
+    force=True 时全部重新渲染，但仍然计算哈希，渲染后写入索引。width/height/dpi 为画布尺寸（见 raster_engine.scaled_canvas）。
+    """
+    index = BuildIndex(output_folder)
+    digest = settings_digest(layout, background, encoder.describe() if encoder is not None else None,
+                             width=width, height=height, dpi=dpi)
+    todo, keys = [], {}
+    for job in jobs:
+        texts, colors, filename = job
+        key = render_key(digest, texts, colors)
+        if force or not index.is_current(filename, key):
+            todo.append(job)
+            keys[filename] = key
+    return todo, keys, len(jobs) - len(todo), index
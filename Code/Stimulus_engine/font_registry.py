@@ -0,0 +1,232 @@
+import os
+import time
+import warnings
+
+# ================= 字体位置 ===================
+# 内置的备用字体：matplotlib 默认字体 DejaVu Sans（许可见 fonts/LICENSE_DEJAVU），
+# 渲染节点上没有 matplotlib 或系统字体时也能得到相同的字形
+FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+FALLBACK_FONT = os.path.join(FONT_DIR, "DejaVuSans.ttf")
+
+# 字体名称 → 候选文件名（按顺序查找）；不在表中的名称直接当作文件名
+FONT_ALIASES = {
+    "dejavu-sans": ("DejaVuSans.ttf",),
+    "arial": ("arial.ttf", "Arial.ttf", "LiberationSans-Regular.ttf"),
+}
+SYSTEM_FONT_DIRS = (
+    "/usr/share/fonts",
+    "/usr/local/share/fonts",
+    os.path.expanduser("~/.fonts"),
+    os.path.expanduser("~/.local/share/fonts"),
+    "/Library/Fonts",
+    "/System/Library/Fonts",
+    os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"),
+)
+
+
+def _matplotlib_font_dir():
+    """ matplotlib 自带字体的目录（只导入 matplotlib 本体，不导入 pyplot） """
+    try:
+        import matplotlib
+        return os.path.join(matplotlib.get_data_path(), "fonts", "ttf")
+    except ImportError:
+        return None
+
+
+def read_kerning(font_path):
+    """
+    读取字体 'kern' 表，返回 ({(左字符, 右字符): 字体单位}, unitsPerEm)。
+    Pillow 的基础排版引擎几乎不应用字距，而 matplotlib 会应用，
+    因此这里自行读取（fontTools 随 matplotlib 一起安装）；读取失败时不做字距调整。
+    """
+    try:
+        from fontTools.ttLib import TTFont
+        font = TTFont(font_path, lazy=True)
+        units_per_em = font["head"].unitsPerEm
+        if "kern" not in font:
+            return {}, units_per_em
+        glyph_to_chars = {}
+        for codepoint, glyph_name in font.getBestCmap().items():
+            glyph_to_chars.setdefault(glyph_name, []).append(chr(codepoint))
+        pairs = {}
+        for table in font["kern"].kernTables:
+            for (left, right), value in getattr(table, "kernTable", {}).items():
+                for char_left in glyph_to_chars.get(left, ()):
+                    for char_right in glyph_to_chars.get(right, ()):
+                        pairs[(char_left, char_right)] = value
+        return pairs, units_per_em
+    except Exception:
+        return {}, 1
+
+
+def _caller_level():
+    """ 警告指向注册表之外的调用位置 """
+    import sys
+
+    frame, level = sys._getframe(1), 1
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame, level = frame.f_back, level + 1
+    return level
+
+
+# ================= 注册表 ===================
+class FontRegistry:
+    """
+    进程内的字体注册表：
+      - resolve(名称或路径)：按 matplotlib 字体目录 → 内置 fonts/ → 系统字体目录查找，每个名称只查找一次；
+        找不到时改用内置的 DejaVu Sans 并给出警告（不再静默退回 Pillow 的位图默认字体，字形度量不会悄悄改变）；
+      - face(名称或路径, 像素字号)：FreeType 字体对象按 (字体文件, 字号) 共享，所有渲染器只加载一次；
+      - kerning(名称或路径)：字距表同样只解析一次；
+      - stats()：查找 / 加载耗时、缓存命中和发生过的回退。
+    多进程渲染时每个工作进程各有一份（进程初始化后第一次使用时加载）。
+    """
+
+    def __init__(self, fallback=FALLBACK_FONT):
+        self.fallback = fallback
+        self._paths = {}
+        self._faces = {}
+        self._kerning = {}
+        self._system_index = None
+        self.fallbacks = {}
+        self.resolve_seconds = 0.0
+        self.load_seconds = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def _search_dirs(self):
+        mpl_dir = _matplotlib_font_dir()
+        return [d for d in (mpl_dir, FONT_DIR) if d]
+
+    def _system_fonts(self):
+        """ 系统字体目录中的 {小写文件名: 路径}，第一次需要时遍历一次 """
+        if self._system_index is None:
+            self._system_index = {}
+            for root_dir in SYSTEM_FONT_DIRS:
+                for folder, _, files in os.walk(root_dir):
+                    for name in files:
+                        self._system_index.setdefault(name.lower(), os.path.join(folder, name))
+        return self._system_index
+
+    def resolve(self, name=None):
+        """ 字体名称（见 FONT_ALIASES）或文件路径 → 字体文件的绝对路径；None 表示 DejaVu Sans """
+        name = name or "dejavu-sans"
+        path = self._paths.get(name)
+        if path is not None:
+            return path
+        start = time.perf_counter()
+        path = os.path.abspath(name) if os.path.isfile(name) else None
+        candidates = FONT_ALIASES.get(name.lower(), (os.path.basename(name),))
+        for folder in (self._search_dirs() if path is None else ()):
+            path = next((os.path.join(folder, c) for c in candidates if os.path.isfile(os.path.join(folder, c))), None)
+            if path:
+                break
+        if path is None:
+            system = self._system_fonts()
+            path = next((system[c.lower()] for c in candidates if c.lower() in system), None)
+        if path is None:
+            path = self.fallback
+            self.fallbacks[name] = path
+            warnings.warn(f"找不到字体 {name}，改用内置的 {os.path.basename(path)}", stacklevel=_caller_level())
+        self._paths[name] = path
+        self.resolve_seconds += time.perf_counter() - start
+        return path
+
+    def face(self, name, pixel_size):
+        """ (字体, 像素字号) 对应的 ImageFont.FreeTypeFont，同一进程内共享 """
+        path = self.resolve(name)
+        key = (path, pixel_size)
+        font = self._faces.get(key)
+        if font is not None:
+            self.hits += 1
+            return font
+        from PIL import ImageFont
+
+        self.misses += 1
+        start = time.perf_counter()
+        font = ImageFont.truetype(path, pixel_size)
+        self.load_seconds += time.perf_counter() - start
+        self._faces[key] = font
+        return font
+
+    def kerning(self, name):
+        path = self.resolve(name)
+        if path not in self._kerning:
+            start = time.perf_counter()
+            self._kerning[path] = read_kerning(path)
+            self.load_seconds += time.perf_counter() - start
+        return self._kerning[path]
+
+    def stats(self):
+        return {
+            "resolve_seconds": self.resolve_seconds,
+            "load_seconds": self.load_seconds,
+            "faces": len(self._faces),
+            "hits": self.hits,
+            "misses": self.misses,
+            "fallbacks": dict(self.fallbacks),
+        }
+
+
+registry = FontRegistry()
+
+
+def resolve_font(name=None):
+    return registry.resolve(name)
+
+
+def get_font(name, pixel_size):
+    return registry.face(name, pixel_size)
+
+
+def load_kerning(name):
+    return registry.kerning(name)
+
+
+# ================= 基准测试 ===================
+def benchmark(renderers=8):
+    """ 每个渲染器各自加载字体和字距表（原做法）与通过注册表共享的耗时 """
+    from PIL import ImageFont
+
+    sizes = [36 * 100 / 72, 32 * 100 / 72, 45 * 100 / 72]
+    path = resolve_font()
+    start = time.perf_counter()
+    for _ in range(renderers):
+        for size in sizes:
+            ImageFont.truetype(path, size)
+        read_kerning(path)
+    own_ms = (time.perf_counter() - start) * 1000
+
+    pooled = FontRegistry()
+    start = time.perf_counter()
+    for _ in range(renderers):
+        for size in sizes:
+            pooled.face(None, size)
+        pooled.kerning(None)
+    pooled_ms = (time.perf_counter() - start) * 1000
+    print(f"{renderers} 个渲染器 × {len(sizes)} 个字号：各自加载 {own_ms:.1f} ms，注册表共享 {pooled_ms:.1f} ms")
+    stats = pooled.stats()
+    print(f"  注册表：查找 {stats['resolve_seconds'] * 1000:.2f} ms，加载 {stats['load_seconds'] * 1000:.1f} ms，"
+          f"{stats['faces']} 个字体对象，命中 {stats['hits']} / 未命中 {stats['misses']}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="字体注册表：查看字体解析结果 / 测速")
+    parser.add_argument("names", nargs="*", default=["dejavu-sans", "arial"], help="要解析的字体名称或路径")
+    parser.add_argument("--benchmark", action="store_true", help="比较各自加载与共享字体的耗时")
+    args = parser.parse_args()
+
+    for name in args.names:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            path = resolve_font(name)
+        note = "（找不到，使用内置备用字体）" if name in registry.fallbacks else ""
+        print(f"{name} → {path}{note}")
+    print(f"查找耗时：{registry.stats()['resolve_seconds'] * 1000:.2f} ms")
+    if args.benchmark:
+        benchmark()
+
+
+if __name__ == "__main__":
+    main()
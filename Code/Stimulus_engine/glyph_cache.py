@@ -0,0 +1,116 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class TextSprite:
+    """
+    预先栅格化好的文本贴图，按 alpha 合成时使用的两张表都提前算好：
+      - inverse：255 - 覆盖率，形状 (h, w, 4)；
+      - premultiplied：颜色 × 覆盖率 + 128（含 alpha 通道，颜色 alpha 为 255），形状 (h, w, 4)；
+      - dx/dy：贴图左上角相对于槽位中心（取整后）的像素偏移。
+    两张表都存为 uint16（最大值 255*255+128 < 65536），四个通道连续存放，合成时不需要广播。
+    """
+
+    __slots__ = ("inverse", "premultiplied", "dx", "dy")
+
+    def __init__(self, mask, color, dx, dy):
+        mask = np.asarray(mask, dtype=np.uint16)[:, :, None]
+        rgba = np.array(tuple(color[:3]) + (255,), dtype=np.uint16)
+        self.inverse = np.repeat(255 - mask, 4, axis=2)
+        self.premultiplied = rgba * mask + 128
+        self.dx = dx
+        self.dy = dy
+
+    @property
+    def nbytes(self):
+        return self.inverse.nbytes + self.premultiplied.nbytes
+
+    def blit(self, canvas, center_x, center_y):
+        """
+        按 alpha 把贴图合成到 canvas（(H, W, 4) 的 uint8 数组）上。
+        混合公式与 Pillow 画字时相同：out = (bg*(255-m) + color*m) / 255（四舍五入），
+        因此合成结果与直接在画布上写字一致。超出画布的部分会被裁掉。
+        """
+        height, width = canvas.shape[:2]
+        x0 = center_x + self.dx
+        y0 = center_y + self.dy
+        h, w = self.inverse.shape[:2]
+
+        # 裁剪到画布范围内
+        cx0, cy0 = max(x0, 0), max(y0, 0)
+        cx1, cy1 = min(x0 + w, width), min(y0 + h, height)
+        if cx0 >= cx1 or cy0 >= cy1:
+            return
+        crop = (slice(cy0 - y0, cy1 - y0), slice(cx0 - x0, cx1 - x0))
+        region = canvas[cy0:cy1, cx0:cx1]
+
+        blended = np.empty(region.shape, dtype=np.uint32)
+        np.multiply(region, self.inverse[crop], out=blended)
+        blended += self.premultiplied[crop]
+        blended += blended >> 8
+        blended >>= 8
+        region[...] = blended
+
+
+class TextSpriteCache:
+    """
+    文本贴图的 LRU 缓存，键为 (文本, 字号, 颜色, 子像素相位)。
+    flanker 只用到 26 个字母 / 9 个数字拼成的少量字符串，stroop 只有 7 个颜色词，
+    所以重新生成整套数据时绝大多数图片只需要把缓存里的贴图合成到背景上。
+    条目数超过 maxsize 或总字节数超过 max_bytes 时淘汰最久未使用的贴图。
+    读写都在锁内进行：StimulusProvider 的预取线程与随机访问共用同一个渲染器时，
+    查找、移到末尾和淘汰不会交错。
+    """
+
+    def __init__(self, maxsize=4096, max_bytes=128 * 1024 * 1024):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._sprites = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sprites)
+
+    def get(self, key, build):
+        """ 命中则返回缓存的贴图；未命中时调用 build() 生成并放入缓存 """
+        with self._lock:
+            sprite = self._sprites.get(key)
+            if sprite is not None:
+                self.hits += 1
+                self._sprites.move_to_end(key)
+                return sprite
+
+            self.misses += 1
+            sprite = build()
+            self._sprites[key] = sprite
+            self._bytes += sprite.nbytes
+            # 淘汰最久未使用的贴图（至少保留刚放入的这一张）
+            while len(self._sprites) > 1 and (len(self._sprites) > self.maxsize or self._bytes > self.max_bytes):
+                _, evicted = self._sprites.popitem(last=False)
+                self._bytes -= evicted.nbytes
+            return sprite
+
+    def clear(self):
+        with self._lock:
+            self._sprites.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """ 返回命中/未命中次数、命中率、当前条目数和占用字节数 """
+        with self._lock:
+            hits, misses, entries, nbytes = self.hits, self.misses, len(self._sprites), self._bytes
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "entries": entries,
+            "bytes": nbytes,
+        }
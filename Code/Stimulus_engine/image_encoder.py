@@ -0,0 +1,334 @@
+import io
+import struct
+import time
+import zlib
+
+import numpy as np
+
+
+# ================= 1) PNG ===================
+def _png_chunk(tag, data):
+    return (struct.pack(">I", len(data)) + tag + data
+            + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+
+def _png_file(width, height, color_type, raw, compress_level, extra_chunks=()):
+    header = struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n"
+            + _png_chunk(b"IHDR", header)
+            + b"".join(_png_chunk(tag, data) for tag, data in extra_chunks)
+            + _png_chunk(b"IDAT", zlib.compress(raw, compress_level))
+            + _png_chunk(b"IEND", b""))
+
+
+def encode_png(pixels, compress_level=1):
+    """
+    将 (H, W, 3/4) 的 uint8 数组编码为 PNG 字节串。
+    刺激图几乎全是纯色背景，逐行使用 Up 滤波后大部分字节为 0，
+    zlib 压缩级别 1 即可得到与 matplotlib 输出相当的文件大小，而编码耗时低得多。
+    """
+    height, width, channels = pixels.shape
+    color_type = 6 if channels == 4 else 2
+    rows = pixels.reshape(height, width * channels)
+
+    raw = np.empty((height, width * channels + 1), dtype=np.uint8)
+    raw[:, 0] = 2  # Up 滤波
+    raw[0, 1:] = rows[0]
+    np.subtract(rows[1:], rows[:-1], out=raw[1:, 1:])
+    return _png_file(width, height, color_type, raw.tobytes(), compress_level)
+
+
+def encode_png_palette(pixels, compress_level=9):
+    """
+    调色板（索引色）PNG：每个像素 1 字节。颜色数不超过 256 时无损；
+    超过 256 种颜色（例如三种颜色的 stroop 文字，抗锯齿边缘约 550 种颜色）时退回不带 alpha 的真彩色 PNG，保证无损。
+    全部像素不透明时不写 tRNS。
+    """
+    height, width, channels = pixels.shape
+    flat = np.ascontiguousarray(pixels.reshape(-1, channels))
+    if channels == 3:
+        flat = np.concatenate([flat, np.full((len(flat), 1), 255, dtype=np.uint8)], axis=1)
+    packed = flat.view(np.uint32).ravel()
+    colors, indices = np.unique(packed, return_inverse=True)
+    if len(colors) > 256:
+        opaque = pixels[:, :, :3] if channels == 4 and (pixels[:, :, 3] == 255).all() else pixels
+        return encode_png(np.ascontiguousarray(opaque), compress_level)
+
+    palette = colors.view(np.uint8).reshape(-1, 4)
+    chunks = [(b"PLTE", palette[:, :3].tobytes())]
+    if (palette[:, 3] != 255).any():
+        chunks.append((b"tRNS", palette[:, 3].tobytes()))
+
+    raw = np.zeros((height, width + 1), dtype=np.uint8)  # 每行滤波类型 0（None）
+    raw[:, 1:] = indices.reshape(height, width)
+    return _png_file(width, height, 3, raw.tobytes(), compress_level, chunks)
+
+
+# ================= 2) WebP / QOI ===================
+def encode_webp(pixels, method=0):
+    """ 无损 WebP（Pillow）；method 0~6，越大越慢、文件越小 """
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="WEBP", lossless=True, method=method, exact=True)
+    return buffer.getvalue()
+
+
+QOI_OP_INDEX, QOI_OP_DIFF, QOI_OP_LUMA, QOI_OP_RUN, QOI_OP_RGB, QOI_OP_RGBA = 0x00, 0x40, 0x80, 0xC0, 0xFE, 0xFF
+QOI_END = b"\x00" * 7 + b"\x01"
+
+
+def _wrap(values):
+    """ 按有符号字节回绕（与 QOI 参考实现中的 signed char 相同） """
+    return ((values + 128) & 255) - 128
+
+
+def encode_qoi(pixels):
+    """
+    QOI 编码（https://qoiformat.org），不依赖逐像素的 Python 循环：
+      1. 把像素按行展开，相邻像素相同的连续段只在段首编码一次，其余像素都是 RUN；
+      2. 段首像素的 INDEX 命中等价于“之前最后一个同哈希的段首像素与它相同”，
+         可以对哈希做稳定排序后一次比较出来；
+      3. 其余段首按与前一段首的差值分类为 DIFF / LUMA / RGB / RGBA，各类一起写入输出缓冲区。
+    """
+    height, width, channels = pixels.shape
+    flat = np.ascontiguousarray(pixels.reshape(-1, channels))
+    if channels == 3:
+        flat = np.concatenate([flat, np.full((len(flat), 1), 255, dtype=np.uint8)], axis=1)
+    packed = flat.view(np.uint32).ravel()
+
+    # 段首：与前一个像素不同的位置（第一个像素与初始 prev=(0,0,0,255) 比较）
+    initial = np.array([0, 0, 0, 255], dtype=np.uint8).view(np.uint32)[0]
+    changed = np.empty(len(packed), dtype=bool)
+    changed[0] = packed[0] != initial
+    np.not_equal(packed[1:], packed[:-1], out=changed[1:])
+    starts = np.flatnonzero(changed)
+
+    # 每段之后的 RUN 长度（第一个像素若与初始 prev 相同，开头还有一段纯 RUN）
+    bounds = np.append(starts, len(packed))
+    run_lengths = bounds[1:] - bounds[:-1] - 1
+    leading_run = int(starts[0]) if len(starts) else len(packed)
+
+    px = flat[starts].astype(np.int16)
+    prev = np.vstack([np.array([[0, 0, 0, 255]], dtype=np.int16), px[:-1]])
+
+    # INDEX 命中：同哈希的上一个段首像素与当前像素相同；没有更早的同哈希像素时与初始表（全 0）比较
+    hashes = (px[:, 0] * 3 + px[:, 1] * 5 + px[:, 2] * 7 + px[:, 3] * 11) % 64
+    values = packed[starts]
+    order = np.lexsort((np.arange(len(starts)), hashes))
+    earlier = np.full(len(starts), -1)
+    same_hash = hashes[order][1:] == hashes[order][:-1]
+    earlier[order[1:][same_hash]] = order[:-1][same_hash]
+    is_index = np.where(earlier >= 0, values == values[np.maximum(earlier, 0)], values == 0)
+
+    diff = _wrap(px - prev)
+    vr, vg, vb, va = diff[:, 0], diff[:, 1], diff[:, 2], diff[:, 3]
+    vg_r, vg_b = _wrap(vr - vg), _wrap(vb - vg)
+    rest = ~is_index
+    is_rgba = rest & (va != 0)
+    rest &= ~is_rgba
+    is_diff = rest & (vr >= -2) & (vr <= 1) & (vg >= -2) & (vg <= 1) & (vb >= -2) & (vb <= 1)
+    rest &= ~is_diff
+    is_luma = rest & (vg >= -32) & (vg <= 31) & (vg_r >= -8) & (vg_r <= 7) & (vg_b >= -8) & (vg_b <= 7)
+    is_rgb = rest & ~is_luma
+
+    # 每段的字节数 = 段首操作 + RUN 块数（每块最多 62 个像素）
+    op_len = np.select([is_index | is_diff, is_luma, is_rgb], [1, 2, 4], 5)
+    run_chunks = (run_lengths + 61) // 62
+    leading_chunks = (leading_run + 61) // 62
+    seg_len = op_len + run_chunks
+    offsets = leading_chunks + np.concatenate([[0], np.cumsum(seg_len)[:-1]]).astype(np.int64)
+    body = np.zeros(leading_chunks + int(seg_len.sum()), dtype=np.uint8)
+
+    def write_runs(positions, lengths):
+        chunks = (lengths + 61) // 62
+        has_run = chunks > 0
+        positions, lengths, chunks = positions[has_run], lengths[has_run], chunks[has_run]
+        run_pos = np.repeat(positions, chunks) + (np.arange(chunks.sum()) - np.repeat(np.cumsum(chunks) - chunks, chunks))
+        body[run_pos] = QOI_OP_RUN | 61
+        last = positions + chunks - 1
+        body[last] = QOI_OP_RUN | (lengths - 62 * (chunks - 1) - 1)
+
+    write_runs(np.array([0]), np.array([leading_run]))
+    body[offsets[is_index]] = QOI_OP_INDEX | hashes[is_index]
+    body[offsets[is_diff]] = (QOI_OP_DIFF | ((vr[is_diff] + 2) << 4) | ((vg[is_diff] + 2) << 2) | (vb[is_diff] + 2))
+    pos = offsets[is_luma]
+    body[pos] = QOI_OP_LUMA | (vg[is_luma] + 32)
+    body[pos + 1] = ((vg_r[is_luma] + 8) << 4) | (vg_b[is_luma] + 8)
+    for ops, code, n in ((is_rgb, QOI_OP_RGB, 3), (is_rgba, QOI_OP_RGBA, 4)):
+        pos = offsets[ops]
+        body[pos] = code
+        for c in range(n):
+            body[pos + 1 + c] = px[ops, c]
+    write_runs(offsets + op_len, run_lengths)
+
+    header = b"qoif" + struct.pack(">IIBB", width, height, channels, 0)
+    return header + body.tobytes() + QOI_END
+
+
+def decode_qoi(data):
+    """ QOI 解码（逐操作的参考实现，只用于检查编码是否无损） """
+    width, height, channels, _ = struct.unpack(">IIBB", data[4:14])
+    out = np.empty((width * height, 4), dtype=np.uint8)
+    index = [(0, 0, 0, 0)] * 64
+    r, g, b, a = 0, 0, 0, 255
+    i, n, pos, end = 0, width * height, 14, len(data) - len(QOI_END)
+    while i < n and pos < end:
+        byte = data[pos]
+        pos += 1
+        if byte == QOI_OP_RGB:
+            r, g, b = data[pos], data[pos + 1], data[pos + 2]
+            pos += 3
+        elif byte == QOI_OP_RGBA:
+            r, g, b, a = data[pos], data[pos + 1], data[pos + 2], data[pos + 3]
+            pos += 4
+        elif byte & 0xC0 == QOI_OP_INDEX:
+            r, g, b, a = index[byte]
+        elif byte & 0xC0 == QOI_OP_DIFF:
+            r = (r + ((byte >> 4) & 3) - 2) & 255
+            g = (g + ((byte >> 2) & 3) - 2) & 255
+            b = (b + (byte & 3) - 2) & 255
+        elif byte & 0xC0 == QOI_OP_LUMA:
+            second = data[pos]
+            pos += 1
+            vg = (byte & 0x3F) - 32
+            r = (r + vg - 8 + ((second >> 4) & 15)) & 255
+            g = (g + vg) & 255
+            b = (b + vg - 8 + (second & 15)) & 255
+        else:  # RUN
+            run = (byte & 0x3F) + 1
+            out[i:i + run] = (r, g, b, a)
+            i += run
+            continue
+        index[(r * 3 + g * 5 + b * 7 + a * 11) % 64] = (r, g, b, a)
+        out[i] = (r, g, b, a)
+        i += 1
+    return out.reshape(height, width, 4)[:, :, :channels]
+
+
+# ================= 3) 统一的编码入口 ===================
+# 格式名 → 文件扩展名
+FORMATS = {
+    "png": ".png",          # RGBA 真彩色（与 matplotlib 保存的格式相同），Up 滤波
+    "png-rgb": ".png",      # 去掉恒为 255 的 alpha 通道
+    "png-palette": ".png",  # 调色板 PNG，颜色超过 256 种时退回 png-rgb
+    "webp": ".webp",        # 无损 WebP
+    "qoi": ".qoi",          # QOI
+}
+
+
+class ImageEncoder:
+    """
+    所有渲染器共用的编码设置：format 为 FORMATS 中的格式名，
+    compress_level 为 PNG 的 zlib 压缩级别（0~9），webp_method 为 WebP 的压缩力度（0~6）。
+    """
+
+    def __init__(self, format="png", compress_level=1, webp_method=0):
+        if format not in FORMATS:
+            raise ValueError(f"未知的图片格式：{format}，可选 {', '.join(FORMATS)}。")
+        if not 0 <= compress_level <= 9:
+            raise ValueError("PNG 压缩级别应在 0~9 之间。")
+        self.format = format
+        self.compress_level = compress_level
+        self.webp_method = webp_method
+
+    @property
+    def extension(self):
+        return FORMATS[self.format]
+
+    def describe(self):
+        """ 影响输出字节的全部设置，用作构建缓存的键 """
+        return {"format": self.format, "compress_level": self.compress_level, "webp_method": self.webp_method}
+
+    def encode(self, pixels):
+        if self.format == "png":
+            return encode_png(pixels, self.compress_level)
+        if self.format == "png-rgb":
+            return encode_png(np.ascontiguousarray(pixels[:, :, :3]), self.compress_level)
+        if self.format == "png-palette":
+            return encode_png_palette(pixels, self.compress_level)
+        if self.format == "webp":
+            return encode_webp(pixels, self.webp_method)
+        return encode_qoi(np.ascontiguousarray(pixels[:, :, :3]))
+
+    def output_name(self, filename):
+        """ 把任务中的文件名（Image 列 + .png）换成当前格式的扩展名 """
+        root, _ = splitext(filename)
+        return root + self.extension
+
+
+def splitext(filename):
+    root, dot, ext = filename.rpartition(".")
+    return (root, dot + ext) if dot else (filename, "")
+
+
+def decode(data, format):
+    """ 解码为 (H, W, C) 数组，用于检查无损 """
+    if format == "qoi":
+        return decode_qoi(data)
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(data))
+    if image.mode == "P":
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    return np.asarray(image)
+
+
+# ================= 4) 基准测试 ===================
+BENCHMARK_SETTINGS = [
+    ("png", {"compress_level": 1}),
+    ("png", {"compress_level": 6}),
+    ("png", {"compress_level": 9}),
+    ("png-rgb", {"compress_level": 1}),
+    ("png-rgb", {"compress_level": 9}),
+    ("png-palette", {"compress_level": 1}),
+    ("png-palette", {"compress_level": 9}),
+    ("webp", {"webp_method": 0}),
+    ("webp", {"webp_method": 4}),
+    ("qoi", {}),
+]
+
+
+def sample_images():
+    """ 用直接栅格化引擎渲染两组样本：stroop squared（7×6 种颜色词组合）和 flanker squared（字母，前 60 行） """
+    import string
+
+    from raster_engine import FLANKER_BG, STROOP_BG, RasterRenderer
+
+    words = ["Red", "Blue", "Green", "Yellow", "Orange", "Black", "Purple"]
+    hexes = ["#FF0000", "#0000FF", "#00FF00", "#FFFF00", "#FFA500", "#000000", "#800080"]
+    stroop = RasterRenderer("squared", STROOP_BG)
+    stroop_images = [stroop.render([a, a, b], [hexes[j], hexes[i], hexes[j]])
+                     for i, a in enumerate(words) for j, b in enumerate(words) if a != b]
+
+    flanker = RasterRenderer("squared", FLANKER_BG)
+    letters = string.ascii_uppercase
+    flanker_images = [flanker.render([f * 2 + o + f * 2, o * 2 + f + o * 2, f * 5], ["white"] * 3)
+                      for f in letters[:6] for o in letters[:11] if f != o]
+    return {"stroop": stroop_images, "flanker": flanker_images}
+
+
+def benchmark():
+    """ 每种格式 / 参数：平均每张字节数、平均编码耗时，并解码检查是否无损 """
+    samples = sample_images()
+    print(f"{'格式':<14}{'参数':<20}" + "".join(f"{name + ' 字节/张':>18}{name + ' ms/张':>16}" for name in samples)
+          + f"{'无损':>6}")
+    for format, options in BENCHMARK_SETTINGS:
+        encoder = ImageEncoder(format, **options)
+        cells, lossless = [], True
+        for images in samples.values():
+            encoder.encode(images[0])  # 预热
+            start = time.perf_counter()
+            encoded = [encoder.encode(image) for image in images]
+            ms = (time.perf_counter() - start) / len(images) * 1000
+            size = sum(len(data) for data in encoded) / len(images)
+            for image, data in zip(images[:5], encoded[:5]):
+                decoded = decode(data, format)
+                lossless &= np.array_equal(decoded, image[:, :, :decoded.shape[2]])
+            cells.append(f"{size:>18.0f}{ms:>16.2f}")
+        params = ", ".join(f"{k}={v}" for k, v in options.items())
+        print(f"{format:<14}{params:<20}" + "".join(cells) + f"{'是' if lossless else '否':>6}")
+
+
+if __name__ == "__main__":
+    benchmark()
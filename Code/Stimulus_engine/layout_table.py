@@ -0,0 +1,113 @@
+import time
+from collections import namedtuple
+
+from font_registry import get_font, load_kerning
+
+# 一个 (文本, 字体, 像素字号) 的排版结果，与文本放在画布上的位置、颜色无关：
+#   offsets：每个字符基线起点相对第一个字符的横向偏移（步进宽度 + 字距）；
+#   boxes：每个字符的墨迹包围盒（anchor="ls"，相对各自的基线起点）；
+#   left/right/top/bottom：整串墨迹包围盒（相对第一个字符的基线起点）；
+#   box_height/descent：va='center' 用的文本框高度与下沉（与 "lp" 取较大值，见 RasterRenderer）；
+#   bbox：整串文本 anchor="la" 的包围盒，等于 ImageDraw.textbbox((0, 0), text, font)
+TextLayout = namedtuple("TextLayout", "offsets boxes left right top bottom box_height descent bbox")
+
+
+def measure_text(text, font, pixel_size, kerning, units_per_em):
+    """ 排版一串文本（逐字符步进 + 'kern' 表字距，字距按 1/8 像素取整，与 matplotlib 的 hinting_factor=8 一致） """
+    offsets = []
+    pen = 0.0
+    previous = None
+    for char in text:
+        if previous is not None:
+            kern = kerning.get((previous, char), 0)
+            pen += round(kern * pixel_size / units_per_em * 8) / 8
+        offsets.append(pen)
+        pen += font.getlength(char)
+        previous = char
+
+    boxes = tuple(font.getbbox(char, anchor="ls") for char in text)
+    left = min(box[0] + offset for box, offset in zip(boxes, offsets))
+    right = max(box[2] + offset for box, offset in zip(boxes, offsets))
+    top = min(box[1] for box in boxes)
+    bottom = max(box[3] for box in boxes)
+    _, lp_top, _, lp_bottom = font.getbbox("lp", anchor="ls")
+    return TextLayout(tuple(offsets), boxes, left, right, top, bottom,
+                      max(bottom - top, lp_bottom - lp_top), max(bottom, lp_bottom), font.getbbox(text))
+
+
+class LayoutTable:
+    """
+    文本排版表：每个 (文本, 字体文件, 像素字号) 只测量一次，之后的图片直接查表得到字符位置和对齐偏移。
+    刺激文本来自很小的固定集合（5~6 个字符的 flanker 串、7 个颜色词、1~9 位数字），
+    表很小，不做淘汰。precompute() 可以在渲染前一次性填好；未预先计算的文本在第一次用到时补上。
+    字体对象与字距表来自 font_registry，进程内共享。
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.measure_seconds = 0.0
+
+    def get(self, text, font_path, pixel_size):
+        key = (text, font_path, pixel_size)
+        layout = self._entries.get(key)
+        if layout is not None:
+            self.hits += 1
+            return layout
+        self.misses += 1
+        start = time.perf_counter()
+        kerning, units_per_em = load_kerning(font_path)
+        layout = measure_text(text, get_font(font_path, pixel_size), pixel_size, kerning, units_per_em)
+        self.measure_seconds += time.perf_counter() - start
+        self._entries[key] = layout
+        return layout
+
+    def precompute(self, texts, font_path, pixel_sizes):
+        """ 一次排版 texts 中每个不同的非空文本在每个字号下的结果，返回表中的条目数 """
+        for text in set(texts):
+            if text:
+                for pixel_size in pixel_sizes:
+                    self.get(text, font_path, pixel_size)
+        return len(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "measure_seconds": self.measure_seconds}
+
+
+# 进程内共享的排版表（多进程渲染时每个工作进程一份）
+layout_table = LayoutTable()
+
+
+# ================= 基准测试 ===================
+def benchmark(n=2000):
+    """ 每张图重新测量（原做法）与查表得到整串排版的耗时，文本取 flanker / stroop / 数字各一组 """
+    from font_registry import resolve_font
+
+    texts = ["AABAA", "BBABB", "QQWQQ", "Red", "Purple", "Yellow", "00123", "11211", "7"]
+    font_path = resolve_font()
+    pixel_size = 36 * 100 / 72
+    font = get_font(font_path, pixel_size)
+    kerning, units_per_em = load_kerning(font_path)
+
+    start = time.perf_counter()
+    for i in range(n):
+        measure_text(texts[i % len(texts)], font, pixel_size, kerning, units_per_em)
+    measure_us = (time.perf_counter() - start) / n * 1e6
+
+    table = LayoutTable()
+    table.precompute(texts, font_path, [pixel_size])
+    start = time.perf_counter()
+    for i in range(n):
+        table.get(texts[i % len(texts)], font_path, pixel_size)
+    lookup_us = (time.perf_counter() - start) / n * 1e6
+    print(f"每串文本：重新测量 {measure_us:.1f} µs，查表 {lookup_us:.2f} µs（{measure_us / lookup_us:.0f}x），"
+          f"表中 {len(table)} 条")
+
+
+if __name__ == "__main__":
+    benchmark()
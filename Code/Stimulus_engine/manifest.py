@@ -0,0 +1,128 @@
+import pyarrow as pa
+
+# ========== 1) 清单格式 ==========
+# 生成器 → 渲染器之间的交接格式：Arrow IPC 文件（不压缩，可直接内存映射），
+# 每个文本元素一行，按 image_id 连续存放：
+#   image_id  : 图片编号（同时作为文件名，不含 .png）
+#   position  : 文本所在位置，target（中上 / 居中）、left（左下）、right（右下）
+#   text      : 显示的文本
+#   color     : 文字颜色，"#RRGGBB"
+#   condition : 试次条件 / 数据集类型
+# position、color、condition 取值很少，用字典编码存储。
+POSITIONS = ("target", "left", "right")
+MANIFEST_SCHEMA = pa.schema([
+    ("image_id", pa.string()),
+    ("position", pa.dictionary(pa.int8(), pa.string())),
+    ("text", pa.string()),
+    ("color", pa.dictionary(pa.int16(), pa.string())),
+    ("condition", pa.dictionary(pa.int32(), pa.string())),
+])
+DEFAULT_COLOR = "#000000"
+
+# Excel 副产物使用 Final_experiment_image_extraction 脚本读取的列名
+EXCEL_COLUMNS = {"target": "Target", "left": "Option_Left", "right": "Option_Right"}
+
+
+def manifest_columns(trials):
+    """
+    把逐图片的试次 [(image_id, condition, [(position, text, color), ...]), ...]
+    展开成清单的五个列（每个文本元素一行）。
+    """
+    columns = {name: [] for name in MANIFEST_SCHEMA.names}
+    for image_id, condition, items in trials:
+        for position, text, color in items:
+            if position not in POSITIONS:
+                raise ValueError(f"未知的位置：{position}，应为 {', '.join(POSITIONS)} 之一。")
+            columns["image_id"].append(str(image_id))
+            columns["position"].append(position)
+            columns["text"].append(str(text))
+            columns["color"].append(color)
+            columns["condition"].append(condition)
+    return columns
+
+
+def write_manifest(path, columns, batch_size=65536):
+    """
+    把五个等长的列（list 或 numpy 数组）写成 Arrow IPC 文件。
+    同一 image_id 的行必须连续，读取时按连续的 image_id 分组。
+    """
+    table = pa.Table.from_pydict({name: pa.array(columns[name]).cast(field.type)
+                                  for name, field in zip(MANIFEST_SCHEMA.names, MANIFEST_SCHEMA)},
+                                 schema=MANIFEST_SCHEMA)
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, MANIFEST_SCHEMA) as writer:
+        writer.write_table(table, max_chunksize=batch_size)
+    return table.num_rows
+
+
+def open_manifest(path):
+    """ 以内存映射方式打开清单，返回 pyarrow.Table（列数据不复制到内存） """
+    source = pa.memory_map(path, "r")
+    return pa.ipc.open_file(source).read_all()
+
+
+# ========== 2) 渲染任务 ==========
+def iter_manifest_images(path, positions=POSITIONS, start_row=1, end_row=None):
+    """
+    按图片逐个读取第 start_row ~ end_row 张图片（从 1 开始；end_row 为 None 时读到最后），
+    产出 (texts, colors, filename)，与 workbook_reader.iter_stimulus_rows 相同：
+      - texts / colors 按 positions 的顺序排列，清单中没有的位置为空文本、黑色；
+      - filename 为 image_id + ".png"。
+    逐个 record batch 转成 Python 对象，内存占用只与 batch 大小有关。
+    """
+    slot = {position: i for i, position in enumerate(positions)}
+    reader = pa.ipc.open_file(pa.memory_map(path, "r"))
+
+    def make_job(image_id, items):
+        texts = [""] * len(positions)
+        colors = [DEFAULT_COLOR] * len(positions)
+        for position, text, color in items:
+            if position in slot:
+                texts[slot[position]] = text
+                colors[slot[position]] = color
+        return texts, colors, image_id + ".png"
+
+    count = 0
+    current_id, items = None, []
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i)
+        columns = [batch.column(name).to_pylist() for name in ("image_id", "position", "text", "color")]
+        for image_id, position, text, color in zip(*columns):
+            if image_id != current_id:
+                if current_id is not None:
+                    count += 1
+                    if count >= start_row:
+                        yield make_job(current_id, items)
+                    if end_row is not None and count >= end_row:
+                        return
+                current_id, items = image_id, []
+            items.append((position, text, color))
+    if current_id is not None:
+        count += 1
+        if count >= start_row and (end_row is None or count <= end_row):
+            yield make_job(current_id, items)
+
+
+# ========== 3) Excel 副产物 ==========
+def export_excel(path, excel_path):
+    """
+    把清单导出为 Excel（Target / Option_Left / Option_Right / Image 四列，文字颜色写成字体颜色），
+    供仍然读取 Excel 的脚本使用。
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Manifest")
+    ws.append([EXCEL_COLUMNS[position] for position in POSITIONS] + ["Image"])
+    fonts = {}
+    for texts, colors, filename in iter_manifest_images(path):
+        row = []
+        for text, color in zip(texts, colors):
+            cell = WriteOnlyCell(ws, value=text)
+            if color not in fonts:
+                fonts[color] = Font(color=color.lstrip("#").upper())
+            cell.font = fonts[color]
+            row.append(cell)
+        ws.append(row + [filename[:-len(".png")]])
+    wb.save(excel_path)
@@ -0,0 +1,222 @@
+import math
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from batch_render import split_chunks
+from build_cache import split_unchanged
+from image_encoder import ImageEncoder
+from raster_engine import (CANVAS_WIDTH, FLANKER_BG, STROOP_BG, VERIFY_CASES, RasterRenderer, _ink_bbox,
+                           default_font_path, render_with_matplotlib, scaled_canvas)
+
+# 各 VLM 常见的输入宽度；500 为原始尺寸
+DEFAULT_WIDTHS = (224, 336, 448, 1000)
+
+
+def size_folder(output_folder, width):
+    """ 每个尺寸一个子文件夹：<输出文件夹>/224w/00001.png … """
+    return os.path.join(output_folder, f"{width}w")
+
+
+def parse_widths(value):
+    """ "224,336,448,1000" → (224, 336, 448, 1000) """
+    return tuple(sorted({int(part) for part in value.split(",") if part.strip()}))
+
+
+class PyramidRenderer:
+    """
+    一次生成同一试次的多个尺寸。布局槽位（归一化坐标、字号）、文本与颜色对所有尺寸只解析一次，
+    字体与字距表经 font_registry 只加载一次；每个尺寸是一个 dpi 按宽度缩放的 RasterRenderer（等价于原脚本
+    savefig(dpi=100 × 宽/500)），字形在目标分辨率下直接栅格化，而不是把 500 px 的图缩放，
+    所以放大后的字形仍然清晰。每个尺寸有自己的贴图缓存。
+    """
+
+    def __init__(self, layout, background, widths=DEFAULT_WIDTHS, font_path=None, encoder=None):
+        font_path = font_path or default_font_path()
+        self.widths = tuple(sorted(set(widths)))
+        self.encoder = encoder if encoder is not None else ImageEncoder()
+        self.renderers = {
+            width: RasterRenderer(layout, background, font_path, *scaled_canvas(width),
+                                  encoder=self.encoder)
+            for width in self.widths
+        }
+
+    def render(self, texts, colors, widths=None):
+        """ 返回 {宽度: (高, 宽, 4) uint8 数组}；widths 为 None 时生成全部尺寸 """
+        return {width: self.renderers[width].render(texts, colors) for width in (widths or self.widths)}
+
+    def save(self, texts, colors, output_folder, filename, widths=None):
+        for width, pixels in self.render(texts, colors, widths).items():
+            with open(os.path.join(size_folder(output_folder, width), filename), "wb") as f:
+                f.write(self.encoder.encode(pixels))
+
+    def sprite_stats(self):
+        """ 各尺寸贴图缓存的命中统计 {宽度: {...}} """
+        return {width: renderer.sprites.stats() for width, renderer in self.renderers.items()}
+
+
+# ================= 批量生成（增量、进程池） ===================
+_worker_pyramid = None
+
+
+def _init_worker(layout, background, widths, encoder):
+    global _worker_pyramid
+    _worker_pyramid = PyramidRenderer(layout, background, widths, encoder=encoder)
+
+
+def _render_chunk(task):
+    """ 渲染一个分块，返回 (进程号, 写出的文件数, 耗时秒数, 贴图缓存命中数, 未命中数) """
+    jobs, output_folder = task
+    caches = [renderer.sprites for renderer in _worker_pyramid.renderers.values()]
+    hits, misses = sum(c.hits for c in caches), sum(c.misses for c in caches)
+    start = time.perf_counter()
+    written = 0
+    for texts, colors, filename, widths in jobs:
+        _worker_pyramid.save(texts, colors, output_folder, filename, widths)
+        written += len(widths)
+    return (os.getpid(), written, time.perf_counter() - start,
+            sum(c.hits for c in caches) - hits, sum(c.misses for c in caches) - misses)
+
+
+def render_pyramid(jobs, output_folder, layout, background, widths=DEFAULT_WIDTHS, workers=None,
+                   incremental=False, encoder=None):
+    """
+    把 jobs（[(texts, colors, filename), ...]）按 widths 中的每个尺寸渲染到 <output_folder>/<宽度>w/。
+    每个尺寸的子文件夹有自己的渲染索引（build_cache.py，画布尺寸计入哈希）；incremental=True 时
+    只生成缺失或有变化的 (图片, 尺寸)，例如新增一个尺寸时只生成该尺寸。
+    同一张图片需要的所有尺寸在同一个进程中连续生成。返回值与 batch_render.render_batch 相同。
+    """
+    workers = workers or os.cpu_count() or 1
+    encoder = encoder or ImageEncoder()
+    widths = tuple(sorted(set(widths)))
+    jobs = [(texts, colors, encoder.output_name(filename)) for texts, colors, filename in jobs]
+    filenames = [filename for _, _, filename in jobs]
+    if len(set(filenames)) != len(filenames):
+        raise ValueError("Image 列存在重复的文件名，无法保证输出一致。")
+
+    stale, indexes = {}, []
+    for width in widths:
+        folder = size_folder(output_folder, width)
+        os.makedirs(folder, exist_ok=True)
+        width_px, height, dpi = scaled_canvas(width)
+        todo, keys, _, index = split_unchanged(jobs, folder, layout, background, encoder, force=not incremental,
+                                               width=width_px, height=height, dpi=dpi)
+        for _, _, filename in todo:
+            stale.setdefault(filename, []).append(width)
+        indexes.append((index, keys))
+    work = [(texts, colors, filename, tuple(stale[filename])) for texts, colors, filename in jobs
+            if filename in stale]
+    if not work:
+        return {}
+
+    tasks = [(chunk, output_folder) for chunk in split_chunks(work, workers)]
+    if workers == 1:
+        _init_worker(layout, background, widths, encoder)
+        results = [_render_chunk(task) for task in tasks]
+    else:
+        with Pool(workers, initializer=_init_worker, initargs=(layout, background, widths, encoder)) as pool:
+            results = list(pool.imap_unordered(_render_chunk, tasks))
+
+    for index, keys in indexes:
+        index.update(keys)
+        index.save()
+
+    stats = {}
+    for pid, count, seconds, hits, misses in results:
+        entry = stats.setdefault(pid, {"images": 0, "seconds": 0.0, "hits": 0, "misses": 0})
+        entry["images"] += count
+        entry["seconds"] += seconds
+        entry["hits"] += hits
+        entry["misses"] += misses
+    return stats
+
+
+# ================= 检查与基准测试 ===================
+def verify(widths=DEFAULT_WIDTHS + (CANVAS_WIDTH,)):
+    """
+    1) 500 px 一级与 RasterRenderer 完全相同；
+    2) 每个尺寸与 matplotlib 按同一 dpi 保存的图片做像素容差检查（包围盒容差随尺寸放大）；
+    3) 增量：第二次全部跳过，新增一个尺寸时只生成该尺寸。
+    """
+    import tempfile
+
+    all_passed = True
+    for layout, background, texts, colors in VERIFY_CASES:
+        pyramid = PyramidRenderer(layout, background, widths)
+        images = pyramid.render(texts, colors)
+        if CANVAS_WIDTH in images:
+            all_passed &= np.array_equal(images[CANVAS_WIDTH], RasterRenderer(layout, background).render(texts, colors))
+        for width, ours in images.items():
+            ref = render_with_matplotlib(texts, colors, layout, background, dpi=scaled_canvas(width)[2])
+            if ref.shape != ours.shape:
+                print(f"[失败] {width}px 尺寸不一致：{ours.shape} / {ref.shape}")
+                all_passed = False
+                continue
+            mean_diff = float(np.abs(ours.astype(int) - ref.astype(int)).mean())
+            box_ours = _ink_bbox(ours, pyramid.renderers[width].background)
+            box_ref = _ink_bbox(ref, pyramid.renderers[width].background)
+            shift = int(max(abs(a - b) for a, b in zip(box_ours, box_ref)))
+            passed = mean_diff <= 2.0 and shift <= max(2, math.ceil(2 * width / CANVAS_WIDTH))
+            all_passed &= passed
+            print(f"[{'通过' if passed else '失败'}] {layout:<8} {' / '.join(texts):<28} {width:>4}px "
+                  f"mean_diff={mean_diff:.3f}  bbox_shift={shift}px")
+
+    jobs = [(["Red", "Blue", "Red"], ["#0000FF", "#FF0000", "#0000FF"], "00001.png"),
+            (["Green", "Black", "Green"], ["#00FF00", "#000000", "#00FF00"], "00002.png")]
+    with tempfile.TemporaryDirectory() as folder:
+        first = render_pyramid(jobs, folder, "squared", STROOP_BG, (224, 448), workers=1, incremental=True)
+        again = render_pyramid(jobs, folder, "squared", STROOP_BG, (224, 448), workers=1, incremental=True)
+        added = render_pyramid(jobs, folder, "squared", STROOP_BG, (224, 336, 448), workers=1, incremental=True)
+        counts = [sum(e["images"] for e in stats.values()) for stats in (first, again, added)]
+        only_new = sorted(os.listdir(size_folder(folder, 336))) == [".render_index.json", "00001.png", "00002.png"]
+    incremental_ok = counts == [4, 0, 2] and only_new
+    print(f"增量生成：首次 {counts[0]} 个文件，再次 {counts[1]} 个，新增尺寸 {counts[2]} 个"
+          f"（{'正确' if incremental_ok else '错误'}）")
+    return all_passed and incremental_ok
+
+
+def benchmark(n=100, widths=DEFAULT_WIDTHS):
+    """ 每个尺寸各跑一次 matplotlib 脚本（原做法）与一次生成全部尺寸的每张耗时（含 PNG 编码） """
+    texts, colors = ["AABAA", "BBABB", "AAAAA"], ["white"] * 3
+    encoder = ImageEncoder()
+
+    n_mpl = max(n // 10, 1)
+    start = time.perf_counter()
+    for _ in range(n_mpl):
+        for width in widths:
+            encoder.encode(render_with_matplotlib(texts, colors, "squared", FLANKER_BG, dpi=scaled_canvas(width)[2]))
+    mpl_ms = (time.perf_counter() - start) / n_mpl * 1000
+
+    pyramid = PyramidRenderer("squared", FLANKER_BG, widths, encoder=encoder)
+    start = time.perf_counter()
+    for _ in range(n):
+        for pixels in pyramid.render(texts, colors).values():
+            encoder.encode(pixels)
+    pyramid_ms = (time.perf_counter() - start) / n * 1000
+    sizes = "/".join(str(w) for w in widths)
+    print(f"每张试次生成 {sizes} px 共 {len(widths)} 个尺寸：matplotlib 逐尺寸 {mpl_ms:.1f} ms，"
+          f"多尺寸渲染器 {pyramid_ms:.1f} ms（{mpl_ms / pyramid_ms:.1f}x）")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="一次生成多个尺寸的刺激图片：检查 / 测速")
+    parser.add_argument("--verify", action="store_true", help="与 matplotlib 按同一 dpi 的输出做像素容差检查")
+    parser.add_argument("--benchmark", action="store_true", help="比较逐尺寸运行 matplotlib 与一次生成全部尺寸")
+    parser.add_argument("--widths", default=",".join(map(str, DEFAULT_WIDTHS)), help="尺寸（宽度像素），逗号分隔")
+    args = parser.parse_args()
+
+    ok = True
+    if args.verify or not args.benchmark:
+        ok = verify(parse_widths(args.widths) + (CANVAS_WIDTH,))
+    if args.benchmark:
+        benchmark(widths=parse_widths(args.widths))
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
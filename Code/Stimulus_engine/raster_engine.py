@@ -0,0 +1,302 @@
+import io
+import math
+import time
+
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw
+
+from font_registry import get_font, resolve_font
+from glyph_cache import TextSprite, TextSpriteCache
+from layout_table import layout_table
+from image_encoder import ImageEncoder, encode_png
+
+# ================= 画布与布局设置 ===================
+# 与原 matplotlib 脚本一致：figsize=(5,3)，dpi=100 → 500x300 像素
+CANVAS_WIDTH = 500
+CANVAS_HEIGHT = 300
+DPI = 100
+
+# 背景色：stroop 使用 (200,200,200)，flanker 使用 matplotlib 的 'gray'（#808080）
+STROOP_BG = (200, 200, 200)
+FLANKER_BG = (128, 128, 128)
+
+# 布局：每个文本槽位为 (x, y, fontsize)，x/y 为归一化坐标（原点在左下角，与 plt.text 相同）
+# squared_*：Target 在中上，Option_Left 在左下，Option_Right 在右下
+SQUARED_LAYOUT = ((0.5, 0.70, 36), (0.25, 0.40, 32), (0.75, 0.40, 32))
+# Origin_*：只有 Target，居中显示
+ORIGIN_LAYOUT = ((0.5, 0.5, 45),)
+
+LAYOUTS = {
+    "squared": SQUARED_LAYOUT,
+    "origin": ORIGIN_LAYOUT,
+}
+
+
+def scaled_canvas(width):
+    """
+    按宽度等比缩放画布，返回 (宽, 高, dpi)：相当于原脚本 savefig(dpi=100 × 宽/500)，
+    字号（pt）不变、像素字号随 dpi 放大；高度与 matplotlib 一样向下取整（336 → 201）。
+    """
+    return width, CANVAS_HEIGHT * width // CANVAS_WIDTH, DPI * width / CANVAS_WIDTH
+
+
+def default_font_path():
+    """
+    返回 matplotlib 默认字体 DejaVu Sans 的路径，保证字形与原脚本一致。
+    由 font_registry 解析一次：优先 matplotlib 自带的文件，没有 matplotlib 时用内置的同一字体。
+    """
+    return resolve_font("dejavu-sans")
+
+
+def to_rgb(color):
+    """ 将 "#RRGGBB"、颜色名（如 'white'）或 RGB 元组统一转换为 0-255 的 RGB 元组 """
+    if isinstance(color, str):
+        return ImageColor.getrgb(color)[:3]
+    return tuple(int(c) for c in color[:3])
+
+
+class RasterRenderer:
+    """
+    直接栅格化渲染器：不创建 matplotlib figure，直接把文本画进像素缓冲区。
+
+    文本定位复刻 plt.text(ha='center', va='center') 的规则：
+      - 逐字符排版，字符间按 'kern' 表做字距调整（与 matplotlib 相同）；
+      - 水平方向：整串字形墨迹包围盒的中心对齐到 x；
+      - 垂直方向：文本框高度取 max(文本高度, "lp" 高度)，下沉取 max(文本下沉, "lp" 下沉)，
+        文本框中心对齐到 y。
+    字体、字号（pt → px 按 dpi 换算）、背景色都与原脚本相同，输出为 RGBA。
+
+    每个 (文本, 字号, 颜色) 只栅格化一次，生成的贴图放在 LRU 缓存（self.sprites）中，
+    之后的图片只需把贴图 alpha 合成到背景上。
+    """
+
+    def __init__(self, layout, background, font_path=None,
+                 width=CANVAS_WIDTH, height=CANVAS_HEIGHT, dpi=DPI, sprite_cache=None, encoder=None):
+        if isinstance(layout, str):
+            layout = LAYOUTS[layout]
+        self.layout = tuple(layout)
+        self.background = to_rgb(background)
+        self.width = width
+        self.height = height
+        self.dpi = dpi
+        self.font_path = font_path or default_font_path()
+
+        # 每个字号只取一次字体
+        self._fonts = {}
+        for _, _, fontsize in self.layout:
+            self._get_font(fontsize)
+
+        # 背景模板：每张图从模板复制，避免重复填充
+        self._template = np.empty((height, width, 4), dtype=np.uint8)
+        self._template[...] = self.background + (255,)
+
+        self.sprites = sprite_cache if sprite_cache is not None else TextSpriteCache()
+        # 保存图片时的编码设置（格式、压缩级别），默认 RGBA PNG、zlib 级别 1
+        self.encoder = encoder if encoder is not None else ImageEncoder()
+
+    def _get_font(self, fontsize):
+        font = self._fonts.get(fontsize)
+        if font is None:
+            # 字体对象由 font_registry 按 (字体文件, 像素字号) 在进程内共享
+            font = get_font(self.font_path, fontsize * self.dpi / 72)
+            self._fonts[fontsize] = font
+        return font
+
+    def precompute_layouts(self, jobs):
+        """ 排版遍：渲染前把 jobs（[(texts, colors, filename), ...]）中每个槽位的不同文本一次性写入排版表 """
+        for slot, (_, _, fontsize) in enumerate(self.layout):
+            texts = {job[0][slot] for job in jobs if slot < len(job[0])}
+            layout_table.precompute(texts, self.font_path, [fontsize * self.dpi / 72])
+
+    def layout_text(self, text, x, y, fontsize):
+        """
+        计算每个字符基线左端点的像素坐标（y 轴向下），等价于 ha/va='center'。
+        返回 [(字符, 横坐标), ...] 和基线纵坐标。
+        字符步进、字距和包围盒从排版表（layout_table.py）中取，每个 (文本, 字体, 字号) 只测量一次，
+        这里只做对齐到 (x, y) 的计算。
+        """
+        layout = layout_table.get(text, self.font_path, fontsize * self.dpi / 72)
+        center_x = x * self.width
+        center_y = (1 - y) * self.height
+        origin_x = center_x - (layout.right - layout.left) / 2 - layout.left
+        # Agg 后端 draw_text 会把文字整体上移 1 像素，这里保持一致
+        origin_y = round(center_y + layout.box_height / 2 - layout.descent - 1)
+        return [(char, origin_x + offset) for char, offset in zip(text, layout.offsets)], origin_y
+
+    def _build_sprite(self, text, x, y, fontsize, color):
+        """ 把整串文本栅格化成覆盖率贴图，偏移量相对于槽位中心（取整后）记录 """
+        font = self._get_font(fontsize)
+        glyphs, baseline = self.layout_text(text, x, y, fontsize)
+
+        # 贴图范围：所有字形包围盒的并集，四周留 1 像素，容纳子像素定位带来的溢出
+        boxes = layout_table.get(text, self.font_path, fontsize * self.dpi / 72).boxes
+        x0 = math.floor(min(box[0] + gx for box, (_, gx) in zip(boxes, glyphs))) - 1
+        x1 = math.ceil(max(box[2] + gx for box, (_, gx) in zip(boxes, glyphs))) + 1
+        y0 = baseline + min(box[1] for box in boxes) - 1
+        y1 = baseline + max(box[3] for box in boxes) + 1
+
+        # 逐字符画到灰度图上（位置的小数部分保持不变，字形与直接画在画布上完全相同）
+        mask = Image.new("L", (x1 - x0, y1 - y0), 0)
+        draw = ImageDraw.Draw(mask)
+        for char, glyph_x in glyphs:
+            draw.text((glyph_x - x0, baseline - y0), char, fill=255, font=font, anchor="ls")
+
+        center_x = math.floor(x * self.width)
+        center_y = math.floor((1 - y) * self.height)
+        return TextSprite(np.asarray(mask), color, x0 - center_x, y0 - center_y)
+
+    def get_sprite(self, text, x, y, fontsize, color):
+        """
+        从缓存取文本贴图。键为 (文本, 字号, 颜色, 槽位中心的子像素相位)；
+        现有布局的槽位中心都落在整数像素上，相位恒为 0。
+        """
+        rgb = to_rgb(color)
+        center_x = x * self.width
+        center_y = (1 - y) * self.height
+        key = (text, fontsize, rgb, center_x % 1, center_y % 1)
+        return self.sprites.get(key, lambda: self._build_sprite(text, x, y, fontsize, rgb))
+
+    def render(self, texts, colors):
+        """
+        渲染一张图片，返回形状为 (height, width, 4) 的 uint8 数组。
+        texts/colors 与 layout 中的槽位一一对应；空字符串的槽位直接跳过。
+        """
+        canvas = self._template.copy()
+        for (x, y, fontsize), text, color in zip(self.layout, texts, colors):
+            if not text:
+                continue
+            sprite = self.get_sprite(text, x, y, fontsize, color)
+            sprite.blit(canvas, math.floor(x * self.width), math.floor((1 - y) * self.height))
+        return canvas
+
+    def save(self, texts, colors, save_path):
+        """ 渲染并按 self.encoder 的设置编码保存（默认 PNG） """
+        data = self.encoder.encode(self.render(texts, colors))
+        with open(save_path, "wb") as f:
+            f.write(data)
+
+
+# ================= 与 matplotlib 输出对比 ===================
+def render_with_matplotlib(texts, colors, layout, background, dpi=DPI):
+    """ 按原脚本的方式用 matplotlib 渲染一张图（仅用于对比和测速）；dpi 为保存时的分辨率 """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    if isinstance(layout, str):
+        layout = LAYOUTS[layout]
+    bg_color = tuple(c / 255 for c in to_rgb(background))
+
+    fig = plt.figure(figsize=(CANVAS_WIDTH / DPI, CANVAS_HEIGHT / DPI), dpi=DPI, facecolor=bg_color)
+    ax = fig.add_subplot(111)
+    ax.set_facecolor(bg_color)
+    plt.axis('off')
+    plt.subplots_adjust(left=0, right=1, top=1, bottom=0)
+    for (x, y, fontsize), text, color in zip(layout, texts, colors):
+        plt.text(x, y, text, ha='center', va='center', fontsize=fontsize, color=color)
+
+    buf = io.BytesIO()
+    plt.savefig(buf, format="png", dpi=dpi, facecolor=fig.get_facecolor())
+    plt.close()
+    buf.seek(0)
+    return np.asarray(Image.open(buf).convert("RGBA"))
+
+
+def _ink_bbox(pixels, background):
+    """ 返回与背景差异明显的像素的包围盒 (x0, y0, x1, y1) """
+    diff = np.abs(pixels[..., :3].astype(int) - np.array(background)).sum(axis=-1)
+    ys, xs = np.nonzero(diff > 30)
+    if len(xs) == 0:
+        return None
+    return xs.min(), ys.min(), xs.max(), ys.max()
+
+
+def compare_with_matplotlib(texts, colors, layout, background,
+                            max_mean_diff=2.0, max_bbox_shift=2):
+    """
+    像素容差检查：分别用本引擎和 matplotlib 渲染同一张图，比较
+      - 每通道平均绝对差（mean_diff）；
+      - 文字墨迹包围盒四条边的最大偏移像素数（bbox_shift）。
+    返回 (是否通过, mean_diff, bbox_shift)。
+    """
+    renderer = RasterRenderer(layout, background)
+    ours = renderer.render(texts, colors).astype(int)
+    ref = render_with_matplotlib(texts, colors, layout, background).astype(int)
+
+    mean_diff = float(np.abs(ours - ref).mean())
+    bbox_ours = _ink_bbox(ours, renderer.background)
+    bbox_ref = _ink_bbox(ref, renderer.background)
+    if bbox_ours is None or bbox_ref is None:
+        bbox_shift = 0 if bbox_ours == bbox_ref else max(CANVAS_WIDTH, CANVAS_HEIGHT)
+    else:
+        bbox_shift = int(max(abs(a - b) for a, b in zip(bbox_ours, bbox_ref)))
+
+    passed = mean_diff <= max_mean_diff and bbox_shift <= max_bbox_shift
+    return passed, mean_diff, bbox_shift
+
+
+# 对比用例：覆盖 stroop 的 7 个颜色词和 flanker 的字母/数字串
+VERIFY_CASES = [
+    ("squared", STROOP_BG, ["Red", "Blue", "Red"], ["#0000FF", "#FF0000", "#0000FF"]),
+    ("squared", STROOP_BG, ["Purple", "Yellow", "Orange"], ["#800080", "#FFFF00", "#FFA500"]),
+    ("squared", STROOP_BG, ["Green", "Black", "Green"], ["#00FF00", "#000000", "#00FF00"]),
+    ("squared", FLANKER_BG, ["AABAA", "BBABB", "AAAAA"], ["white"] * 3),
+    ("squared", FLANKER_BG, ["11211", "22222", "11111"], ["white"] * 3),
+    ("origin", STROOP_BG, ["Yellow"], ["#0000FF"]),
+    ("origin", FLANKER_BG, ["QQWQQ"], ["white"]),
+    ("origin", FLANKER_BG, ["00123"], ["white"]),
+]
+
+
+def verify():
+    """ 对所有对比用例做像素容差检查，全部通过返回 True """
+    all_passed = True
+    for layout, background, texts, colors in VERIFY_CASES:
+        passed, mean_diff, bbox_shift = compare_with_matplotlib(texts, colors, layout, background)
+        all_passed = all_passed and passed
+        status = "通过" if passed else "失败"
+        print(f"[{status}] {layout:<8} {' / '.join(texts):<28} mean_diff={mean_diff:.3f}  bbox_shift={bbox_shift}px")
+    return all_passed
+
+
+def benchmark(n=200):
+    """ 比较 matplotlib 与本引擎每秒可生成的图片数（含 PNG 编码） """
+    texts, colors = ["AABAA", "BBABB", "AAAAA"], ["white"] * 3
+
+    n_mpl = max(n // 10, 1)
+    start = time.perf_counter()
+    for _ in range(n_mpl):
+        render_with_matplotlib(texts, colors, "squared", FLANKER_BG)
+    mpl_rate = n_mpl / (time.perf_counter() - start)
+
+    renderer = RasterRenderer("squared", FLANKER_BG)
+    start = time.perf_counter()
+    for _ in range(n):
+        encode_png(renderer.render(texts, colors))
+    engine_rate = n / (time.perf_counter() - start)
+
+    print(f"matplotlib：{mpl_rate:.1f} 张/秒")
+    print(f"raster_engine：{engine_rate:.1f} 张/秒（{engine_rate / mpl_rate:.1f}x）")
+    stats = renderer.sprites.stats()
+    print(f"贴图缓存：命中 {stats['hits']} 次，未命中 {stats['misses']} 次，命中率 {stats['hit_rate']:.1%}")
+    return mpl_rate, engine_rate
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="直接栅格化渲染引擎：与 matplotlib 输出对比 / 测速")
+    parser.add_argument("--verify", action="store_true", help="与 matplotlib 输出做像素容差检查")
+    parser.add_argument("--benchmark", action="store_true", help="测量每秒生成图片数")
+    args = parser.parse_args()
+
+    ok = True
+    if args.verify or not args.benchmark:
+        ok = verify()
+    if args.benchmark:
+        benchmark()
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
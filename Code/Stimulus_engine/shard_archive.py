@@ -0,0 +1,316 @@
+import io
+import json
+import mmap
+import os
+import re
+import tarfile
+import time
+
+# ========== 1) 子集与元数据 ==========
+# Experiment/Final_image/Image 下各子文件夹对应的任务、布局与字符类型
+SUBSET_INFO = {
+    "s": {"task": "stroop", "layout": "origin"},
+    "ss": {"task": "stroop", "layout": "squared"},
+    "fl": {"task": "flanker", "layout": "origin", "style": "letter"},
+    "fls": {"task": "flanker", "layout": "squared", "style": "letter"},
+    "fn": {"task": "flanker", "layout": "origin", "style": "number"},
+    "fns": {"task": "flanker", "layout": "squared", "style": "number"},
+}
+IMAGE_EXTENSIONS = (".png", ".webp", ".qoi")
+# 元数据表中可选的条件列 / 正确答案列（按顺序取第一个存在的列）
+CONDITION_COLUMNS = ("Condition", "condition", "Type")
+ANSWER_COLUMNS = ("Answer", "Correct_Answer", "Correct", "answer")
+
+INDEX_SUFFIX = "-index.json"
+DEFAULT_SHARD_SIZE = 64 * 1024 * 1024
+
+
+def natural_key(name):
+    """ 按数字大小排序文件名：fl2 在 fl10 之前 """
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+def _normalize_stem(stem, subset=""):
+    """ 元数据与文件名的匹配键：去掉子集前缀，纯数字去掉补零（ss12 / 12 / 00012 → 12） """
+    if subset and stem.startswith(subset) and stem[len(subset):].isdigit():
+        stem = stem[len(subset):]
+    return str(int(stem)) if stem.isdigit() else stem
+
+
+def _first_present(record, columns):
+    for column in columns:
+        if record.get(column):
+            return record[column]
+    return None
+
+
+def load_metadata(path, subset=""):
+    """
+    读取一个子集的试次元数据，返回 {匹配键: {"target", "options", "condition", "answer"}}：
+      - .xlsx：Target / Option_Left / Option_Right / Image 列，条件列和正确答案列可选；
+      - .arrow：清单（manifest.py），condition 列即条件。
+    """
+    metadata = {}
+    if path.endswith(".arrow"):
+        from manifest import open_manifest
+
+        table = open_manifest(path)
+        rows = zip(*(table.column(name).to_pylist() for name in ("image_id", "position", "text", "condition")))
+        for image_id, position, text, condition in rows:
+            entry = metadata.setdefault(_normalize_stem(image_id, subset),
+                                        {"target": "", "options": ["", ""], "condition": condition})
+            if position == "target":
+                entry["target"] = text
+            else:
+                entry["options"][0 if position == "left" else 1] = text
+        return metadata
+
+    from workbook_reader import image_filename, iter_records
+
+    for record in iter_records(path):
+        if not record.get("Image"):
+            continue
+        entry = {"target": record.get("Target", "")}
+        if "Option_Left" in record or "Option_Right" in record:
+            entry["options"] = [record.get("Option_Left", ""), record.get("Option_Right", "")]
+        condition = _first_present(record, CONDITION_COLUMNS)
+        answer = _first_present(record, ANSWER_COLUMNS)
+        if condition is not None:
+            entry["condition"] = condition
+        if answer is not None:
+            entry["answer"] = answer
+        metadata[_normalize_stem(image_filename(record["Image"])[:-len(".png")], subset)] = entry
+    return metadata
+
+
+def collect_samples(image_root):
+    """
+    列出 image_root 下的图片：每个子文件夹是一个子集（s、ss、fl、fls、fn、fns），
+    返回按子集、文件名（数字顺序）排序的 [(子集, 文件路径), ...]。image_root 下直接放图片时子集为空。
+    """
+    samples = []
+    entries = sorted(os.listdir(image_root))
+    for name in entries:
+        path = os.path.join(image_root, name)
+        if os.path.isdir(path):
+            files = sorted((f for f in os.listdir(path) if f.lower().endswith(IMAGE_EXTENSIONS)), key=natural_key)
+            samples.extend((name, os.path.join(path, f)) for f in files)
+    files = sorted((f for f in entries if f.lower().endswith(IMAGE_EXTENSIONS)), key=natural_key)
+    samples.extend(("", os.path.join(image_root, f)) for f in files)
+    return samples
+
+
+# ========== 2) 打包 ==========
+def _add_member(tar, name, data):
+    """ 写入一个成员（时间戳、属主固定，打包结果可复现），返回数据在分片中的 (偏移, 长度) """
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mode = 0o644
+    info.mtime = 0
+    tar.addfile(info, io.BytesIO(data))
+    padded = (len(data) + tarfile.BLOCKSIZE - 1) // tarfile.BLOCKSIZE * tarfile.BLOCKSIZE
+    return [tar.offset - padded, len(data)]
+
+
+def pack_shards(image_root, output_dir, prefix="stimuli", metadata_paths=None, shard_size=DEFAULT_SHARD_SIZE):
+    """
+    把 image_root 下的图片连同试次元数据顺序写入若干个不压缩的 tar 分片（WebDataset 布局）：
+      每个样本是同名前缀的两个成员 <子集>/<文件名>.png 和 <子集>/<文件名>.json，
+      分片超过 shard_size 字节后开始写下一个分片。
+    另写 <prefix>-index.json，记录每个样本各成员所在的分片、数据偏移和长度，用于随机读取。
+    metadata_paths 为 {子集: 元数据文件路径}，见 load_metadata。
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    metadata = {subset: load_metadata(path, subset) for subset, path in (metadata_paths or {}).items()}
+
+    shards, index = [], []
+    tar = None
+    for subset, path in collect_samples(image_root):
+        if tar is None or tar.offset >= shard_size:
+            if tar is not None:
+                tar.close()
+            shards.append(f"{prefix}-{len(shards):05d}.tar")
+            tar = tarfile.open(os.path.join(output_dir, shards[-1]), "w", format=tarfile.USTAR_FORMAT)
+
+        filename = os.path.basename(path)
+        stem, ext = os.path.splitext(filename)
+        key = f"{subset}/{stem}" if subset else stem
+        info = {"key": key, "subset": subset, "file": filename}
+        info.update(SUBSET_INFO.get(subset, {}))
+        info.update(metadata.get(subset, {}).get(_normalize_stem(stem, subset), {}))
+
+        with open(path, "rb") as f:
+            image_member = _add_member(tar, key + ext.lower(), f.read())
+        json_member = _add_member(tar, key + ".json", json.dumps(info, ensure_ascii=False).encode("utf-8"))
+        index.append({"key": key, "shard": len(shards) - 1, "image": image_member,
+                      "image_ext": ext.lower(), "json": json_member})
+    if tar is not None:
+        tar.close()
+
+    index_path = os.path.join(output_dir, prefix + INDEX_SUFFIX)
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump({"shards": shards, "samples": index}, f, ensure_ascii=False)
+    return index_path
+
+
+# ========== 3) 读取 ==========
+class ShardReader:
+    """
+    通过索引读取分片中的样本，不解包：
+      - reader[i] / reader["fl/fl1"]：随机读取一个样本；
+      - for sample in reader：按分片顺序流式读取。
+    分片以只读方式内存映射，读取一个成员只是一次切片。
+    每个样本为 {"key": ..., "image": 图片字节, "image_ext": ".png", "metadata": 元数据字典}。
+    """
+
+    def __init__(self, index_path):
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+        self.directory = os.path.dirname(os.path.abspath(index_path))
+        self.shards = index["shards"]
+        self.samples = index["samples"]
+        self._positions = {entry["key"]: i for i, entry in enumerate(self.samples)}
+        self._maps = {}
+
+    def __len__(self):
+        return len(self.samples)
+
+    def keys(self):
+        return [entry["key"] for entry in self.samples]
+
+    def _map(self, shard):
+        if shard not in self._maps:
+            with open(os.path.join(self.directory, self.shards[shard]), "rb") as f:
+                self._maps[shard] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._maps[shard]
+
+    def _read(self, shard, member):
+        offset, size = member
+        return self._map(shard)[offset:offset + size]
+
+    def __getitem__(self, item):
+        entry = self.samples[self._positions[item] if isinstance(item, str) else item]
+        return {
+            "key": entry["key"],
+            "image": self._read(entry["shard"], entry["image"]),
+            "image_ext": entry["image_ext"],
+            "metadata": json.loads(self._read(entry["shard"], entry["json"])),
+        }
+
+    def __iter__(self):
+        for i in range(len(self.samples)):
+            yield self[i]
+
+    def close(self):
+        for mapped in self._maps.values():
+            mapped.close()
+        self._maps.clear()
+
+
+def iter_shard(path_or_fileobj):
+    """
+    不借助索引、顺序流式读取一个 tar 分片（也可以是管道或网络流），
+    把同一前缀的成员合并成一个样本，格式与 ShardReader 相同。
+    """
+    if isinstance(path_or_fileobj, str):
+        tar = tarfile.open(path_or_fileobj, "r|")
+    else:
+        tar = tarfile.open(fileobj=path_or_fileobj, mode="r|")
+    sample = None
+    with tar:
+        for member in tar:
+            key, ext = os.path.splitext(member.name)
+            if sample is None or sample["key"] != key:
+                if sample is not None:
+                    yield sample
+                sample = {"key": key}
+            data = tar.extractfile(member).read()
+            if ext == ".json":
+                sample["metadata"] = json.loads(data)
+            else:
+                sample["image"] = data
+                sample["image_ext"] = ext
+    if sample is not None:
+        yield sample
+
+
+# ========== 4) 基准测试 ==========
+def benchmark(image_root, index_path):
+    """ 比较逐个打开图片文件与从分片顺序 / 随机 / 流式读取全部样本的耗时 """
+    import random
+
+    paths = [path for _, path in collect_samples(image_root)]
+    start = time.perf_counter()
+    total = 0
+    for path in paths:
+        with open(path, "rb") as f:
+            total += len(f.read())
+    files_seconds = time.perf_counter() - start
+
+    reader = ShardReader(index_path)
+    start = time.perf_counter()
+    shard_total = sum(len(sample["image"]) for sample in reader)
+    sequential_seconds = time.perf_counter() - start
+
+    order = list(range(len(reader)))
+    random.Random(0).shuffle(order)
+    start = time.perf_counter()
+    random_total = sum(len(reader[i]["image"]) for i in order)
+    random_seconds = time.perf_counter() - start
+    reader.close()
+
+    start = time.perf_counter()
+    stream_total = sum(len(sample["image"]) for shard in reader.shards
+                       for sample in iter_shard(os.path.join(reader.directory, shard)))
+    stream_seconds = time.perf_counter() - start
+
+    if not total == shard_total == random_total == stream_total:
+        raise AssertionError("分片中的图片与原文件不一致")
+    n = len(paths)
+    print(f"样本数：{n}，图片共 {total / 2 ** 20:.1f} MB，分片 {len(reader.shards)} 个")
+    for name, seconds in (("逐个打开文件", files_seconds), ("分片顺序读取", sequential_seconds),
+                          ("分片随机读取", random_seconds), ("tar 流式读取", stream_seconds)):
+        print(f"  {name}：{seconds * 1000:.1f} ms，{n / seconds:.0f} 样本/秒")
+
+
+def parse_size(value):
+    """ "64MB" / "512KB" / "1048576" → 字节数 """
+    units = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+    value = value.strip().upper()
+    for unit, factor in units.items():
+        if value.endswith(unit):
+            return int(float(value[:-len(unit)]) * factor)
+    return int(value)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="把刺激图片打包成 tar 分片（WebDataset 布局）并读取")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pack = subparsers.add_parser("pack", help="打包图片和元数据")
+    pack.add_argument("image_root", help="图片根目录，例如 Experiment/Final_image/Image")
+    pack.add_argument("output_dir", help="分片输出文件夹")
+    pack.add_argument("--prefix", default="stimuli", help="分片文件名前缀，默认 stimuli")
+    pack.add_argument("--shard-size", default="64MB", help="单个分片的大小上限，默认 64MB")
+    pack.add_argument("--metadata", action="append", default=[], metavar="子集=文件",
+                      help="子集的试次元数据（Excel 或清单），例如 ss=ss.xlsx，可重复")
+
+    bench = subparsers.add_parser("benchmark", help="比较逐文件读取与分片读取")
+    bench.add_argument("image_root")
+    bench.add_argument("index", help="pack 生成的 <prefix>-index.json")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        metadata_paths = dict(item.split("=", 1) for item in args.metadata)
+        index_path = pack_shards(args.image_root, args.output_dir, args.prefix, metadata_paths,
+                                 parse_size(args.shard_size))
+        reader = ShardReader(index_path)
+        print(f"已打包 {len(reader)} 个样本 → {len(reader.shards)} 个分片，索引：{index_path}")
+    else:
+        benchmark(args.image_root, args.index)
+
+
+if __name__ == "__main__":
+    main()
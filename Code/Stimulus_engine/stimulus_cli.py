@@ -0,0 +1,153 @@
+"""
+刺激图片生成的统一命令行入口（无 tkinter、无交互输入，可在渲染节点 / 流水线中运行）。
+
+示例：
+    python stimulus_cli.py squared_stroop --workbook ss.xlsx --output-dir out/ss --workers 8
+    python stimulus_cli.py origin_flanker --workbook fl.xlsx --start-row 1 --end-row 100 --output-dir out/fl
+    python stimulus_cli.py squared_stroop --manifest stroop_letter_type1_manifest.arrow --output-dir out/ss
+    python stimulus_cli.py squared_flanker --workbook fls.xlsx --output-dir out/fls --widths 224,336,448,1000
+    python stimulus_cli.py stroop_image --workbook data.xlsx --columns Title,Wrong_Option,Right_Option --output-dir out
+    python stimulus_cli.py flanker_image --workbook data.xlsx --columns index --output-dir out
+"""
+import argparse
+import os
+import sys
+import time
+
+CODE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Final_experiment_image_extraction 中四个脚本对应的 (任务, 布局, 默认文本列)
+FINAL_GENERATORS = {
+    "squared_stroop": ("stroop", "squared", "Target,Option_Left,Option_Right"),
+    "origin_stroop": ("stroop", "origin", "Target"),
+    "squared_flanker": ("flanker", "squared", "Target,Option_Left,Option_Right"),
+    "origin_flanker": ("flanker", "origin", "Target"),
+}
+
+
+def split_columns(value):
+    """ 逗号分隔的列名称 → 列表 """
+    return [col.strip() for col in value.split(",") if col.strip()]
+
+
+def run_final_generator(args):
+    """ squared/origin × stroop/flanker：直接栅格化引擎 + 进程池 """
+    from batch_render import TASK_BACKGROUNDS, build_jobs, build_manifest_jobs, print_worker_stats, render_batch
+    from image_encoder import ImageEncoder
+    from pyramid_render import parse_widths, render_pyramid
+
+    task, layout, _ = FINAL_GENERATORS[args.generator]
+    text_columns = split_columns(args.columns)
+    expected = 3 if layout == "squared" else 1
+    if len(text_columns) != expected:
+        print(f"错误：{args.generator} 需要恰好 {expected} 个文本列。")
+        return 1
+
+    try:
+        if args.manifest:
+            jobs = build_manifest_jobs(args.manifest, layout, args.start_row, args.end_row)
+        else:
+            jobs = build_jobs(args.workbook, task, layout, args.start_row, args.end_row, sheet=args.sheet,
+                              text_columns=text_columns, image_column=args.image_column)
+        start = time.perf_counter()
+        encoder = ImageEncoder(args.format, compress_level=args.compress_level, webp_method=args.webp_method)
+        if args.widths:
+            stats = render_pyramid(jobs, args.output_dir, layout, TASK_BACKGROUNDS[task], parse_widths(args.widths),
+                                   args.workers, incremental=not args.force, encoder=encoder)
+        else:
+            stats = render_batch(jobs, args.output_dir, layout, TASK_BACKGROUNDS[task], args.workers,
+                                 incremental=not args.force, encoder=encoder)
+    except ValueError as e:
+        print(f"错误：{e}")
+        return 1
+    rendered = sum(entry["images"] for entry in stats.values())
+    total = len(jobs) * (len(parse_widths(args.widths)) if args.widths else 1)
+    print(f"生成图片：{rendered} 张 → {args.output_dir}（未变化而跳过 {total - rendered} 张）")
+    print_worker_stats(stats, time.perf_counter() - start)
+    return 0
+
+
+def run_stroop_image(args):
+    """ Image_generator/Stroop_image_generator.py 的无交互版本 """
+    sys.path.insert(0, os.path.join(CODE_DIR, "Image_generator"))
+    import Stroop_image_generator
+
+    cols = split_columns(args.columns)
+    if len(cols) != 3:
+        print("错误：请输入恰好三个列名称。")
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+    Stroop_image_generator.generate_images(args.workbook, args.output_dir, args.start_row, args.end_row,
+                                           cols, sheet_name=args.sheet or 0)
+    return 0
+
+
+def run_flanker_image(args):
+    """ Image_generator/flanker_image_generator.py 的无交互版本 """
+    sys.path.insert(0, os.path.join(CODE_DIR, "Image_generator"))
+    import flanker_image_generator
+
+    cols = split_columns(args.columns)
+    if len(cols) != 1:
+        print("错误：flanker_image 只需要一个文本列。")
+        return 1
+    flanker_image_generator.generate_images_from_excel(args.workbook, args.output_dir, column=cols[0],
+                                                       sheet_name=args.sheet or 0,
+                                                       start_row=args.start_row, end_row=args.end_row)
+    return 0
+
+
+def add_common_arguments(parser, default_columns, with_manifest=False):
+    if with_manifest:
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument("--workbook", help="Excel 文件路径")
+        source.add_argument("--manifest", help="清单文件路径（Arrow IPC，见 manifest.py），代替 Excel")
+    else:
+        parser.add_argument("--workbook", required=True, help="Excel 文件路径")
+    parser.add_argument("--sheet", default=None, help="工作表名称，默认使用活动工作表 / 第一个工作表")
+    parser.add_argument("--start-row", type=int, default=1, help="起始行号（从1开始，表头除外；清单中为第几张图片），默认 1")
+    parser.add_argument("--end-row", type=int, default=None, help="结束行号，默认处理到最后一行")
+    parser.add_argument("--columns", default=default_columns, required=default_columns is None,
+                        help="用逗号分隔的文本列名称")
+    parser.add_argument("--output-dir", required=True, help="保存图片的文件夹")
+
+
+def build_parser():
+    from image_encoder import FORMATS
+
+    parser = argparse.ArgumentParser(description="刺激图片生成（无交互命令行）")
+    subparsers = parser.add_subparsers(dest="generator", required=True)
+
+    for name, (task, layout, default_columns) in FINAL_GENERATORS.items():
+        sub = subparsers.add_parser(name, help=f"{task} / {layout} 布局（Final_experiment_image_extraction/{name}.py）")
+        add_common_arguments(sub, default_columns, with_manifest=True)
+        sub.add_argument("--image-column", default="Image", help="作为文件名的列，全数字时补零到 5 位")
+        sub.add_argument("--workers", type=int, default=None, help="进程数，默认使用全部 CPU 核")
+        sub.add_argument("--force", action="store_true",
+                         help="忽略输出文件夹中的渲染索引，重新生成所有图片（默认只生成有变化的图片）")
+        sub.add_argument("--format", choices=list(FORMATS), default="png",
+                         help="输出格式：png（RGBA）、png-rgb、png-palette、webp（无损）、qoi，默认 png")
+        sub.add_argument("--compress-level", type=int, default=1, help="PNG 的 zlib 压缩级别 0~9，默认 1")
+        sub.add_argument("--webp-method", type=int, default=0, help="WebP 压缩力度 0~6，默认 0")
+        sub.add_argument("--widths", default=None,
+                         help="同时生成多个尺寸（宽度像素，逗号分隔，例如 224,336,448,1000），"
+                              "分别保存到 <output-dir>/<宽度>w/（见 pyramid_render.py）")
+        sub.set_defaults(func=run_final_generator)
+
+    sub = subparsers.add_parser("stroop_image", help="三列文本，字号 25（Image_generator/Stroop_image_generator.py）")
+    add_common_arguments(sub, None)
+    sub.set_defaults(func=run_stroop_image)
+
+    sub = subparsers.add_parser("flanker_image", help="单列文本，字号 70（Image_generator/flanker_image_generator.py）")
+    add_common_arguments(sub, "index")
+    sub.set_defaults(func=run_flanker_image)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
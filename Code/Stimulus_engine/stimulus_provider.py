@@ -0,0 +1,276 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from batch_render import TASK_BACKGROUNDS, build_jobs, build_manifest_jobs
+from glyph_cache import TextSpriteCache
+from image_encoder import ImageEncoder
+from raster_engine import RasterRenderer
+
+
+class StimulusProvider:
+    """
+    在内存中按需渲染刺激图片，不写 PNG、也不再从 Experiment/Final_image 读回。
+
+    jobs 与 batch_render.render_batch 相同：[(texts, colors, filename), ...]，按下标随机访问：
+      provider[i]            → (300, 500, 4) 的 uint8 数组（mode="RGB" 时为 3 通道）
+      provider.encoded(i)    → 按 encoder 编码后的字节串（默认 RGBA PNG，与写到磁盘的文件相同）
+      provider.by_id("00012") → 按图片编号（文件名去掉扩展名）取图
+    prefetch() 在后台线程或进程池中提前渲染，队列长度有上限，内存占用固定。
+    """
+
+    def __init__(self, jobs, layout, background, encoder=None, mode="RGBA", renderer=None):
+        if mode not in ("RGBA", "RGB"):
+            raise ValueError(f"未知的 mode：{mode}，应为 RGBA 或 RGB。")
+        self.jobs = list(jobs)
+        self.layout = layout
+        self.background = background
+        self.encoder = encoder if encoder is not None else ImageEncoder()
+        self.mode = mode
+        self.renderer = renderer if renderer is not None else RasterRenderer(layout, background, encoder=self.encoder)
+        self._ids = {os.path.splitext(filename)[0]: i for i, (_, _, filename) in enumerate(self.jobs)}
+        if len(self._ids) != len(self.jobs):
+            raise ValueError("图片编号存在重复，无法按编号访问。")
+
+    # ---------- 构建 ----------
+    @classmethod
+    def from_manifest(cls, manifest_path, task, layout="squared", start_row=1, end_row=None, **kwargs):
+        """ 从清单（manifest.py，Arrow IPC）读取第 start_row ~ end_row 张图片；task 为 stroop / flanker，决定背景色 """
+        jobs = build_manifest_jobs(manifest_path, layout, start_row, end_row)
+        return cls(jobs, layout, TASK_BACKGROUNDS[task], **kwargs)
+
+    @classmethod
+    def from_workbook(cls, file_path, task, layout="squared", start_row=1, end_row=None, sheet=None,
+                      text_columns=None, image_column="Image", **kwargs):
+        """ 从 Excel 读取（与 stimulus_cli.py 的 final-experiment 子命令相同的列和颜色规则） """
+        jobs = build_jobs(file_path, task, layout, start_row, end_row, sheet, text_columns, image_column)
+        return cls(jobs, layout, TASK_BACKGROUNDS[task], **kwargs)
+
+    # ---------- 随机访问 ----------
+    def __len__(self):
+        return len(self.jobs)
+
+    def image_id(self, index):
+        return os.path.splitext(self.jobs[index][2])[0]
+
+    def __getitem__(self, index):
+        texts, colors, _ = self.jobs[index]
+        pixels = self.renderer.render(texts, colors)
+        return pixels[..., :3].copy() if self.mode == "RGB" else pixels
+
+    def encoded(self, index):
+        texts, colors, _ = self.jobs[index]
+        return self.encoder.encode(self.renderer.render(texts, colors))
+
+    def by_id(self, image_id, encoded=False):
+        index = self._ids[image_id]
+        return self.encoded(index) if encoded else self[index]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.image_id(index), self[index]
+
+    # ---------- 预取 ----------
+    def prefetch(self, indices=None, depth=16, encoded=False, workers=0):
+        """
+        按 indices 的顺序（默认全部）产出 (图片编号, 数组或字节串)，后台最多提前渲染 depth 张。
+        workers=0：一个后台线程渲染（贴图合成、PNG 压缩时会释放 GIL，可与模型推理重叠）；
+        workers>0：进程池渲染，同时在途的任务不超过 depth 个，结果仍按 indices 的顺序产出。
+        提前结束迭代时后台任务随之停止。
+        """
+        indices = range(len(self)) if indices is None else list(indices)
+        if workers:
+            return self._prefetch_processes(indices, depth, encoded, workers)
+        return self._prefetch_thread(indices, depth, encoded)
+
+    def _prefetch_thread(self, indices, depth, encoded):
+        buffer = queue.Queue(maxsize=depth)
+        stop = threading.Event()
+        done = object()
+
+        def offer(item):
+            """ 队列满时等待，但消费方提前结束（stop 被设置）时放弃；返回是否放入 """
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for index in indices:
+                    if not offer((self.image_id(index), self.encoded(index) if encoded else self[index])):
+                        return
+            except Exception as error:  # 渲染出错时交给消费方抛出
+                offer(error)
+                return
+            offer(done)
+
+        thread = threading.Thread(target=produce, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = buffer.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
+    def _prefetch_processes(self, indices, depth, encoded, workers):
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.layout, self.background, self.encoder, self.mode)) as pool:
+            pending = deque()
+            it = iter(indices)
+            try:
+                for index in it:
+                    texts, colors, _ = self.jobs[index]
+                    pending.append((self.image_id(index), pool.submit(_render_job, texts, colors, encoded)))
+                    if len(pending) >= depth:
+                        image_id, future = pending.popleft()
+                        yield image_id, future.result()
+                while pending:
+                    image_id, future = pending.popleft()
+                    yield image_id, future.result()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+
+# ================= 进程池 ===================
+_worker_provider = None
+
+
+def _init_worker(layout, background, encoder, mode):
+    """ 每个工作进程只创建一次渲染器（字体、背景模板、贴图缓存） """
+    global _worker_provider
+    _worker_provider = StimulusProvider([], layout, background, encoder, mode)
+
+
+def _render_job(texts, colors, encoded):
+    pixels = _worker_provider.renderer.render(texts, colors)
+    if encoded:
+        return _worker_provider.encoder.encode(pixels)
+    return pixels[..., :3].copy() if _worker_provider.mode == "RGB" else pixels
+
+
+# ================= 检查与基准测试 ===================
+def sample_jobs(n=200):
+    """ 检查和测速用的 stroop 试次：颜色词轮换、文字颜色与词义不一致 """
+    words = ["Red", "Blue", "Green", "Yellow", "Purple", "Orange", "Black"]
+    colors = ["#FF0000", "#0000FF", "#00FF00", "#FFFF00", "#800080", "#FFA500", "#000000"]
+    jobs = []
+    for i in range(n):
+        a, b, c = i % 7, (i + 2) % 7, (i + 4) % 7
+        jobs.append(([words[a], words[b], words[a]], [colors[c], colors[a], colors[c]], f"{i + 1:05d}.png"))
+    return jobs
+
+
+def verify(n=50):
+    """ 与 render_batch 写出的 PNG 比较：数组逐像素相同、编码后的字节串与文件内容相同 """
+    import tempfile
+
+    from PIL import Image
+
+    from batch_render import render_batch
+
+    jobs = sample_jobs(n)
+    provider = StimulusProvider(jobs, "squared", TASK_BACKGROUNDS["stroop"])
+    with tempfile.TemporaryDirectory() as folder:
+        render_batch(jobs, folder, "squared", TASK_BACKGROUNDS["stroop"], workers=1)
+        same_pixels = same_bytes = True
+        for index in range(n):
+            path = os.path.join(folder, jobs[index][2])
+            with Image.open(path) as image:
+                same_pixels &= np.array_equal(np.asarray(image.convert("RGBA")), provider[index])
+            with open(path, "rb") as f:
+                same_bytes &= f.read() == provider.encoded(index)
+    prefetched = [image_id for image_id, _ in provider.prefetch(range(n - 1, -1, -1), depth=4)]
+    same_order = prefetched == [provider.image_id(i) for i in range(n - 1, -1, -1)]
+
+    # 提前结束：等后台线程把队列填满、最后一项（结束标记）放不进去时再退出，迭代应立即返回
+    def break_early():
+        for _ in provider.prefetch(range(5), depth=4):
+            time.sleep(0.5)
+            break
+
+    checker = threading.Thread(target=break_early, daemon=True)
+    checker.start()
+    checker.join(timeout=10)
+    stops = not checker.is_alive()
+    pooled = all(np.array_equal(pixels, provider.by_id(image_id))
+                 for image_id, pixels in provider.prefetch(range(10), depth=3, workers=2))
+
+    # 后台预取与随机访问同时进行，共用一个只能放 2 张贴图的缓存（不停淘汰）
+    background = TASK_BACKGROUNDS["stroop"]
+    shared = StimulusProvider(jobs, "squared", background,
+                              renderer=RasterRenderer("squared", background, sprite_cache=TextSpriteCache(maxsize=2)))
+    concurrent = True
+    for step, (image_id, pixels) in enumerate(shared.prefetch(depth=4)):
+        index = step * 7 % n
+        concurrent &= np.array_equal(pixels, provider.by_id(image_id)) and np.array_equal(shared[index], provider[index])
+    print(f"  {n} 张：数组{'相同' if same_pixels else '不同'}，编码字节{'相同' if same_bytes else '不同'}，"
+          f"预取顺序{'正确' if same_order else '错误'}，进程池结果{'相同' if pooled else '不同'}，"
+          f"提前结束{'正常返回' if stops else '卡住'}，预取时随机访问{'正确' if concurrent else '错误'}")
+    return same_pixels and same_bytes and same_order and pooled and stops and concurrent
+
+
+def benchmark(n=500):
+    """ 写 PNG 再读回解码（原来的流程）与在内存中直接取数组的每张耗时 """
+    import tempfile
+
+    from PIL import Image
+
+    from batch_render import render_batch
+
+    jobs = sample_jobs(n)
+    background = TASK_BACKGROUNDS["stroop"]
+    with tempfile.TemporaryDirectory() as folder:
+        start = time.perf_counter()
+        render_batch(jobs, folder, "squared", background, workers=1)
+        for _, _, filename in jobs:
+            with Image.open(os.path.join(folder, filename)) as image:
+                np.asarray(image.convert("RGB"))
+        disk_ms = (time.perf_counter() - start) / n * 1000
+
+    provider = StimulusProvider(jobs, "squared", background, mode="RGB")
+    start = time.perf_counter()
+    for _ in provider.prefetch(depth=16):
+        pass
+    memory_ms = (time.perf_counter() - start) / n * 1000
+    print(f"  {n} 张：写 PNG 再读回 {disk_ms:.2f} ms/张，内存中渲染（预取）{memory_ms:.2f} ms/张"
+          f"（{disk_ms / memory_ms:.1f} 倍）")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="在内存中按需渲染刺激图片：检查 / 测速")
+    parser.add_argument("--verify", action="store_true", help="与 render_batch 写出的 PNG 逐像素、逐字节比较")
+    parser.add_argument("--benchmark", action="store_true", help="比较写盘再读回与内存中渲染的耗时")
+    args = parser.parse_args()
+
+    ok = True
+    if args.verify or not args.benchmark:
+        print("检查：")
+        ok = verify()
+    if args.benchmark:
+        print("基准测试：")
+        benchmark()
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import json
+import os
+import time
+
+import numpy as np
+
+from shard_archive import collect_samples
+
+# 缓存默认放在图片根目录旁的 .tensor_cache/（已在 .gitignore 中），每个子集一个 <子集>.npy
+INDEX_FILE = "index.json"
+CACHE_VERSION = 1
+HEIGHT, WIDTH, CHANNELS = 300, 500, 3
+
+
+def default_cache_dir(image_root):
+    return os.path.join(os.path.dirname(os.path.abspath(image_root)), ".tensor_cache")
+
+
+def sample_key(subset, path):
+    """ 图片编号：<子集>/<文件名去掉扩展名>，与 ShardReader 的 key 相同；没有子集时只有文件名 """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return f"{subset}/{stem}" if subset and subset != "root" else stem
+
+
+def _signature(paths):
+    """ 文件名、大小、修改时间；任一图片变化时重新解码该子集 """
+    return [[os.path.basename(p), os.path.getsize(p), os.stat(p).st_mtime_ns] for p in paths]
+
+
+def _load_index(cache_dir):
+    path = os.path.join(cache_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return {"version": CACHE_VERSION, "subsets": {}}
+    with open(path, encoding="utf-8") as f:
+        index = json.load(f)
+    return index if index.get("version") == CACHE_VERSION else {"version": CACHE_VERSION, "subsets": {}}
+
+
+# ================= 构建 ===================
+def build_tensor_cache(image_root, cache_dir=None, subsets=None, force=False):
+    """
+    把 image_root 下每个子集（s、ss、fl、fls、fn、fns）的 PNG 一次性解码成连续的 uint8 数组
+    (N, 300, 500, 3)，存为 <cache_dir>/<子集>.npy，图片编号（fl/fl1 …，与 ShardReader 的 key 相同）
+    按行号记在 index.json。直接写入 open_memmap，内存中同时只有一张图片。
+    图片没有变化的子集跳过；返回 {子集: 是否重新构建}。
+    """
+    from PIL import Image
+
+    cache_dir = cache_dir or default_cache_dir(image_root)
+    os.makedirs(cache_dir, exist_ok=True)
+    index = _load_index(cache_dir)
+    grouped = {}
+    for subset, path in collect_samples(image_root):
+        grouped.setdefault(subset or "root", []).append(path)
+
+    built = {}
+    for subset, paths in grouped.items():
+        if subsets and subset not in subsets:
+            continue
+        signature = _signature(paths)
+        entry = index["subsets"].get(subset)
+        data_path = os.path.join(cache_dir, f"{subset}.npy")
+        if not force and entry and entry["signature"] == signature and os.path.exists(data_path):
+            built[subset] = False
+            continue
+        # 先写临时文件再替换，其他进程正在映射的旧文件不受影响
+        temp_path = data_path + ".tmp.npy"
+        array = np.lib.format.open_memmap(temp_path, mode="w+", dtype=np.uint8,
+                                          shape=(len(paths), HEIGHT, WIDTH, CHANNELS))
+        for row, path in enumerate(paths):
+            with Image.open(path) as image:
+                if image.size != (WIDTH, HEIGHT):
+                    raise ValueError(f"{path} 的尺寸为 {image.size}，应为 {(WIDTH, HEIGHT)}")
+                array[row] = np.asarray(image.convert("RGB"))
+        array.flush()
+        del array
+        os.replace(temp_path, data_path)
+        index["subsets"][subset] = {
+            "file": f"{subset}.npy",
+            "shape": [len(paths), HEIGHT, WIDTH, CHANNELS],
+            "ids": [sample_key(subset, p) for p in paths],
+            "signature": signature,
+        }
+        built[subset] = True
+
+    # 子集按名称排序写入：cache[i] 的顺序与构建的先后（例如先只构建 ss）无关
+    index["subsets"] = dict(sorted(index["subsets"].items()))
+    # 索引同样先写临时文件再替换，构建过程中打开的 TensorCache 不会读到写了一半的索引
+    index_path = os.path.join(cache_dir, INDEX_FILE)
+    with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(index_path + ".tmp", index_path)
+    return built
+
+
+# ================= 读取 ===================
+class TensorCache:
+    """
+    以只读内存映射打开缓存，不解码 PNG：
+      - cache["fl/fl1"] / cache[i]：一张 (300, 500, 3) uint8 图片（只是一次切片，不复制）；
+      - cache.subset("fls")：整个子集的 (N, 300, 500, 3) 数组；
+      - cache.batch(keys)：按编号取一批，返回 (len(keys), 300, 500, 3)。
+    同一台机器上的多个评测进程映射同一个文件，通过系统页缓存共享内存。
+    """
+
+    def __init__(self, cache_dir):
+        self.directory = cache_dir
+        index = _load_index(cache_dir)
+        if not index["subsets"]:
+            raise FileNotFoundError(f"{cache_dir} 中没有张量缓存，请先运行 python tensor_cache.py build <图片根目录>")
+        self.subsets = index["subsets"]
+        self._keys = []
+        self._positions = {}
+        for subset, entry in sorted(self.subsets.items()):
+            for row, key in enumerate(entry["ids"]):
+                self._positions[key] = (subset, row)
+                self._keys.append(key)
+        self._arrays = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def keys(self):
+        return list(self._keys)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def subset(self, name):
+        if name not in self._arrays:
+            self._arrays[name] = np.load(os.path.join(self.directory, self.subsets[name]["file"]), mmap_mode="r")
+        return self._arrays[name]
+
+    def __getitem__(self, item):
+        subset, row = self._positions[item if isinstance(item, str) else self._keys[item]]
+        return self.subset(subset)[row]
+
+    def batch(self, keys):
+        return np.stack([self[key] for key in keys])
+
+    def __iter__(self):
+        for key in self._keys:
+            yield key, self[key]
+
+    def close(self):
+        self._arrays.clear()
+
+
+# ================= 检查与基准测试 ===================
+def verify(image_root, cache_dir=None):
+    """ 每个缓存切片与重新解码的 PNG 逐像素相同 """
+    from PIL import Image
+
+    cache = TensorCache(cache_dir or default_cache_dir(image_root))
+    samples = collect_samples(image_root)
+    mismatched = missing = 0
+    for subset, path in samples:
+        key = sample_key(subset, path)
+        if key not in cache:
+            missing += 1
+            continue
+        with Image.open(path) as image:
+            mismatched += not np.array_equal(np.asarray(image.convert("RGB")), cache[key])
+    ok = mismatched == 0 and missing == 0 and len(cache) == len(samples)
+    print(f"  {len(samples)} 张图片：缓存 {len(cache)} 张，不一致 {mismatched} 张，缓存中缺少 {missing} 张")
+    return ok
+
+
+def benchmark(image_root, cache_dir=None):
+    """ 逐张打开 PNG 解码与从内存映射取切片的耗时（随机顺序） """
+    import random
+
+    from PIL import Image
+
+    paths = [path for _, path in collect_samples(image_root)]
+    cache = TensorCache(cache_dir or default_cache_dir(image_root))
+    order = list(range(len(paths)))
+    random.Random(0).shuffle(order)
+
+    start = time.perf_counter()
+    for i in order:
+        with Image.open(paths[i]) as image:
+            np.asarray(image.convert("RGB"))
+    decode_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in order:
+        np.asarray(cache[i]).sum(dtype=np.uint64)  # 实际读取像素，而不只是创建视图
+    cache_seconds = time.perf_counter() - start
+
+    n = len(paths)
+    size = sum(os.path.getsize(os.path.join(cache.directory, e["file"])) for e in cache.subsets.values())
+    print(f"样本数：{n}，缓存共 {size / 2 ** 20:.0f} MB")
+    for name, seconds in (("逐张解码 PNG", decode_seconds), ("内存映射切片（含读取全部像素）", cache_seconds)):
+        print(f"  {name}：{seconds * 1000 / n:.3f} ms/张，{n / seconds:.0f} 张/秒")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="把 Final_image 各子集解码成内存映射的 uint8 张量缓存")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, text in (("build", "解码并写入缓存（图片未变化的子集跳过）"),
+                       ("verify", "逐像素比较缓存与 PNG"),
+                       ("benchmark", "比较解码 PNG 与内存映射读取")):
+        sub = subparsers.add_parser(name, help=text)
+        sub.add_argument("image_root", help="图片根目录，例如 Experiment/Final_image/Image")
+        sub.add_argument("--cache-dir", default=None, help="缓存文件夹，默认图片根目录旁的 .tensor_cache")
+        if name == "build":
+            sub.add_argument("--subsets", default=None, help="只构建这些子集，例如 fl,fls")
+            sub.add_argument("--force", action="store_true", help="全部重新解码")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        built = build_tensor_cache(args.image_root, args.cache_dir,
+                                   args.subsets.split(",") if args.subsets else None, args.force)
+        for subset, rebuilt in built.items():
+            print(f"  {subset}：{'已构建' if rebuilt else '未变化，跳过'}")
+        print(f"用时 {time.perf_counter() - start:.2f} 秒，缓存：{os.path.abspath(args.cache_dir or default_cache_dir(args.image_root))}")
+    elif args.command == "verify":
+        if not verify(args.image_root, args.cache_dir):
+            raise SystemExit(1)
+    else:
+        benchmark(args.image_root, args.cache_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import os
+
+from openpyxl import load_workbook
+
+# 固定使用的列名称（注意大小写需与Excel中一致）
+TEXT_COLUMNS = ("Target", "Option_Left", "Option_Right")
+IMAGE_COLUMN = "Image"
+
+
+def get_font_color(cell):
+    """
+    从 openpyxl 单元格中获取字体颜色，返回 hex 字符串。
+    如果未设置字体颜色，则默认返回黑色 "#000000"。
+    """
+    if cell.font and cell.font.color and cell.font.color.type == 'rgb' and cell.font.color.rgb:
+        rgb = cell.font.color.rgb  # 通常为 'FFRRGGBB' 格式
+        if len(rgb) == 8:
+            # 忽略前两位Alpha
+            return "#" + rgb[2:]
+        else:
+            return "#" + rgb
+    return "#000000"  # 默认返回黑色
+
+
+def cell_text(value):
+    """ 读取文本值，若为空则置为空字符串，并去除空白 """
+    return str(value).strip() if value is not None else ""
+
+
+def image_filename(value):
+    """ Image 列作为文件名：全数字的值补零到 5 位，再加 .png 后缀 """
+    raw_filename = cell_text(value)
+    if raw_filename.isdigit():
+        raw_filename = raw_filename.zfill(5)
+    return raw_filename + ".png"
+
+
+def iter_stimulus_rows(file_path, start_row=1, end_row=None, text_columns=TEXT_COLUMNS,
+                       image_column=IMAGE_COLUMN, with_colors=True, sheet=None):
+    """
+    以只读模式流式读取第 start_row ~ end_row 个数据行（从 1 开始，表头除外；end_row 为 None 时读到最后一行），
+    逐行产出 (texts, colors, filename)：
+      - texts：text_columns 对应的文本，第一列（Target）若为全数字则补零到 5 位；
+      - colors：各文本单元格的字体颜色（with_colors=False 时为 None）；
+      - filename：由 Image 列得到的文件名。
+    只读模式下工作表按行顺序解析一次，不为每个单元格建立对象，内存占用与表格行数无关。
+    """
+    wb = load_workbook(file_path, read_only=True)
+    try:
+        ws = wb[sheet] if sheet else wb.active
+
+        # 构造表头映射（假设第一行是表头）
+        header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        header_to_col = {name: idx for idx, name in enumerate(header) if name is not None}
+        missing = [name for name in list(text_columns) + [image_column] if name not in header_to_col]
+        if missing:
+            raise ValueError(f"找不到指定的列：{', '.join(missing)}，请检查表头名称。")
+        text_col_idx = [header_to_col[name] for name in text_columns]
+        image_col_idx = header_to_col[image_column]
+
+        # 只需要字体颜色时才构造单元格对象；同一字体的颜色只解析一次
+        font_colors = {}
+        max_row = end_row + 1 if end_row is not None else None
+        max_col = max(text_col_idx + [image_col_idx]) + 1
+        for row in ws.iter_rows(min_row=start_row + 1, max_row=max_row, max_col=max_col,
+                                values_only=not with_colors):
+            row = tuple(row) + (None,) * (max_col - len(row))  # 行尾缺失的单元格
+            if with_colors:
+                cells = [row[idx] for idx in text_col_idx]
+                texts = [cell_text(getattr(cell, "value", None)) for cell in cells]
+                colors = []
+                for cell in cells:
+                    font = getattr(cell, "font", None)
+                    key = id(font)
+                    if key not in font_colors:
+                        font_colors[key] = get_font_color(cell) if font is not None else "#000000"
+                    colors.append(font_colors[key])
+                image_value = getattr(row[image_col_idx], "value", None)
+            else:
+                texts = [cell_text(row[idx]) for idx in text_col_idx]
+                colors = None
+                image_value = row[image_col_idx]
+
+            if texts and texts[0].isdigit():
+                texts[0] = texts[0].zfill(5)
+            yield texts, colors, image_filename(image_value)
+    finally:
+        wb.close()
+
+
+def read_stimulus_rows(file_path, start_row, end_row, text_columns=TEXT_COLUMNS,
+                       image_column=IMAGE_COLUMN, with_colors=True, sheet=None):
+    """ iter_stimulus_rows 的列表版本，返回 [(texts, colors, filename), ...] """
+    return list(iter_stimulus_rows(file_path, start_row, end_row, text_columns=text_columns,
+                                   image_column=image_column, with_colors=with_colors, sheet=sheet))
+
+
+def iter_records(file_path, sheet=None):
+    """ 以只读模式逐行读取整张表，产出 {表头: 文本} 字典（空单元格为空字符串），不读取字体颜色 """
+    wb = load_workbook(file_path, read_only=True)
+    try:
+        ws = wb[sheet] if sheet else wb.active
+        rows = ws.iter_rows(values_only=True)
+        header = [cell_text(name) for name in next(rows, ())]
+        for row in rows:
+            yield {name: cell_text(value) for name, value in zip(header, row) if name}
+    finally:
+        wb.close()
+
+
+# ========== 基准测试：整表加载 + ws.cell 逐格读取 vs 只读流式读取 ==========
+def _read_rows_full(file_path, start_row, end_row, text_columns=TEXT_COLUMNS, image_column=IMAGE_COLUMN):
+    """ 原来的读取方式（squared_stroop.py）：完整加载工作簿，再用 ws.cell 逐个读取单元格 """
+    wb = load_workbook(file_path)
+    ws = wb.active
+    header_to_col = {cell.value: cell.column for cell in ws[1]}
+    text_col_idx = [header_to_col[name] for name in text_columns]
+    image_col_idx = header_to_col[image_column]
+    end_row = min(end_row, ws.max_row - 1)
+
+    rows = []
+    for i in range(start_row, end_row + 1):
+        cells = [ws.cell(row=i + 1, column=col) for col in text_col_idx]
+        texts = [cell_text(cell.value) for cell in cells]
+        if texts and texts[0].isdigit():
+            texts[0] = texts[0].zfill(5)
+        colors = [get_font_color(cell) for cell in cells]
+        rows.append((texts, colors, image_filename(ws.cell(row=i + 1, column=image_col_idx).value)))
+    return rows
+
+
+def write_benchmark_sheet(file_path, n_rows):
+    """ 生成 n_rows 行、带字体颜色的 stroop 表格（列：Target, Option_Left, Option_Right, Image） """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    words = ["Red", "Green", "Blue", "Yellow", "Purple", "Orange", "Black"]
+    fonts = [Font(color=c) for c in ("FF0000", "00FF00", "0000FF", "FFFF00", "800080", "FFA500", "000000")]
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(TEXT_COLUMNS) + [IMAGE_COLUMN])
+    for i in range(n_rows):
+        row = []
+        for j in range(3):
+            cell = WriteOnlyCell(ws, value=words[(i + j) % 7])
+            cell.font = fonts[(i * 3 + j) % 7]
+            row.append(cell)
+        ws.append(row + [i + 1])
+    wb.save(file_path)
+
+
+def benchmark(n_rows=100000):
+    """ 在 n_rows 行的表格上比较两种读取方式的耗时和 Python 内存峰值，并检查结果一致 """
+    import tempfile
+    import time
+    import tracemalloc
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, "benchmark.xlsx")
+        print(f"生成 {n_rows} 行测试表格...")
+        write_benchmark_sheet(file_path, n_rows)
+
+        readers = [
+            ("load_workbook + ws.cell", lambda: _read_rows_full(file_path, 1, n_rows)),
+            ("只读流式读取", lambda: read_stimulus_rows(file_path, 1, n_rows)),
+            ("只读流式读取（逐行消费）", lambda: sum(1 for _ in iter_stimulus_rows(file_path, 1, n_rows))),
+        ]
+        results = []
+        for name, read in readers:
+            start = time.perf_counter()
+            result = read()
+            seconds = time.perf_counter() - start
+
+            tracemalloc.start()
+            read()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results.append(result)
+            print(f"  {name}：{seconds:.2f} 秒，{n_rows / seconds:.0f} 行/秒，内存峰值 {peak / 2 ** 20:.1f} MB")
+
+        if results[0] != results[1]:
+            raise AssertionError("两种读取方式的结果不一致")
+        print("两种读取方式的结果一致。")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Excel 刺激表读取基准测试")
+    parser.add_argument("--rows", type=int, default=100000, help="测试表格的数据行数，默认 100000")
+    benchmark(parser.parse_args().rows)
@@ -1,44 +1,107 @@
-import fitz  # PyMuPDF
 import io
-import matplotlib.pyplot as plt
-from PIL import Image
+import os
 
-# ==== 需要合并的 6 份 PDF 文件路径（请按实际文件名修改）====
+# ==== 需要合并的 6 份 PDF 文件（figure_engine.py 生成的文件名）====
 pdf_files = [
-    "3.Flanker Letter(Congruent vs. Incongruent).pdf",
-    "3.Flanker Number(Congruent vs. Incongruent).pdf",
-    "3.Stroop(Congruent vs. Incongruent).pdf",
-    "4.Flanker Letter(4 Condition Comparisons).pdf",
-    "4.Flanker Number(4 Condition Comparisons).pdf",
-    "Flanker_Letter_Comparison.pdf"
+    "3.Flanker_Letter_Congruent_vs_Incongruent.pdf",
+    "3.Flanker_Number_Congruent_vs_Incongruent.pdf",
+    "3.Stroop_Congruent_vs_Incongruent.pdf",
+    "4.Flanker_Letter_4_Condition_Comparisons.pdf",
+    "4.Flanker_Number_4_Condition_Comparisons.pdf",
+    "4.Stroop_4_Condition_Comparisons.pdf",
 ]
+OUTPUT_FILE = "merged_6_pdfs.pdf"
+GRID = (2, 3)  # 行数、列数
 
-# ==== 1) 将 PDF 首页转为图像（存到列表中） ====
-pixmaps = []
-for pdf in pdf_files:
-    doc = fitz.open(pdf)
-    page = doc.load_page(0)       # 只读取第 1 页
-    # dpi=200 可以根据需要改大/改小
-    pix = page.get_pixmap(dpi=300)
-    pixmaps.append(pix)
-    doc.close()
-
-# ==== 2) 用 Matplotlib 在 2×3 网格里展示这些图像 ====
-fig, axs = plt.subplots(nrows=2, ncols=3, figsize=(24, 15))  # 可调节大小
-axs = axs.flatten()  # 让 axs 变成一维，方便用索引 [0..5]
-
-for i, ax in enumerate(axs):
-    # 把 Pixmap 转换成 PIL Image
-    img_data = pixmaps[i].tobytes("png")        # 得到 PNG 字节流
-    img = Image.open(io.BytesIO(img_data))      # 转成 PIL Image
-    ax.imshow(img)    # 可按需加标题
-    ax.axis("off")                              # 不显示坐标轴
-
-plt.tight_layout()
-
-# ==== 3) 保存为 PDF 或 PNG ====
-plt.savefig("merged_6_pdfs.pdf", dpi=300, bbox_inches='tight')  # 输出 PDF
-# 如果想再存个 PNG，也可以加一句:
-# plt.savefig("merged_6_pdfs.png", dpi=300, bbox_inches='tight')
-
-plt.show()
+
+def compose_pdfs(pdf_paths, output_path, grid=GRID, gap=12):
+    """
+    矢量合并：把每份 PDF 的首页作为 XObject 原样放到一页的 2×3 网格中，不转成图像。
+    每格大小取所有首页中最大的宽和高（单位 pt），页面按比例缩放、在格内居中，格间留 gap pt。
+    输出大小与输入 PDF 之和相当，文字和线条仍是矢量。
+    """
+    import fitz  # PyMuPDF
+
+    rows, cols = grid
+    if len(pdf_paths) > rows * cols:
+        raise ValueError(f"{len(pdf_paths)} 份 PDF 放不进 {rows}×{cols} 的网格。")
+    sources = [fitz.open(pdf) for pdf in pdf_paths]
+    try:
+        cell_w = max(src[0].rect.width for src in sources)
+        cell_h = max(src[0].rect.height for src in sources)
+        out = fitz.open()
+        page = out.new_page(width=cols * cell_w + (cols - 1) * gap, height=rows * cell_h + (rows - 1) * gap)
+        for i, src in enumerate(sources):
+            r, c = divmod(i, cols)
+            x0, y0 = c * (cell_w + gap), r * (cell_h + gap)
+            page.show_pdf_page(fitz.Rect(x0, y0, x0 + cell_w, y0 + cell_h), src, 0)  # 默认保持宽高比并居中
+        out.save(output_path, garbage=3, deflate=True)
+        out.close()
+    finally:
+        for src in sources:
+            src.close()
+    return output_path
+
+
+def merge_pdfs(pdf_paths, output_path, dpi=300):
+    """ 栅格合并（原来的做法）：把每份 PDF 的首页转成 dpi 的图像，排成 2×3 网格后保存为 output_path，返回 figure """
+    import fitz  # PyMuPDF
+    import matplotlib.pyplot as plt
+    from PIL import Image
+
+    # ==== 1) 将 PDF 首页转为图像（存到列表中） ====
+    pixmaps = []
+    for pdf in pdf_paths:
+        doc = fitz.open(pdf)
+        page = doc.load_page(0)       # 只读取第 1 页
+        pix = page.get_pixmap(dpi=dpi)
+        pixmaps.append(pix)
+        doc.close()
+
+    # ==== 2) 用 Matplotlib 在 2×3 网格里展示这些图像 ====
+    fig, axs = plt.subplots(nrows=2, ncols=3, figsize=(24, 15))  # 可调节大小
+    axs = axs.flatten()  # 让 axs 变成一维，方便用索引 [0..5]
+
+    for i, ax in enumerate(axs):
+        # 把 Pixmap 转换成 PIL Image
+        img_data = pixmaps[i].tobytes("png")        # 得到 PNG 字节流
+        img = Image.open(io.BytesIO(img_data))      # 转成 PIL Image
+        ax.imshow(img)    # 可按需加标题
+        ax.axis("off")                              # 不显示坐标轴
+
+    plt.tight_layout()
+
+    # ==== 3) 保存为 PDF 或 PNG ====
+    fig.savefig(output_path, dpi=dpi, bbox_inches='tight')  # 输出 PDF
+    return fig
+
+
+def build_summary(figure_dir, output_path=None, mode="vector"):
+    """ 合并 figure_dir 中的 6 份 PDF（图构建流程中在这 6 张图都完成后调用），mode 为 "vector" 或 "raster" """
+    output_path = output_path or os.path.join(figure_dir, OUTPUT_FILE)
+    paths = [os.path.join(figure_dir, f) for f in pdf_files]
+    if mode == "vector":
+        return compose_pdfs(paths, output_path)
+
+    import matplotlib.pyplot as plt
+
+    fig = merge_pdfs(paths, output_path)
+    plt.close(fig)
+    return output_path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="把 6 份 PDF 合并成一页 2×3 的总图")
+    parser.add_argument("--figure-dir", default=".", help="6 份 PDF 所在的文件夹，默认当前文件夹")
+    parser.add_argument("--output", default=None, help=f"输出文件，默认 <figure-dir>/{OUTPUT_FILE}")
+    parser.add_argument("--mode", choices=["vector", "raster"], default="vector",
+                        help="vector：页面以矢量 XObject 放入网格（默认）；raster：原来的 300 dpi 栅格合并")
+    args = parser.parse_args()
+
+    import time
+
+    start = time.perf_counter()
+    output = build_summary(args.figure_dir, args.output, args.mode)
+    print(f"已保存：{output}（{os.path.getsize(output) / 1024:.0f} KB，用时 {time.perf_counter() - start:.2f} 秒）")